@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import List, Literal, Optional
 import os
 from pathlib import Path
 
@@ -13,6 +13,16 @@ class Settings(BaseSettings):
     
     # Database
     DATABASE_URL: str
+    DATABASE_REPLICA_URLS: str = ""  # Comma-separated read replicas for read-only endpoints
+    DATABASE_DIRECT_URL: Optional[str] = None  # Bypasses PgBouncer, for LISTEN (defaults to DATABASE_URL)
+    
+    # Connection pool (per worker process and per database URL)
+    DB_POOL_MODE: Literal["session", "transaction"] = "session"  # "transaction" behind PgBouncer transaction pooling: no pool in the app
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0  # Seconds to wait for a free connection
+    DB_POOL_RECYCLE: int = 1800  # Replace connections older than this many seconds
+    DB_ECHO: bool = False  # Log every SQL statement
     
     # API
     API_HOST: str = "0.0.0.0"
@@ -24,10 +34,72 @@ class Settings(BaseSettings):
     
     # OMDB API (primary movie data source)
     OMDB_API_KEY: str
+    OMDB_BASE_URL: str = "http://www.omdbapi.com"  # Point at a local stub for benchmarks
     
     # Gemini API (AI review generation)
     GEMINI_API_KEY: str
-    
+    GEMINI_BASE_URL: str = "https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash"
+    REVIEW_CACHE_TTL_HOURS: int = 168  # Generated reviews are reused for identical prompts for a week
+    GEMINI_MAX_CONCURRENCY: int = 4  # Concurrent Gemini calls per worker
+
+    # Housekeeping - how often each worker deletes expired review cache entries and old tombstones
+    HOUSEKEEPING_INTERVAL_MINUTES: float = 60.0
+    CHANGE_FEED_RETENTION_DAYS: int = 30  # Change-feed clients further behind must reload everything
+
+    # Request time budget - downstream API calls and DB statements share it
+    REQUEST_TIMEOUT_SECONDS: float = 25.0
+    REQUEST_TIMEOUT_MAX_SECONDS: float = 120.0  # Upper bound for the X-Request-Timeout header
+
+    # Outbound resilience (per worker process)
+    OMDB_RATE_LIMIT_PER_SECOND: float = 5.0
+    GEMINI_RATE_LIMIT_PER_SECOND: float = 1.0
+    UPSTREAM_MAX_RETRIES: int = 2  # Retries on 429/5xx and transport errors
+    UPSTREAM_BACKOFF_BASE_SECONDS: float = 0.5
+    UPSTREAM_BACKOFF_MAX_SECONDS: float = 8.0
+    CIRCUIT_FAILURE_THRESHOLD: float = 0.5  # Failure ratio that opens the circuit
+    CIRCUIT_MIN_CALLS: int = 5  # Calls in the window before the ratio is trusted
+    CIRCUIT_WINDOW: int = 20  # Number of recent calls considered
+    CIRCUIT_OPEN_SECONDS: float = 30.0  # How long an open circuit fails fast
+
+    # Recommendations - precomputed "Surprise Me" candidates are refreshed after this age
+    RECOMMENDATION_SNAPSHOT_TTL_MINUTES: int = 360
+
+    # Analytics - how often the background worker folds changes into the analytics cube
+    ANALYTICS_REFRESH_SECONDS: float = 5.0
+
+    # Live updates - change events pushed to clients over SSE (/api/movies/events)
+    LIVE_UPDATES_BACKEND: str = "auto"  # postgres (LISTEN/NOTIFY across workers), memory (single process) or auto
+    LIVE_UPDATES_BUFFER: int = 256  # Events buffered per connection before it is told to resync
+    LIVE_UPDATES_MAX_CONNECTIONS: int = 500  # Open event streams per worker
+    LIVE_UPDATES_HEARTBEAT_SECONDS: float = 15.0  # Keep-alive comment interval on idle streams
+    LIVE_UPDATES_RECONNECT_SECONDS: float = 2.0  # Delay before re-establishing a lost LISTEN connection
+
+    # OMDb catalog - details fetched from OMDb, memory-mapped by all workers (python -m app.services.catalog compact)
+    CATALOG_ENABLED: bool = True
+    CATALOG_DIR: str = "/tmp/moviemate-catalog"  # Use persistent storage in production
+    CATALOG_REFRESH_SECONDS: float = 5.0  # How often workers look for appended records and a compacted file
+    CATALOG_MAX_RECENT: int = 20000  # Appended records each worker keeps in memory until the next compaction
+    CATALOG_COMPACT_LOG_BYTES: int = 8_000_000  # A worker compacts once the append log grows past this
+
+    # OMDb metadata refresh - re-fetches ratings, posters, plots and season counts of stale titles
+    METADATA_REFRESH_ENABLED: bool = False  # Run the scheduler in the workers (one refreshes at a time)
+    METADATA_REFRESH_INTERVAL_HOURS: float = 24.0  # Time between the starts of two runs
+    METADATA_REFRESH_MAX_AGE_DAYS: float = 30.0  # Titles refreshed (or added) longer ago than this are stale
+    METADATA_REFRESH_BATCH_SIZE: int = 100  # Titles fetched between checkpoints
+    METADATA_REFRESH_CONCURRENCY: int = 4  # Concurrent OMDb calls, within OMDB_RATE_LIMIT_PER_SECOND
+    METADATA_REFRESH_DAILY_QUOTA: int = 500  # OMDb calls the refresh may spend per UTC day
+
+    # Executors (per worker process) - CPU-bound batches go to processes, blocking calls to threads
+    CPU_POOL_WORKERS: int = 2  # 0 runs CPU-bound work inline on the event loop
+    BLOCKING_POOL_WORKERS: int = 8
+
+    # Request profiling - stack samples and SQL timings stored under PROFILE_DIR
+    PROFILING_ENABLED: bool = False  # Honour the X-Profile request header and serve /api/debug/profiles
+    PROFILE_SAMPLE_RATE: float = 0.0  # Fraction of all requests profiled automatically
+    PROFILE_INTERVAL_MS: float = 5.0  # Stack sampling interval
+    PROFILE_DIR: str = "/tmp/moviemate-profiles"
+    PROFILE_MAX_STORED: int = 200
+
     # Project Info
     PROJECT_NAME: str = "MovieMate API"
     VERSION: str = "1.0.0"
@@ -44,6 +116,11 @@ class Settings(BaseSettings):
         if self.CORS_ORIGINS == "*":
             return ["*"]
         return [origin.strip() for origin in self.CORS_ORIGINS.split(",")]
+    
+    @property
+    def database_replica_urls_list(self) -> List[str]:
+        """Convert comma-separated replica URLs to list."""
+        return [url.strip() for url in self.DATABASE_REPLICA_URLS.split(",") if url.strip()]
 
 
 settings = Settings()
@@ -1,7 +1,12 @@
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from app.models.movie import Movie, WatchStatus, Platform, ContentType
+from app.models.change_log import MovieDeletion
 from app.schemas.movie import MovieCreate, MovieUpdate
+from app.services.live_updates import live_updates
+from app.services.watch_history import watch_history
+# Registers the flush hook that marks analytics cube periods dirty
+import app.services.analytics_cube  # noqa: F401
 
 
 class MovieCRUD:
@@ -12,8 +17,14 @@ class MovieCRUD:
         return db.query(Movie).order_by(Movie.created_at.desc()).offset(skip).limit(limit).all()
     
     def get_by_id(self, db: Session, movie_id: int) -> Optional[Movie]:
-        """Get a movie by ID."""
-        return db.query(Movie).filter(Movie.id == movie_id).first()
+        """Get a movie by ID (served from the session's identity map when already loaded)."""
+        return db.get(Movie, movie_id)
+    
+    def get_by_ids(self, db: Session, movie_ids: List[int]) -> List[Movie]:
+        """Get several movies by ID in a single query."""
+        if not movie_ids:
+            return []
+        return db.query(Movie).filter(Movie.id.in_(set(movie_ids))).all()
     
     def get_by_title(self, db: Session, title: str) -> Optional[Movie]:
         """Get a movie by title."""
@@ -63,6 +74,9 @@ class MovieCRUD:
         """Create a new movie."""
         db_movie = Movie(**movie.model_dump())
         db.add(db_movie)
+        db.flush()
+        watch_history.record(db, db_movie, watch_history.state(None))
+        live_updates.publish(db, "upsert", db_movie.id)
         db.commit()
         db.refresh(db_movie)
         return db_movie
@@ -74,10 +88,13 @@ class MovieCRUD:
             return None
         
         # Update only provided fields
+        before = watch_history.state(db_movie)
         update_data = movie_update.model_dump(exclude_unset=True)
         for field, value in update_data.items():
             setattr(db_movie, field, value)
         
+        watch_history.record(db, db_movie, before)
+        live_updates.publish(db, "upsert", movie_id)
         db.commit()
         db.refresh(db_movie)
         return db_movie
@@ -89,6 +106,8 @@ class MovieCRUD:
             return False
         
         db.delete(db_movie)
+        db.add(MovieDeletion(movie_id=movie_id))
+        live_updates.publish(db, "delete", movie_id)
         db.commit()
         return True
     
@@ -99,6 +118,7 @@ class MovieCRUD:
             return None
         
         db_movie.is_favorite = not db_movie.is_favorite
+        live_updates.publish(db, "upsert", movie_id)
         db.commit()
         db.refresh(db_movie)
         return db_movie
@@ -110,6 +130,7 @@ class MovieCRUD:
             return None
         
         # Toggle between watching and completed
+        before = watch_history.state(db_movie)
         if db_movie.status == WatchStatus.COMPLETED:
             db_movie.status = WatchStatus.WATCHING
             db_movie.watched_at = None
@@ -118,6 +139,8 @@ class MovieCRUD:
             from datetime import datetime
             db_movie.watched_at = datetime.now()
         
+        watch_history.record(db, db_movie, before)
+        live_updates.publish(db, "upsert", movie_id)
         db.commit()
         db.refresh(db_movie)
         return db_movie
@@ -130,6 +153,7 @@ class MovieCRUD:
         if not db_movie or db_movie.content_type != ContentType.TV_SHOW:
             return None
         
+        before = watch_history.state(db_movie)
         db_movie.episodes_watched = episodes_watched
         if current_season is not None:
             db_movie.current_season = current_season
@@ -144,6 +168,8 @@ class MovieCRUD:
         elif db_movie.status == WatchStatus.WISHLIST:
             db_movie.status = WatchStatus.WATCHING
         
+        watch_history.record(db, db_movie, before)
+        live_updates.publish(db, "upsert", movie_id)
         db.commit()
         db.refresh(db_movie)
         return db_movie
@@ -1,19 +1,106 @@
-from sqlalchemy import create_engine
+import math
+import random
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import NullPool
+from app import deadline, profiling
 from app.config import settings
+from app.metrics import instrument_engine
+
+# Session pool mode: statement_timeout every connection starts with, the default request budget
+DEFAULT_STATEMENT_TIMEOUT_MS = math.ceil(settings.REQUEST_TIMEOUT_SECONDS * 1000)
+
+# A transaction whose remaining budget is within this many seconds of the default keeps the default
+STATEMENT_TIMEOUT_SLACK = 1.0
+
+
+def build_engine(url: str) -> Engine:
+    """Create an instrumented engine with the configured pool settings."""
+    if settings.DB_POOL_MODE == "transaction":
+        # PgBouncer pools server connections per transaction; a second pool here
+        # would only pin them. Only transaction-scoped state (SET LOCAL,
+        # pg_advisory_xact_lock) is used, so nothing leaks between clients.
+        # PgBouncer also rejects startup options, so timeouts are set per transaction.
+        pool_options = {"poolclass": NullPool}
+    else:
+        pool_options = {
+            "pool_pre_ping": True,  # Verify connections before using them
+            "pool_size": settings.DB_POOL_SIZE,
+            "max_overflow": settings.DB_MAX_OVERFLOW,
+            "pool_timeout": settings.DB_POOL_TIMEOUT,
+            "pool_recycle": settings.DB_POOL_RECYCLE,
+        }
+        if make_url(url).get_backend_name() == "postgresql":
+            # Set once per connection, so ordinary request transactions don't need a SET LOCAL
+            pool_options["connect_args"] = {"options": f"-c statement_timeout={DEFAULT_STATEMENT_TIMEOUT_MS}"}
+    new_engine = create_engine(url, echo=settings.DB_ECHO, **pool_options)
+    instrument_engine(new_engine)
+    profiling.instrument_engine(new_engine)
+    return new_engine
+
+
+# Primary database: all writes and most reads
+engine = build_engine(settings.DATABASE_URL)
+
+# Read replicas for get_read_db sessions
+replica_engines = [build_engine(url) for url in settings.database_replica_urls_list]
+
+# Session-level features (LISTEN) need a real server connection, not a PgBouncer slot
+direct_engine = build_engine(settings.DATABASE_DIRECT_URL) if settings.DATABASE_DIRECT_URL else engine
+
+
+class RoutingSession(Session):
+    """
+    Session that reads from a replica when marked read-only.
+    
+    A read-only session picks one replica for its whole life, so a request
+    sees a single consistent snapshot. Flushes always go to the primary.
+    """
+    
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if self.info.get("read_only") and replica_engines and not self._flushing:
+            if "replica" not in self.info:
+                self.info["replica"] = random.choice(replica_engines)
+            return self.info["replica"]
+        return engine
 
-# Create database engine
-engine = create_engine(
-    settings.DATABASE_URL,
-    echo=settings.DEBUG,  # Log SQL queries in debug mode
-    pool_pre_ping=True,   # Verify connections before using them
-    pool_size=5,          # Number of connections to maintain
-    max_overflow=10       # Maximum number of connections to create beyond pool_size
-)
 
 # Create SessionLocal class
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+SessionLocal = sessionmaker(class_=RoutingSession, autocommit=False, autoflush=False, bind=engine)
+
+
+@event.listens_for(SessionLocal, "after_begin")
+def apply_request_deadline(session, transaction, connection):
+    """
+    Cap PostgreSQL statements in this transaction by the remaining request budget.
+
+    In session pool mode connections already carry the default request budget
+    (DEFAULT_STATEMENT_TIMEOUT_MS), so a SET LOCAL is only sent when this
+    transaction's budget differs from it: background work without a deadline,
+    a budget mostly spent, or a longer one asked for with X-Request-Timeout.
+    Behind PgBouncer (DB_POOL_MODE=transaction) every request transaction gets one.
+    """
+    if connection.dialect.name != "postgresql":
+        return
+    left = deadline.remaining()
+    if left is not None and left <= 0:
+        raise deadline.DeadlineExceeded("database query")
+    
+    if settings.DB_POOL_MODE == "transaction":
+        if left is None:
+            return
+        timeout_ms = max(1, int(left * 1000))
+    elif left is None:
+        timeout_ms = 0  # No limit
+    elif abs(left * 1000 - DEFAULT_STATEMENT_TIMEOUT_MS) > STATEMENT_TIMEOUT_SLACK * 1000:
+        timeout_ms = max(1, int(left * 1000))
+    else:
+        return
+    # SET LOCAL only lasts until the end of this transaction
+    connection.exec_driver_sql(f"SET LOCAL statement_timeout = {timeout_ms}")
+
 
 # Create Base class for models
 Base = declarative_base()
@@ -29,3 +116,16 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+def get_read_db():
+    """
+    Dependency function for read-only endpoints.
+    Yields a session that reads from a replica (the primary if none are
+    configured). Replicas may lag slightly behind recent writes.
+    """
+    db = SessionLocal(info={"read_only": True})
+    try:
+        yield db
+    finally:
+        db.close()
@@ -0,0 +1,62 @@
+"""
+Request-scoped deadlines.
+
+The HTTP middleware in app.main gives every request a total time budget.
+Outbound API calls and database statements made while handling it use
+whatever is left of that budget instead of their own flat timeouts.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+import time
+
+# Absolute deadline on the time.monotonic() clock, or None for "no deadline"
+_deadline: ContextVar[Optional[float]] = ContextVar("request_deadline", default=None)
+
+
+class DeadlineExceeded(Exception):
+    """Raised when the current request has used up its time budget."""
+
+    def __init__(self, operation: str = "request"):
+        super().__init__(f"Time budget exhausted before {operation}")
+
+
+@contextmanager
+def deadline_scope(seconds: Optional[float]) -> Iterator[None]:
+    """Run a block with a budget of `seconds`, or with no deadline if None."""
+    deadline = time.monotonic() + seconds if seconds is not None else None
+    token = _deadline.set(deadline)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining() -> Optional[float]:
+    """Seconds left in the current budget, or None if there is no deadline."""
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return max(0.0, deadline - time.monotonic())
+
+
+def expired(margin: float = 0.0) -> bool:
+    """Whether less than `margin` seconds of the budget are left."""
+    left = remaining()
+    return left is not None and left <= margin
+
+
+def timeout(default: float, operation: str = "request") -> float:
+    """
+    Timeout for a single downstream call: the smaller of `default` and the
+    remaining budget.
+
+    Raises:
+        DeadlineExceeded: If the budget is already spent
+    """
+    left = remaining()
+    if left is None:
+        return default
+    if left <= 0:
+        raise DeadlineExceeded(operation)
+    return min(default, left)
@@ -0,0 +1,147 @@
+"""
+Executors for work that must not run on the event loop.
+
+- `run_cpu` / `map_cpu`: CPU-bound batches (keyword extraction, similarity
+  scoring) in a process pool of CPU_POOL_WORKERS processes. They use other
+  cores and don't hold this worker's GIL while requests are waiting.
+- `run_blocking`: blocking calls (sync SQLAlchemy sessions, file I/O) in a
+  thread pool of BLOCKING_POOL_WORKERS threads, with the caller's context
+  (request deadline, per-request DB stats).
+
+Pools are created on first use by the process that uses them, so gunicorn
+workers never inherit one from the master. Functions sent to the process
+pool must be module-level and take picklable arguments; the pool processes
+are started clean (forkserver or spawn) and import only what those
+functions need, see app.services.scoring.
+
+    counts = await executors.run_cpu(scoring.count_preferences, rows)
+    rows = await executors.run_blocking(collection_snapshot.records, db)
+"""
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, List, Optional, Sequence, TypeVar
+import asyncio
+import contextvars
+import functools
+import logging
+import multiprocessing
+import os
+import time
+
+from app.config import settings
+from app.metrics import EXECUTOR_QUEUE_DEPTH, EXECUTOR_TASK_DURATION
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+_pools: Dict[str, Executor] = {}
+_pools_pid: Optional[int] = None
+
+
+def _mp_context():
+    # A forked pool process would inherit the event loop, DB connections and locks mid-use
+    method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+    context = multiprocessing.get_context(method)
+    if method == "forkserver":
+        context.set_forkserver_preload(["app.services.scoring"])
+    return context
+
+
+def _pool(kind: str) -> Executor:
+    global _pools_pid
+    if _pools_pid != os.getpid():
+        # Pools belong to the process that created them
+        _pools.clear()
+        _pools_pid = os.getpid()
+    pool = _pools.get(kind)
+    if pool is None:
+        if kind == "cpu":
+            pool = ProcessPoolExecutor(max_workers=settings.CPU_POOL_WORKERS, mp_context=_mp_context())
+        else:
+            pool = ThreadPoolExecutor(max_workers=settings.BLOCKING_POOL_WORKERS, thread_name_prefix="blocking")
+        _pools[kind] = pool
+    return pool
+
+
+async def _submit(kind: str, fn: Callable[..., T], *args) -> T:
+    depth = EXECUTOR_QUEUE_DEPTH.labels(pool=kind)
+    depth.inc()
+    start = time.perf_counter()
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_pool(kind), fn, *args)
+    finally:
+        depth.dec()
+        EXECUTOR_TASK_DURATION.labels(pool=kind).observe(time.perf_counter() - start)
+
+
+async def run_cpu(fn: Callable[..., T], *args) -> T:
+    """
+    Run a CPU-bound function in the process pool.
+
+    Args:
+        fn: Module-level function (pickled by reference)
+        *args: Picklable arguments
+
+    Returns:
+        The function's result. With CPU_POOL_WORKERS=0, or if the pool broke
+        (a pool process was killed), the function runs inline instead.
+    """
+    if settings.CPU_POOL_WORKERS <= 0:
+        return fn(*args)
+    try:
+        return await _submit("cpu", fn, *args)
+    except BrokenProcessPool:
+        logger.error("❌ CPU pool broke, replacing it and running this task inline")
+        broken = _pools.pop("cpu", None)
+        if broken is not None:
+            broken.shutdown(wait=False, cancel_futures=True)
+        return fn(*args)
+
+
+async def map_cpu(fn: Callable[[Any], T], batches: Sequence[Any]) -> List[T]:
+    """Run fn over several batches concurrently in the process pool, results in order."""
+    return list(await asyncio.gather(*(run_cpu(fn, batch) for batch in batches)))
+
+
+def split(items: Sequence[T], batch_size: int = 5000) -> List[Sequence[T]]:
+    """
+    Cut items into contiguous batches for map_cpu.
+
+    Arguments are pickled in one go while holding the GIL, so batches are kept
+    small enough that sending one doesn't stall the event loop; pool processes
+    pick them up as they free.
+    """
+    return [items[i:i + batch_size] for i in range(0, len(items), batch_size)] or [items]
+
+
+async def run_blocking(fn: Callable[..., T], *args) -> T:
+    """
+    Run a blocking function in the thread pool.
+
+    Args:
+        fn: Function to call (e.g. one using a sync Session; don't use that
+            session elsewhere until this returns)
+        *args: Arguments
+
+    Returns:
+        The function's result
+    """
+    context = contextvars.copy_context()
+    return await _submit("blocking", functools.partial(context.run, fn), *args)
+
+
+def stats() -> Dict[str, Any]:
+    return {
+        "cpu_workers": settings.CPU_POOL_WORKERS,
+        "blocking_workers": settings.BLOCKING_POOL_WORKERS,
+        "started": sorted(_pools) if _pools_pid == os.getpid() else [],
+    }
+
+
+def shutdown():
+    """Stop the pools (application shutdown); queued tasks are cancelled."""
+    if _pools_pid == os.getpid():
+        for pool in _pools.values():
+            pool.shutdown(wait=False, cancel_futures=True)
+    _pools.clear()
@@ -1,8 +1,61 @@
-from fastapi import FastAPI
+import json
+import logging
+import time
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, Response
+from app import executors, metrics, preload, profiling
 from app.config import settings
-from app.database import engine, Base
-from app.routers import movies
+from app.deadline import DeadlineExceeded, deadline_scope
+from app.routers import debug, movies
+from app.services.resilience import UpstreamUnavailable, upstreams
+
+logger = logging.getLogger(__name__)
+
+
+def start_background_workers():
+    """Start the analytics cube refresher, the catalog refresher, the live update listener, housekeeping and the metadata refresh scheduler."""
+    from app.services.analytics_cube import analytics_cube
+    from app.services.catalog import catalog
+    from app.services.housekeeping import housekeeping
+    from app.services.live_updates import live_updates
+    from app.services.metadata_refresh import metadata_refresh
+    analytics_cube.start()
+    catalog.start()
+    housekeeping.start()
+    live_updates.start()
+    metadata_refresh.start()
+
+
+async def stop_background_workers():
+    """Stop background workers, close the outbound API clients and stop the executor pools."""
+    from app.services import close_services
+    from app.services.analytics_cube import analytics_cube
+    from app.services.catalog import catalog
+    from app.services.housekeeping import housekeeping
+    from app.services.live_updates import live_updates
+    from app.services.metadata_refresh import metadata_refresh
+    await analytics_cube.stop()
+    await catalog.stop()
+    await housekeeping.stop()
+    await live_updates.stop()
+    await metadata_refresh.stop()
+    await close_services()
+    executors.shutdown()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Per-worker startup and shutdown (runs in every worker, after the fork).
+    The schema check runs once, in the gunicorn master (gunicorn.conf.py).
+    """
+    from app.database import direct_engine, engine, replica_engines
+    metrics.record_pool_capacity(engine, direct_engine, *replica_engines)
+    start_background_workers()
+    yield
+    await stop_background_workers()
 
 
 # Initialize FastAPI app
@@ -11,7 +64,8 @@ app = FastAPI(
     version=settings.VERSION,
     description=settings.DESCRIPTION,
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    lifespan=lifespan
 )
 
 # Configure CORS - MUST be added before routes
@@ -35,15 +89,86 @@ app.add_middleware(
 )
 
 
-@app.on_event("startup")
-def startup_event():
-    """Create database tables on startup."""
-    # Import models to register them with Base
-    from app.models import movie
-    Base.metadata.create_all(bind=engine)
+@app.middleware("http")
+async def request_deadline(request: Request, call_next):
+    """
+    Give each request a total time budget (REQUEST_TIMEOUT_SECONDS, or the
+    X-Request-Timeout header in seconds, capped at REQUEST_TIMEOUT_MAX_SECONDS).
+    """
+    budget = settings.REQUEST_TIMEOUT_SECONDS
+    requested = request.headers.get("X-Request-Timeout")
+    if requested:
+        try:
+            budget = min(max(float(requested), 0.1), settings.REQUEST_TIMEOUT_MAX_SECONDS)
+        except ValueError:
+            pass
+    
+    with deadline_scope(budget):
+        return await call_next(request)
+
+
+@app.middleware("http")
+async def record_metrics(request: Request, call_next):
+    """Record latency and DB usage per route template (and X-Query-Count in debug mode)."""
+    db_stats = metrics.RequestDBStats()
+    token = metrics.current_db_stats.set(db_stats)
+    start = time.perf_counter()
+    status_code = 500
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+        if settings.DEBUG:
+            # Statements issued before the response headers (dependency teardown runs later)
+            response.headers["X-Query-Count"] = str(db_stats.queries)
+        return response
+    finally:
+        metrics.current_db_stats.reset(token)
+        # Label by route template (e.g. /api/movies/{movie_id}) to keep cardinality bounded
+        route = request.scope.get("route")
+        route_path = route.path if route is not None else "unmatched"
+        metrics.REQUEST_LATENCY.labels(
+            method=request.method, route=route_path, status=status_code
+        ).observe(time.perf_counter() - start)
+        metrics.DB_QUERIES_PER_REQUEST.labels(route=route_path).observe(db_stats.queries)
+        metrics.DB_TIME_PER_REQUEST.labels(route=route_path).observe(db_stats.seconds)
+
+
+@app.middleware("http")
+async def profile_request(request: Request, call_next):
+    """
+    Profile sampled or explicitly requested (X-Profile: 1) requests and return
+    the stored profile's ID in X-Profile-Id. Streaming responses are profiled
+    until their headers are sent.
+    """
+    if not profiling.should_profile(request):
+        return await call_next(request)
+    
+    with profiling.capture(request) as profile:
+        response = await call_next(request)
+    # Serializing and writing the profile is file I/O: keep it off the event loop
+    response.headers["X-Profile-Id"] = await executors.run_blocking(profile.save, response.status_code)
+    return response
+
+
+@app.exception_handler(DeadlineExceeded)
+async def deadline_exceeded_handler(request: Request, exc: DeadlineExceeded):
+    """Report an exhausted time budget as a gateway timeout."""
+    return JSONResponse(status_code=504, content={"detail": str(exc)})
+
+
+@app.exception_handler(UpstreamUnavailable)
+async def upstream_unavailable_handler(request: Request, exc: UpstreamUnavailable):
+    """Report an open circuit breaker as 503, telling the client when to retry."""
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(int(exc.retry_after) + 1)}
+    )
+
 
 # Include routers
 app.include_router(movies.router, prefix="/api")
+app.include_router(debug.router, prefix="/api")
 # app.include_router(watch_party.router, prefix="/api")  # Temporarily disabled
 
 
@@ -60,15 +185,52 @@ async def root():
 
 @app.get("/health", tags=["Health"])
 async def health_check():
-    """Health check endpoint."""
+    """Health check endpoint, including the state of outbound API circuit breakers."""
+    from app.services.live_updates import live_updates
+    upstream_health = {name: upstream.health() for name, upstream in upstreams.items()}
+    degraded = any(health["state"] != "closed" for health in upstream_health.values())
     return {
-        "status": "healthy",
-        "service": settings.PROJECT_NAME
+        "status": "degraded" if degraded else "healthy",
+        "service": settings.PROJECT_NAME,
+        "upstreams": upstream_health,
+        "live_updates": live_updates.stats(),
+        "shared_caches": preload.stats(),
+        "executors": executors.stats()
     }
 
 
+
+@app.get("/metrics", tags=["Health"], include_in_schema=False)
+def prometheus_metrics():
+    """Prometheus metrics, aggregated across all worker processes."""
+    return Response(content=metrics.render_latest(), media_type=metrics.CONTENT_TYPE_LATEST)
+
+
+@preload.shared_cache("openapi_schema")
+def openapi_schema() -> bytes:
+    """
+    The /openapi.json document, serialized once. A single bytes object stays
+    shared after the fork; the nested dict FastAPI builds would not, since
+    reading it writes the reference counts of thousands of small objects.
+    """
+    document = json.dumps(app.openapi(), separators=(",", ":")).encode()
+    # Keep only the serialized copy
+    app.openapi_schema = None
+    return document
+
+
+async def openapi_document(request: Request) -> Response:
+    """Serve /openapi.json from the shared, pre-serialized document."""
+    return Response(content=openapi_schema.get(), media_type="application/json")
+
+# Replace the route FastAPI registers, which rebuilds a JSONResponse from the dict on every request
+app.router.routes = [route for route in app.router.routes if getattr(route, "path", None) != app.openapi_url]
+app.add_route(app.openapi_url, openapi_document, include_in_schema=False)
+
 if __name__ == "__main__":
     import uvicorn
+    from app import migrate
+    migrate.upgrade()
     uvicorn.run(
         "app.main:app",
         host=settings.API_HOST,
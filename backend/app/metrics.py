@@ -0,0 +1,173 @@
+"""
+Prometheus metrics for the API.
+
+Under gunicorn each worker writes its samples to PROMETHEUS_MULTIPROC_DIR
+(see start.sh and gunicorn.conf.py) and /metrics aggregates all of them.
+"""
+from contextvars import ContextVar
+from typing import Optional
+import os
+import time
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+)
+from prometheus_client import multiprocess
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# ==================== METRICS ====================
+
+REQUEST_LATENCY = Histogram(
+    "moviemate_http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ["method", "route", "status"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+)
+
+DB_QUERY_DURATION = Histogram(
+    "moviemate_db_query_duration_seconds",
+    "Duration of individual SQL statements",
+    ["statement"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1, 5)
+)
+
+DB_QUERIES_PER_REQUEST = Histogram(
+    "moviemate_db_queries_per_request",
+    "Number of SQL statements issued while handling a request",
+    ["route"],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100)
+)
+
+DB_TIME_PER_REQUEST = Histogram(
+    "moviemate_db_time_per_request_seconds",
+    "Total SQL time spent while handling a request",
+    ["route"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5)
+)
+
+DB_POOL_CHECKED_OUT = Gauge(
+    "moviemate_db_pool_checked_out",
+    "Database connections currently checked out of the pool",
+    multiprocess_mode="livesum"
+)
+
+DB_POOL_CAPACITY = Gauge(
+    "moviemate_db_pool_capacity",
+    "Maximum connections the pool may hand out (pool_size + max_overflow)",
+    multiprocess_mode="livesum"
+)
+
+UPSTREAM_LATENCY = Histogram(
+    "moviemate_upstream_request_duration_seconds",
+    "Latency of outbound API calls",
+    ["upstream"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 30)
+)
+
+UPSTREAM_ERRORS = Counter(
+    "moviemate_upstream_errors_total",
+    "Failed or rejected outbound API calls",
+    ["upstream", "kind"]
+)
+
+CACHE_REQUESTS = Counter(
+    "moviemate_cache_requests_total",
+    "Cache lookups by outcome",
+    ["cache", "result"]
+)
+
+
+EXECUTOR_QUEUE_DEPTH = Gauge(
+    "moviemate_executor_queue_depth",
+    "Tasks handed to an executor pool that are waiting or running",
+    ["pool"],
+    multiprocess_mode="livesum"
+)
+
+EXECUTOR_TASK_DURATION = Histogram(
+    "moviemate_executor_task_duration_seconds",
+    "Time from handing a task to an executor pool to its result, queueing included",
+    ["pool"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+)
+
+METADATA_REFRESH_TITLES = Counter(
+    "moviemate_metadata_refresh_titles_total",
+    "Titles checked by the OMDb metadata refresh, by outcome",
+    ["outcome"]
+)
+
+# ==================== PER-REQUEST DB STATS ====================
+
+class RequestDBStats:
+    """SQL statement count and time for the request being handled."""
+
+    __slots__ = ("queries", "seconds")
+
+    def __init__(self):
+        self.queries = 0
+        self.seconds = 0.0
+
+
+# Set by the metrics middleware; sync endpoints see it through the copied thread context
+current_db_stats: ContextVar[Optional[RequestDBStats]] = ContextVar("current_db_stats", default=None)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_start_time"].pop()
+    DB_QUERY_DURATION.labels(statement=statement.lstrip().split(" ", 1)[0].upper()).observe(elapsed)
+
+    stats = current_db_stats.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.seconds += elapsed
+
+
+def instrument_engine(engine: Engine):
+    """Record statement timings and pool usage for an engine."""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "checkout", lambda *args: DB_POOL_CHECKED_OUT.inc())
+    event.listen(engine, "checkin", lambda *args: DB_POOL_CHECKED_OUT.dec())
+
+
+def record_pool_capacity(*engines: Engine):
+    """
+    Publish how many connections this process's pools may hand out.
+
+    Call it once in every worker, not at import: with preload_app the import
+    happens in the gunicorn master, and a value written there is not part of
+    the workers' livesum.
+
+    Args:
+        engines: Engines of this process (duplicates are counted once)
+    """
+    capacity = 0
+    for engine in set(engines):
+        pool = engine.pool
+        if hasattr(pool, "size") and hasattr(pool, "_max_overflow"):
+            capacity += pool.size() + max(pool._max_overflow, 0)
+    DB_POOL_CAPACITY.set(capacity)
+
+
+# ==================== EXPOSITION ====================
+
+def render_latest() -> bytes:
+    """Render all metrics, aggregating every worker when running multi-process."""
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry)
+    return generate_latest(REGISTRY)
+
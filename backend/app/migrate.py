@@ -0,0 +1,115 @@
+"""
+Database migrations, applied once per deploy before the workers start.
+
+    python -m app.migrate            # upgrade to the latest revision
+    python -m app.migrate current    # show the applied revision
+    python -m app.migrate check      # exit 1 unless at the latest revision
+
+Databases created by the old create_all startup have no alembic_version
+table; they are stamped with the baseline revision first and then upgraded.
+Concurrent runs (several containers starting at once) wait on an advisory
+lock, so only one applies DDL.
+"""
+from pathlib import Path
+from typing import Optional
+import logging
+import sys
+
+from alembic import command
+from alembic.config import Config
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection
+
+from app.config import settings
+from app.database import SessionLocal, direct_engine
+
+logger = logging.getLogger(__name__)
+
+ALEMBIC_INI = Path(__file__).resolve().parent.parent / "alembic.ini"
+
+# Revision matching the schema the pre-migration create_all startup produced first
+BASELINE_REVISION = "0001"
+
+# pg_advisory_lock key: one migrator at a time
+MIGRATE_LOCK_ID = 7_310_044
+
+
+def alembic_config(connection: Optional[Connection] = None) -> Config:
+    config = Config(str(ALEMBIC_INI))
+    config.attributes["configure_logger"] = False  # Keep the application's logging setup
+    if connection is not None:
+        config.attributes["connection"] = connection
+    return config
+
+
+def head_revision() -> str:
+    return ScriptDirectory.from_config(alembic_config()).get_current_head()
+
+
+def current_revision(connection: Connection) -> Optional[str]:
+    return MigrationContext.configure(connection).get_current_revision()
+
+
+def upgrade() -> Optional[str]:
+    """
+    Bring the database schema to the latest revision.
+
+    Returns:
+        The revision the database is at afterwards
+    """
+    with direct_engine.connect() as connection:
+        if connection.dialect.name == "postgresql":
+            connection.execute(text("SELECT pg_advisory_lock(:key)"), {"key": MIGRATE_LOCK_ID})
+            if settings.DB_POOL_MODE == "session":
+                # DDL and data migrations may outlast the per-connection request timeout
+                connection.execute(text("SET statement_timeout = 0"))
+            connection.commit()
+        try:
+            config = alembic_config(connection)
+            tables = inspect(connection).get_table_names()
+            if "alembic_version" not in tables and "movies" in tables:
+                logger.info(f"🏷️ Existing schema without migration history, stamping {BASELINE_REVISION}")
+                command.stamp(config, BASELINE_REVISION)
+                connection.commit()
+
+            command.upgrade(config, "head")
+            connection.commit()
+            revision = current_revision(connection)
+        finally:
+            if connection.dialect.name == "postgresql":
+                connection.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": MIGRATE_LOCK_ID})
+                if settings.DB_POOL_MODE == "session":
+                    # Back to the connection's default before it returns to the pool
+                    connection.execute(text("RESET statement_timeout"))
+                connection.commit()
+
+    # Data seeded from existing rows the first time the watch history exists
+    from app.services.watch_history import watch_history
+    with SessionLocal() as db:
+        watch_history.backfill(db)
+    return revision
+
+
+def is_up_to_date() -> bool:
+    """Whether the schema is at the latest revision (one SELECT, no DDL)."""
+    with direct_engine.connect() as connection:
+        return current_revision(connection) == head_revision()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    if len(sys.argv) > 1 and sys.argv[1] == "current":
+        with direct_engine.connect() as connection:
+            print(f"Current: {current_revision(connection)}  Head: {head_revision()}")
+    elif len(sys.argv) > 1 and sys.argv[1] == "check":
+        try:
+            up_to_date = is_up_to_date()
+        except Exception as e:
+            sys.exit(f"❌ Could not check the database schema revision: {str(e).splitlines()[0]}")
+        if not up_to_date:
+            sys.exit("⚠️ Database schema is not at the latest revision, run: python -m app.migrate")
+        print("✅ Database schema is at the latest revision")
+    else:
+        print(f"✅ Database schema at revision {upgrade()}")
@@ -1,3 +1,13 @@
 from app.models.movie import Movie, WatchStatus
+from app.models.analytics import AnalyticsCube, AnalyticsDirtyPeriod
+from app.models.change_log import ChangeFeedHorizon, MovieDeletion
+from app.models.metadata_refresh import MetadataRefreshRun
+from app.models.recommendation import RecommendationSnapshot
+from app.models.review_cache import ReviewCacheEntry
+from app.models.watch_event import WatchEvent, WatchTimeDaily, WatchTimeMonthly
 
-__all__ = ["Movie", "WatchStatus"]
+__all__ = [
+    "Movie", "WatchStatus", "RecommendationSnapshot", "ReviewCacheEntry",
+    "WatchEvent", "WatchTimeDaily", "WatchTimeMonthly", "AnalyticsCube", "AnalyticsDirtyPeriod",
+    "MovieDeletion", "ChangeFeedHorizon", "MetadataRefreshRun",
+]
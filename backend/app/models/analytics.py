@@ -0,0 +1,41 @@
+from sqlalchemy import Column, Integer, BigInteger, Float, String, Date, DateTime, Enum
+from sqlalchemy.sql import func
+from app.database import Base
+from app.models.movie import ContentType, WatchStatus
+
+# Genre value of the per-title rows; other rows hold one genre each
+ALL_GENRES = "*"
+
+
+class AnalyticsCube(Base):
+    """
+    Pre-aggregated collection statistics.
+
+    One row per (month added × content type × status × platform × genre).
+    Titles appear once with genre = ALL_GENRES and once per genre they have,
+    so totals read the ALL_GENRES rows and genre breakdowns the others.
+    """
+
+    __tablename__ = "analytics_cube"
+
+    period = Column(Date, primary_key=True)  # First day of the month the title was added (UTC)
+    content_type = Column(Enum(ContentType), primary_key=True)
+    status = Column(Enum(WatchStatus), primary_key=True)
+    platform = Column(String(32), primary_key=True)  # Platform name, "" when unset
+    genre = Column(String(100), primary_key=True)
+
+    titles = Column(Integer, nullable=False, default=0)
+    favorites = Column(Integer, nullable=False, default=0)
+    rated = Column(Integer, nullable=False, default=0)
+    rating_sum = Column(Float, nullable=False, default=0)
+    runtime_minutes = Column(BigInteger, nullable=False, default=0)  # Movies only
+    episodes_watched = Column(BigInteger, nullable=False, default=0)
+
+
+class AnalyticsDirtyPeriod(Base):
+    """Cube periods changed since their last refresh."""
+
+    __tablename__ = "analytics_dirty_periods"
+
+    period = Column(Date, primary_key=True)
+    marked_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -0,0 +1,36 @@
+from sqlalchemy import Column, Integer, BigInteger, DateTime, text
+from sqlalchemy.sql import func
+from app.database import Base
+from app.models.movie import CHANGE_VERSION_SQL
+
+
+class MovieDeletion(Base):
+    """Tombstone for a deleted title, so change-feed clients can drop it too."""
+    
+    __tablename__ = "movie_deletions"
+    
+    id = Column(BigInteger, primary_key=True)
+    movie_id = Column(Integer, nullable=False)
+    change_version = Column(BigInteger, nullable=False, server_default=text(CHANGE_VERSION_SQL), index=True)
+    deleted_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+    
+    def __repr__(self):
+        return f"<MovieDeletion(movie_id={self.movie_id}, change_version={self.change_version})>"
+
+
+class ChangeFeedHorizon(Base):
+    """
+    Newest tombstone removed by retention (a single row, id 1).
+
+    Clients whose last sync is at or before it may have missed a delete and
+    must reload the whole collection.
+    """
+    
+    __tablename__ = "change_feed_horizon"
+    
+    id = Column(Integer, primary_key=True)
+    pruned_version = Column(BigInteger, nullable=False)  # Highest change_version removed
+    pruned_at = Column(DateTime(timezone=True), nullable=False)  # Latest deleted_at removed
+    
+    def __repr__(self):
+        return f"<ChangeFeedHorizon(pruned_version={self.pruned_version}, pruned_at={self.pruned_at})>"
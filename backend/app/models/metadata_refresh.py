@@ -0,0 +1,34 @@
+from sqlalchemy import Column, Integer, Date, DateTime
+from sqlalchemy.sql import func
+from app.database import Base
+
+
+class MetadataRefreshRun(Base):
+    """
+    Checkpoint of one pass of the OMDb metadata refresh.
+
+    A run visits the titles that were stale at `cutoff` in ID order; after
+    each batch `last_movie_id` and the counters are committed, so a stopped
+    run (restart, spent quota, OMDb outage) resumes where it left off.
+    """
+
+    __tablename__ = "metadata_refresh_runs"
+
+    id = Column(Integer, primary_key=True)
+    cutoff = Column(DateTime(timezone=True), nullable=False)  # Titles refreshed before this are stale
+    last_movie_id = Column(Integer, nullable=False, default=0)
+
+    checked = Column(Integer, nullable=False, default=0)
+    changed = Column(Integer, nullable=False, default=0)
+    failed = Column(Integer, nullable=False, default=0)
+
+    # OMDb calls spent on quota_day (UTC), for METADATA_REFRESH_DAILY_QUOTA
+    quota_day = Column(Date, nullable=True)
+    quota_calls = Column(Integer, nullable=False, default=0)
+
+    started_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+    def __repr__(self):
+        return f"<MetadataRefreshRun(id={self.id}, last_movie_id={self.last_movie_id}, finished_at={self.finished_at})>"
@@ -1,8 +1,11 @@
-from sqlalchemy import Column, Integer, String, Text, Float, DateTime, Boolean, Enum
+from sqlalchemy import Column, Integer, BigInteger, String, Text, Float, DateTime, Boolean, Enum, literal_column, text
 from sqlalchemy.sql import func
 from app.database import Base
 import enum
 
+# Version stamped on every write: the ID of the writing transaction (see app.services.changes)
+CHANGE_VERSION_SQL = "pg_current_xact_id()::text::bigint"
+
 
 class ContentType(str, enum.Enum):
     """Content type enum for movies and TV shows."""
@@ -73,14 +76,24 @@ class Movie(Base):
     
     # TMDB/OMDb Integration
     tmdb_id = Column(String(50), nullable=True, index=True)  # TMDB ID or IMDb ID
+    metadata_refreshed_at = Column(DateTime(timezone=True), nullable=True)  # Last OMDb refresh (see app.services.metadata_refresh)
     
     # Flags
     is_favorite = Column(Boolean, default=False, index=True)
     
     # Timestamps
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), index=True)
     watched_at = Column(DateTime(timezone=True), nullable=True)  # When completed
     
+    # Change feed
+    change_version = Column(
+        BigInteger,
+        nullable=False,
+        server_default=text(CHANGE_VERSION_SQL),
+        onupdate=literal_column(CHANGE_VERSION_SQL),
+        index=True
+    )
+    
     def __repr__(self):
         return f"<Movie(id={self.id}, title='{self.title}', type={self.content_type}, status={self.status})>"
@@ -0,0 +1,22 @@
+from sqlalchemy import BigInteger, Column, Integer, DateTime, JSON
+from sqlalchemy.sql import func
+from app.database import Base
+
+
+class RecommendationSnapshot(Base):
+    """Precomputed, ranked recommendation candidates for the current collection."""
+    
+    __tablename__ = "recommendation_snapshots"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    
+    # Change feed version the candidates were computed at (changes at or after it make them stale)
+    change_version = Column(BigInteger, nullable=True)
+    
+    # Ranked OMDb detail records as returned by the recommendation engine
+    candidates = Column(JSON, nullable=False)
+    
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+    
+    def __repr__(self):
+        return f"<RecommendationSnapshot(id={self.id}, candidates={len(self.candidates or [])})>"
@@ -0,0 +1,18 @@
+from sqlalchemy import Column, String, Text, DateTime
+from sqlalchemy.sql import func
+from app.database import Base
+
+
+class ReviewCacheEntry(Base):
+    """Cached Gemini completion, keyed by a hash of the prompt and generation config."""
+    
+    __tablename__ = "review_cache"
+    
+    cache_key = Column(String(64), primary_key=True)  # SHA-256 hex digest
+    generated_text = Column(Text, nullable=False)
+    
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
+    
+    def __repr__(self):
+        return f"<ReviewCacheEntry(cache_key='{self.cache_key[:12]}', expires_at={self.expires_at})>"
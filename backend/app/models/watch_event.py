@@ -0,0 +1,58 @@
+from sqlalchemy import Column, BigInteger, Integer, Float, Date, DateTime, Enum, Index
+from sqlalchemy.sql import func
+from app.database import Base
+from app.models.movie import ContentType, WatchStatus
+
+
+class WatchEvent(Base):
+    """
+    Append-only history of viewing activity.
+
+    One row per progress update or status change. `minutes` is the watch time
+    the change accounts for; corrections (un-marking a title, lowering episode
+    progress) are recorded as negative amounts rather than edits.
+    """
+
+    __tablename__ = "watch_events"
+    __table_args__ = (
+        # Rows arrive in time order, so a BRIN index stays tiny and still prunes range scans
+        Index("ix_watch_events_occurred_at_brin", "occurred_at", postgresql_using="brin"),
+    )
+
+    id = Column(BigInteger, primary_key=True)
+    movie_id = Column(Integer, nullable=False, index=True)  # No FK: history outlives deleted titles
+    content_type = Column(Enum(ContentType), nullable=False)
+    status = Column(Enum(WatchStatus), nullable=False)  # Status after the change
+
+    episodes_delta = Column(Integer, nullable=False, default=0)
+    minutes = Column(Float, nullable=False, default=0)
+    completions = Column(Integer, nullable=False, default=0)  # +1 completed, -1 un-completed
+
+    occurred_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+
+    def __repr__(self):
+        return f"<WatchEvent(movie_id={self.movie_id}, minutes={self.minutes}, occurred_at={self.occurred_at})>"
+
+
+class WatchTimeDaily(Base):
+    """Watch events rolled up per UTC day and content type."""
+
+    __tablename__ = "watch_time_daily"
+
+    day = Column(Date, primary_key=True)
+    content_type = Column(Enum(ContentType), primary_key=True)
+    minutes = Column(Float, nullable=False, default=0)
+    completions = Column(Integer, nullable=False, default=0)
+    events = Column(Integer, nullable=False, default=0)
+
+
+class WatchTimeMonthly(Base):
+    """Watch events rolled up per UTC month (first day of the month) and content type."""
+
+    __tablename__ = "watch_time_monthly"
+
+    month = Column(Date, primary_key=True)
+    content_type = Column(Enum(ContentType), primary_key=True)
+    minutes = Column(Float, nullable=False, default=0)
+    completions = Column(Integer, nullable=False, default=0)
+    events = Column(Integer, nullable=False, default=0)
@@ -0,0 +1,110 @@
+"""
+Read-only caches shared by all gunicorn workers.
+
+With `preload_app` (gunicorn.conf.py, on by default) the app is imported in
+the gunicorn master. The master builds every registered cache, freezes the
+garbage collector and then forks the workers, which inherit the caches
+through copy-on-write instead of each building its own copy.
+
+Pages stay shared only while nothing writes to them, and in CPython reading
+an object writes its reference count. Caches are therefore built from a few
+large buffers (`array`, `bytes`, mmap) rather than millions of small
+objects where they can be, and are never mutated after they are built.
+gc.freeze() moves everything the master allocated out of the collector's
+reach, so collections in the workers don't touch those pages either.
+
+Without preloading (uvicorn, tests) each cache is built on first use in the
+process that needs it; callers always go through `SharedCache.get()`.
+
+    @shared_cache("genre_vocabulary")
+    def genre_vocabulary() -> Tuple[str, ...]:
+        return tuple(sorted(names))
+
+    genre_vocabulary.get()
+"""
+from typing import Any, Callable, Dict, Optional
+import gc
+import logging
+import os
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class SharedCache:
+    """A read-only value built once, in the gunicorn master when preloading."""
+
+    def __init__(self, name: str, builder: Callable[[], Any]):
+        self.name = name
+        self.builder = builder
+        self.value: Any = None
+        self.built_by_pid: Optional[int] = None
+        self.build_seconds = 0.0
+
+    @property
+    def built(self) -> bool:
+        return self.built_by_pid is not None
+
+    def build(self) -> Any:
+        start = time.perf_counter()
+        self.value = self.builder()
+        self.build_seconds = time.perf_counter() - start
+        self.built_by_pid = os.getpid()
+        return self.value
+
+    def get(self) -> Any:
+        if not self.built:
+            self.build()
+        return self.value
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "built": self.built,
+            # False in a worker that had to build its own copy
+            "inherited": self.built and self.built_by_pid != os.getpid(),
+            "build_ms": round(self.build_seconds * 1000, 1),
+            "bytes": len(self.value) if isinstance(self.value, bytes) else getattr(self.value, "nbytes", None),
+        }
+
+
+_caches: Dict[str, SharedCache] = {}
+
+
+def shared_cache(name: str) -> Callable[[Callable[[], Any]], SharedCache]:
+    """Register a builder; the decorated name becomes its SharedCache."""
+    def register(builder: Callable[[], Any]) -> SharedCache:
+        cache = _caches[name] = SharedCache(name, builder)
+        return cache
+    return register
+
+
+def build_all():
+    """Build every registered cache (gunicorn master, after the app is imported)."""
+    for cache in _caches.values():
+        if not cache.built:
+            cache.build()
+            logger.info(f"📦 Built shared cache {cache.name} in {cache.build_seconds * 1000:.0f} ms")
+
+
+def before_fork():
+    """Move everything the master allocated out of the collector's reach."""
+    gc.freeze()
+
+
+def after_fork():
+    """
+    Drop state a worker must not share with the master or its siblings:
+    pooled database connections and outbound API clients. Re-enables the
+    collector, which gunicorn.conf.py turns off in the master.
+    """
+    from app.database import engine, direct_engine, replica_engines
+    from app.services import _instances
+    for pool_engine in (engine, direct_engine, *replica_engines):
+        # close=False: leave the master's sockets alone, just stop using them
+        pool_engine.dispose(close=False)
+    _instances.clear()
+    gc.enable()
+
+
+def stats() -> Dict[str, Dict[str, Any]]:
+    return {name: cache.stats() for name, cache in _caches.items()}
@@ -0,0 +1,210 @@
+"""
+Opt-in per-request profiling.
+
+A profiled request gets a wall-clock stack sampler (folded stacks, ready for
+flamegraph.pl or speedscope) and a log of every SQL statement it issued.
+The result is written to PROFILE_DIR and its ID returned in the X-Profile-Id
+response header; /api/debug/profiles/{id} retrieves it.
+"""
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+import json
+import random
+import sys
+import threading
+import time
+import uuid
+
+from fastapi import Request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.config import settings
+
+# Path fragments of frames worth sampling in threadpool threads (sync endpoints)
+APP_PATH = str(Path(__file__).resolve().parent)
+
+# SQL log of the request being profiled, if any
+_sql_log: ContextVar[Optional[List[Dict]]] = ContextVar("profile_sql_log", default=None)
+
+
+class StackSampler:
+    """
+    Samples Python stacks on a background thread.
+
+    The event-loop thread is always sampled (async handlers, awaiting I/O shows
+    up as the loop's select). Other threads are sampled only while they run app
+    code, which captures sync endpoints executing in the threadpool. Concurrent
+    requests running app code in other threads are sampled too.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.samples: Counter = Counter()
+        self.sample_count = 0
+        self._loop_thread_id = threading.get_ident()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = self._fold(frame)
+                if thread_id == self._loop_thread_id or APP_PATH in stack:
+                    self.samples[stack] += 1
+            self.sample_count += 1
+
+    @staticmethod
+    def _fold(frame) -> str:
+        """Render a stack root-first as 'file:function:line;...'."""
+        frames = []
+        while frame is not None:
+            code = frame.f_code
+            frames.append(f"{code.co_filename}:{code.co_name}:{frame.f_lineno}")
+            frame = frame.f_back
+        return ";".join(reversed(frames))
+
+    def folded(self) -> str:
+        """Folded-stack text, one 'stack count' line per distinct stack."""
+        return "\n".join(f"{stack} {count}" for stack, count in self.samples.most_common())
+
+    def top_functions(self, limit: int = 25) -> List[Dict]:
+        """Functions with the most samples at the top of the stack (self time)."""
+        leaves: Counter = Counter()
+        for stack, count in self.samples.items():
+            leaves[stack.rsplit(";", 1)[-1]] += count
+        total = sum(leaves.values()) or 1
+        return [
+            {"frame": frame, "samples": count, "percent": round(100 * count / total, 1)}
+            for frame, count in leaves.most_common(limit)
+        ]
+
+
+class RequestProfile:
+    """Everything captured for one profiled request."""
+
+    def __init__(self, request: Request):
+        self.id = uuid.uuid4().hex
+        self.method = request.method
+        self.path = request.url.path
+        self.query = request.url.query
+        self.started_at = datetime.now(timezone.utc)
+        self.sql: List[Dict] = []
+        self.sampler = StackSampler(settings.PROFILE_INTERVAL_MS / 1000)
+        self.duration = 0.0
+
+    def to_dict(self, status_code: int) -> Dict:
+        sql_seconds = sum(q["duration_ms"] for q in self.sql) / 1000
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "query": self.query,
+            "status_code": status_code,
+            "started_at": self.started_at.isoformat(),
+            "duration_ms": round(self.duration * 1000, 2),
+            "sql_count": len(self.sql),
+            "sql_total_ms": round(sql_seconds * 1000, 2),
+            "sql": self.sql,
+            "sample_interval_ms": settings.PROFILE_INTERVAL_MS,
+            "samples": self.sampler.sample_count,
+            "top_functions": self.sampler.top_functions(),
+        }
+
+    def save(self, status_code: int) -> str:
+        """Write the profile (JSON plus folded stacks) and prune old ones (blocking; see executors.run_blocking)."""
+        directory = Path(settings.PROFILE_DIR)
+        directory.mkdir(parents=True, exist_ok=True)
+        (directory / f"{self.id}.json").write_text(json.dumps(self.to_dict(status_code)))
+        (directory / f"{self.id}.folded").write_text(self.sampler.folded())
+        _prune(directory)
+        return self.id
+
+
+def should_profile(request: Request) -> bool:
+    """Profile on an explicit X-Profile header (when enabled) or by random sampling."""
+    if settings.PROFILING_ENABLED and request.headers.get("X-Profile") in ("1", "true"):
+        return True
+    return settings.PROFILE_SAMPLE_RATE > 0 and random.random() < settings.PROFILE_SAMPLE_RATE
+
+
+@contextmanager
+def capture(request: Request) -> Iterator[RequestProfile]:
+    """Profile the enclosed block: sample stacks and log SQL statements."""
+    profile = RequestProfile(request)
+    token = _sql_log.set(profile.sql)
+    start = time.perf_counter()
+    profile.sampler.start()
+    try:
+        yield profile
+    finally:
+        profile.sampler.stop()
+        profile.duration = time.perf_counter() - start
+        _sql_log.reset(token)
+
+
+def load(profile_id: str, suffix: str = "json") -> Optional[str]:
+    """Read a stored profile file, or None if it doesn't exist."""
+    if not profile_id.isalnum():
+        return None
+    path = Path(settings.PROFILE_DIR) / f"{profile_id}.{suffix}"
+    return path.read_text() if path.exists() else None
+
+
+def list_recent(limit: int = 50) -> List[Dict]:
+    """Summaries of the most recent stored profiles."""
+    directory = Path(settings.PROFILE_DIR)
+    if not directory.exists():
+        return []
+    paths = sorted(directory.glob("*.json"), key=lambda p: p.stat().st_mtime, reverse=True)[:limit]
+    summaries = []
+    for path in paths:
+        data = json.loads(path.read_text())
+        summaries.append({
+            key: data[key]
+            for key in ("id", "method", "path", "status_code", "started_at", "duration_ms", "sql_count", "sql_total_ms")
+        })
+    return summaries
+
+
+def _prune(directory: Path):
+    """Keep only the newest PROFILE_MAX_STORED profiles."""
+    paths = sorted(directory.glob("*.json"), key=lambda p: p.stat().st_mtime, reverse=True)
+    for path in paths[settings.PROFILE_MAX_STORED:]:
+        path.unlink(missing_ok=True)
+        path.with_suffix(".folded").unlink(missing_ok=True)
+
+
+# ==================== SQL CAPTURE ====================
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _sql_log.get() is not None:
+        conn.info.setdefault("profile_query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    log = _sql_log.get()
+    if log is None or not conn.info.get("profile_query_start"):
+        return
+    elapsed = time.perf_counter() - conn.info["profile_query_start"].pop()
+    log.append({"statement": statement, "duration_ms": round(elapsed * 1000, 3), "executemany": executemany})
+
+
+def instrument_engine(engine: Engine):
+    """Log statements issued by profiled requests on this engine."""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
@@ -0,0 +1,80 @@
+"""
+Query counting for catching N+1 patterns and extra round trips.
+
+    with assert_max_queries(2):
+        client.get("/api/movies/1")
+
+The counter listens on the engines themselves (by default the primary, every
+read replica and the direct engine), so it sees statements issued from any
+thread (TestClient runs the app in its own thread) and by read-only
+endpoints routed to a replica. Under pytest, load this module as a plugin
+(`pytest -p app.querycount` or `pytest_plugins = ["app.querycount"]`) to get
+the `max_queries` fixture.
+"""
+from typing import List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+try:
+    import pytest
+except ImportError:  # pytest is only needed for the fixture
+    pytest = None
+
+
+class QueryCountExceeded(AssertionError):
+    """Raised when a block issues more SQL statements than allowed."""
+
+
+class QueryCounter:
+    """
+    Context manager counting the SQL statements sent to the application's engines.
+
+    Args:
+        engine: Engine to watch (defaults to every application engine)
+        max_queries: If given, raise QueryCountExceeded on exit when exceeded
+    """
+
+    def __init__(self, engine: Optional[Engine] = None, max_queries: Optional[int] = None):
+        if engine is None:
+            from app.database import direct_engine, engine as primary, replica_engines
+            # dict.fromkeys: direct_engine is the primary engine unless DATABASE_DIRECT_URL is set
+            self.engines = list(dict.fromkeys([primary, *replica_engines, direct_engine]))
+        else:
+            self.engines = [engine]
+        self.max_queries = max_queries
+        self.statements: List[str] = []
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    def __enter__(self) -> "QueryCounter":
+        for engine in self.engines:
+            event.listen(engine, "before_cursor_execute", self._before_cursor_execute)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        for engine in self.engines:
+            event.remove(engine, "before_cursor_execute", self._before_cursor_execute)
+        if exc_type is None and self.max_queries is not None and self.count > self.max_queries:
+            statements = "\n".join(f"  {i}. {s}" for i, s in enumerate(self.statements, 1))
+            raise QueryCountExceeded(
+                f"Expected at most {self.max_queries} queries, got {self.count}:\n{statements}"
+            )
+        return False
+
+
+def assert_max_queries(max_queries: int, engine: Optional[Engine] = None) -> QueryCounter:
+    """Fail the enclosed block if it issues more than `max_queries` statements."""
+    return QueryCounter(engine, max_queries)
+
+
+if pytest is not None:
+    @pytest.fixture
+    def max_queries():
+        """Fixture returning assert_max_queries, e.g. `with max_queries(2): ...`."""
+        return assert_max_queries
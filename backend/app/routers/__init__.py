@@ -1,3 +1,3 @@
-from app.routers import movies
+from app.routers import debug, movies
 
-__all__ = ["movies"]
+__all__ = ["debug", "movies"]
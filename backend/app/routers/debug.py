@@ -0,0 +1,53 @@
+from fastapi import APIRouter, HTTPException, status, Query
+from fastapi.responses import PlainTextResponse, Response
+from typing import Dict, List
+from app import profiling
+from app.config import settings
+
+router = APIRouter(prefix="/debug/profiles", tags=["Debug"])
+
+
+def require_profiling():
+    """Profiles contain SQL and stack traces - only serve them when profiling is enabled."""
+    if not settings.PROFILING_ENABLED:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Profiling is disabled")
+
+
+@router.get("/", summary="List recent request profiles")
+def list_profiles(limit: int = Query(50, ge=1, le=500, description="Maximum number of profiles")) -> List[Dict]:
+    """
+    List the most recent stored profiles, newest first.
+
+    Each entry has the request, its status, duration and SQL totals.
+    """
+    require_profiling()
+    return profiling.list_recent(limit)
+
+
+@router.get("/{profile_id}", summary="Get a request profile")
+def get_profile(profile_id: str):
+    """
+    Get a stored profile: SQL statements with timings and the functions that
+    were on-CPU most often.
+
+    - **profile_id**: Value of the X-Profile-Id response header
+    """
+    require_profiling()
+    data = profiling.load(profile_id)
+    if data is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Profile {profile_id} not found")
+    return Response(content=data, media_type="application/json")
+
+
+@router.get("/{profile_id}/folded", response_class=PlainTextResponse, summary="Get a profile's folded stacks")
+def get_profile_stacks(profile_id: str):
+    """
+    Get a profile's stack samples in folded format, for flamegraph.pl or speedscope.
+
+    - **profile_id**: Value of the X-Profile-Id response header
+    """
+    require_profiling()
+    data = profiling.load(profile_id, "folded")
+    if data is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Profile {profile_id} not found")
+    return data
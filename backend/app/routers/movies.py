@@ -1,18 +1,41 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query, Path
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Request, status, Query, Path
+from fastapi.responses import StreamingResponse
+from contextlib import aclosing
+import asyncio
+import json
 import logging
 from sqlalchemy.orm import Session
-from typing import List, Optional
-from app.database import get_db
-from app.schemas.movie import Movie as MovieSchema, MovieCreate, MovieUpdate, WatchStatus, Platform, ContentType
+from typing import Any, Dict, List, Optional, Tuple
+from datetime import date, datetime
+from app import executors
+from app.config import settings
+from app.database import get_db, get_read_db
+from app.schemas.movie import Movie as MovieSchema, MovieChanges, MovieCreate, MovieQueryResult, MovieUpdate, WatchStatus, Platform, ContentType
+from app.schemas.review import BatchReviewRequest, BatchReviewResponse, ReviewRequest, ReviewResult
 from app.models.movie import Movie as MovieModel
 from app.crud.movie import movie_crud
-from app.services.tmdb import tmdb_service
-from app.services.recommendations import MovieRecommendationEngine
-from app.services.gemini import gemini_service
+from app.services import get_gemini_service, get_tmdb_service
+from app.services.analytics_cube import analytics_cube
+from app.services.catalog import catalog
+from app.services.changes import change_feed
+from app.services.collection_query import MovieFilters, collection_query
+from app.services.collection_snapshot import collection_snapshot
+from app.services.live_updates import RESYNC, live_updates
+from app.services.prefetch import recommendation_prefetcher
+from app.services.review_cache import review_cache
+from app.services.resilience import UpstreamUnavailable
+from app.deadline import DeadlineExceeded
+from app.metrics import CACHE_REQUESTS
 
 router = APIRouter(prefix="/movies", tags=["Movies & TV Shows"])
 logger = logging.getLogger(__name__)
 
+# Dimensions accepted by /analytics/query
+ANALYTICS_DIMENSIONS = {"content_type", "status", "platform", "genre", "month", "year"}
+
+# Fields that feed the recommendation engine's preference profile
+PROFILE_FIELDS = {"title", "genre", "director", "cast", "release_year", "description", "status", "user_rating", "tmdb_id"}
+
 
 # ==================== COLLECTION ENDPOINTS ====================
 
@@ -44,7 +67,7 @@ def get_movies(
 @router.get("/search", response_model=List[MovieSchema], summary="Search content in collection")
 def search_movies(
     q: str = Query(..., min_length=1, description="Search query"),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """
     Search movies/TV shows in your collection by title, genre, or director.
@@ -56,7 +79,7 @@ def search_movies(
 @router.get("/genre/{genre}", response_model=List[MovieSchema], summary="Get content by genre")
 def get_movies_by_genre(
     genre: str,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """
     Get all movies/TV shows of a specific genre.
@@ -68,7 +91,7 @@ def get_movies_by_genre(
 @router.get("/status/{status}", response_model=List[MovieSchema], summary="Get content by status")
 def get_movies_by_status(
     status: WatchStatus,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """
     Get all content with a specific watch status (wishlist, watching, completed).
@@ -80,7 +103,7 @@ def get_movies_by_status(
 @router.get("/platform/{platform}", response_model=List[MovieSchema], summary="Get content by platform")
 def get_movies_by_platform(
     platform: Platform,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """
     Get all content from a specific streaming platform.
@@ -90,7 +113,7 @@ def get_movies_by_platform(
 
 
 @router.get("/favorites", response_model=List[MovieSchema], summary="Get favorite content")
-def get_favorite_movies(db: Session = Depends(get_db)):
+def get_favorite_movies(db: Session = Depends(get_read_db)):
     """
     Retrieve all movies/TV shows marked as favorites.
     """
@@ -101,7 +124,7 @@ def get_favorite_movies(db: Session = Depends(get_db)):
 @router.get("/type/{content_type}", response_model=List[MovieSchema], summary="Get content by type")
 def get_by_type(
     content_type: ContentType,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """
     Get all content of a specific type (movie or tv_show).
@@ -110,10 +133,119 @@ def get_by_type(
     return movies
 
 
+@router.get("/query", response_model=MovieQueryResult, summary="Query content with filters, sorting and facets")
+def query_movies(
+    content_type: List[ContentType] = Query([], description="Any of these content types"),
+    watch_status: List[WatchStatus] = Query([], alias="status", description="Any of these watch statuses"),
+    platform: List[Platform] = Query([], description="Any of these platforms"),
+    genre: List[str] = Query([], description="Any of these genres"),
+    favorite: Optional[bool] = Query(None, description="Only favorites (true) or non-favorites (false)"),
+    year_min: Optional[int] = Query(None, description="Earliest release year"),
+    year_max: Optional[int] = Query(None, description="Latest release year"),
+    rating_min: Optional[float] = Query(None, ge=0, le=10, description="Lowest user rating"),
+    rating_max: Optional[float] = Query(None, ge=0, le=10, description="Highest user rating"),
+    q: Optional[str] = Query(None, min_length=1, description="Text in title, genre or director"),
+    sort: str = Query("-created_at", description="Comma-separated sort keys, '-' prefix for descending"),
+    skip: int = Query(0, ge=0, description="Number of records to skip"),
+    limit: int = Query(50, ge=1, le=1000, description="Maximum number of records to return"),
+    facets: bool = Query(True, description="Include facet counts"),
+    db: Session = Depends(get_read_db)
+):
+    """
+    Query the collection with any combination of filters.
+    
+    Repeat a parameter to match several values (`?status=watching&status=wishlist`).
+    Dimensions combine with AND, values within one with OR. Sort keys:
+    created_at, updated_at, watched_at, title, release_year, user_rating,
+    tmdb_rating, duration.
+    
+    `facets` has counts per content_type, status, platform, genre and favorite
+    value. Each dimension's counts apply all filters except its own, so they
+    show how many titles selecting another value would add.
+    """
+    filters = MovieFilters(
+        content_type=content_type,
+        status=watch_status,
+        platform=platform,
+        genre=[g for g in genre if g.strip()],
+        favorite=favorite,
+        year_min=year_min,
+        year_max=year_max,
+        rating_min=rating_min,
+        rating_max=rating_max,
+        q=q
+    )
+    try:
+        return collection_query.search(db, filters, sort=sort, skip=skip, limit=limit, with_facets=facets)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
+@router.get("/changes", response_model=MovieChanges, summary="Get changes since a version")
+def get_changes(
+    since: Optional[int] = Query(None, ge=0, description="`version` from the previous response"),
+    since_time: Optional[datetime] = Query(None, description="Changes at or after this ISO 8601 timestamp"),
+    db: Session = Depends(get_db)
+):
+    """
+    Get content created, updated or deleted since a previous call.
+    
+    Call without parameters to get the current version, load the collection,
+    then pass `since=<version>` to fetch only what changed. Apply `upserts`
+    and remove `deletes`; the same change may occasionally be sent twice.
+    When `reset` is true, reload the whole collection instead.
+    """
+    return change_feed.changes_since(db, version=since, since_time=since_time)
+
+
+@router.get("/events", summary="Stream collection changes (SSE)")
+async def stream_changes(request: Request):
+    """
+    Push collection changes as Server-Sent Events, from every worker.
+    
+    Emits `ready` once connected, then `change` events with
+    `{"op": "upsert"|"delete", "id": ..., "version": ...}`. A `resync` event
+    means events were missed (slow client or lost listener): catch up with
+    `GET /changes?since=<version>`. Idle streams get a keep-alive comment
+    every LIVE_UPDATES_HEARTBEAT_SECONDS.
+    """
+    subscription = live_updates.subscribe()
+    if subscription is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many open event streams, try again later"
+        )
+    
+    async def event_stream():
+        try:
+            yield f"retry: 3000\nevent: ready\ndata: {json.dumps({'backend': live_updates.backend})}\n\n"
+            while True:
+                batch = await subscription.next_batch(settings.LIVE_UPDATES_HEARTBEAT_SECONDS)
+                if await request.is_disconnected():
+                    return
+                if batch is None:
+                    yield ": keep-alive\n\n"
+                    continue
+                # Everything buffered goes out in one write
+                yield "".join(
+                    "event: resync\ndata: {}\n\n" if change is RESYNC
+                    else f"event: change\ndata: {json.dumps(change)}\n\n"
+                    for change in batch
+                )
+        finally:
+            live_updates.unsubscribe(subscription)
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @router.get("/{movie_id}", response_model=MovieSchema, summary="Get content by ID")
 def get_movie(
     movie_id: int,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """
     Get a specific movie/TV show by ID.
@@ -132,6 +264,7 @@ def get_movie(
 @router.post("/", response_model=MovieSchema, status_code=status.HTTP_201_CREATED, summary="Add content to collection")
 def create_movie(
     movie: MovieCreate,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db)
 ):
     """
@@ -146,13 +279,16 @@ def create_movie(
                 detail=f"This content is already in your collection (ID: {existing.id})"
             )
     
-    return movie_crud.create(db, movie=movie)
+    db_movie = movie_crud.create(db, movie=movie)
+    background_tasks.add_task(recommendation_prefetcher.warm_up)
+    return db_movie
 
 
 @router.put("/{movie_id}", response_model=MovieSchema, summary="Update content")
 def update_movie(
     movie_id: int,
     movie_update: MovieUpdate,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db)
 ):
     """
@@ -164,12 +300,17 @@ def update_movie(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Content with id {movie_id} not found"
         )
+    
+    # Ratings, status and metadata edits change the preference profile
+    if PROFILE_FIELDS & movie_update.model_fields_set:
+        background_tasks.add_task(recommendation_prefetcher.warm_up)
     return movie
 
 
 @router.delete("/{movie_id}", status_code=status.HTTP_204_NO_CONTENT, summary="Delete content")
 def delete_movie(
     movie_id: int,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db)
 ):
     """
@@ -181,6 +322,7 @@ def delete_movie(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Content with id {movie_id} not found"
         )
+    background_tasks.add_task(recommendation_prefetcher.warm_up)
 
 
 # ==================== ACTION ENDPOINTS ====================
@@ -206,6 +348,7 @@ def toggle_favorite(
 def update_status(
     movie_id: int,
     new_status: WatchStatus,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db)
 ):
     """
@@ -224,12 +367,14 @@ def update_status(
         movie.watched_at = datetime.now()
     
     movie = movie_crud.update(db, movie_id=movie_id, movie_update=movie_update)
+    background_tasks.add_task(recommendation_prefetcher.warm_up)
     return movie
 
 
 @router.patch("/{movie_id}/progress", response_model=MovieSchema, summary="Update TV show progress")
 def update_progress(
     movie_id: int,
+    background_tasks: BackgroundTasks,
     episodes_watched: int = Query(..., ge=0, description="Episodes watched"),
     current_season: Optional[int] = Query(None, ge=1, description="Current season"),
     current_episode: Optional[int] = Query(None, ge=1, description="Current episode"),
@@ -250,6 +395,7 @@ def update_progress(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"TV show with id {movie_id} not found"
         )
+    background_tasks.add_task(recommendation_prefetcher.warm_up)
     return movie
 
 
@@ -258,7 +404,8 @@ def update_progress(
 @router.get("/tmdb/search/movies", summary="Search movies on TMDB")
 async def tmdb_search_movies(
     q: str = Query(..., min_length=1, description="Search query"),
-    page: int = Query(1, ge=1, description="Page number")
+    page: int = Query(1, ge=1, description="Page number"),
+    tmdb_service=Depends(get_tmdb_service)
 ):
     """
     Search for movies on TMDB to add to your collection.
@@ -270,7 +417,8 @@ async def tmdb_search_movies(
 @router.get("/tmdb/search/tv", summary="Search TV shows on TMDB")
 async def tmdb_search_tv(
     q: str = Query(..., min_length=1, description="Search query"),
-    page: int = Query(1, ge=1, description="Page number")
+    page: int = Query(1, ge=1, description="Page number"),
+    tmdb_service=Depends(get_tmdb_service)
 ):
     """
     Search for TV shows on TMDB to add to your collection.
@@ -279,8 +427,22 @@ async def tmdb_search_tv(
     return results
 
 
+@router.get("/tmdb/autocomplete", summary="Suggest titles from the local OMDb catalog")
+async def tmdb_autocomplete(
+    q: str = Query(..., min_length=1, description="Beginning of the title"),
+    limit: int = Query(10, ge=1, le=50, description="Maximum number of suggestions")
+):
+    """
+    Suggest titles as the user types, without calling OMDb.
+
+    Matches are case-insensitive title prefixes from the shared catalog of
+    previously fetched OMDb details, in alphabetical order.
+    """
+    return catalog.autocomplete(q, limit)
+
+
 @router.get("/tmdb/movie/{imdb_id}", summary="Get movie details from OMDb")
-async def tmdb_get_movie(imdb_id: str):
+async def tmdb_get_movie(imdb_id: str, tmdb_service=Depends(get_tmdb_service)):
     """
     Get detailed information about a movie from OMDb using IMDb ID.
     """
@@ -294,7 +456,7 @@ async def tmdb_get_movie(imdb_id: str):
 
 
 @router.get("/tmdb/tv/{imdb_id}", summary="Get TV show details from OMDb")
-async def tmdb_get_tv(imdb_id: str):
+async def tmdb_get_tv(imdb_id: str, tmdb_service=Depends(get_tmdb_service)):
     """
     Get detailed information about a TV show from OMDb using IMDb ID.
     """
@@ -310,7 +472,8 @@ async def tmdb_get_tv(imdb_id: str):
 @router.get("/tmdb/trending/{media_type}", summary="Get trending content from TMDB")
 async def tmdb_trending(
     media_type: str = Path(..., description="Media type: 'movie', 'tv', or 'all'"),
-    time_window: str = Query("week", description="Time window: 'day' or 'week'")
+    time_window: str = Query("week", description="Time window: 'day' or 'week'"),
+    tmdb_service=Depends(get_tmdb_service)
 ):
     """
     Get trending movies/TV shows from TMDB.
@@ -320,7 +483,7 @@ async def tmdb_trending(
 
 
 @router.get("/tmdb/popular/movies", summary="Get popular movies from TMDB")
-async def tmdb_popular_movies(page: int = Query(1, ge=1)):
+async def tmdb_popular_movies(page: int = Query(1, ge=1), tmdb_service=Depends(get_tmdb_service)):
     """
     Get popular movies from TMDB.
     """
@@ -329,7 +492,7 @@ async def tmdb_popular_movies(page: int = Query(1, ge=1)):
 
 
 @router.get("/tmdb/popular/tv", summary="Get popular TV shows from TMDB")
-async def tmdb_popular_tv(page: int = Query(1, ge=1)):
+async def tmdb_popular_tv(page: int = Query(1, ge=1), tmdb_service=Depends(get_tmdb_service)):
     """
     Get popular TV shows from TMDB.
     """
@@ -340,51 +503,43 @@ async def tmdb_popular_tv(page: int = Query(1, ge=1)):
 # ==================== ANALYTICS ENDPOINTS ====================
 
 @router.get("/analytics/stats", summary="Get collection statistics")
-def get_stats(db: Session = Depends(get_db)):
+def get_stats(db: Session = Depends(get_read_db)):
     """
     Get statistics about your movie/TV show collection.
-    """
-    from sqlalchemy import func
     
-    total_count = db.query(func.count(MovieModel.id)).scalar()
-    movies_count = db.query(func.count(MovieModel.id)).filter(MovieModel.content_type == ContentType.MOVIE).scalar()
-    tv_count = db.query(func.count(MovieModel.id)).filter(MovieModel.content_type == ContentType.TV_SHOW).scalar()
-    
-    wishlist_count = db.query(func.count(MovieModel.id)).filter(MovieModel.status == WatchStatus.WISHLIST).scalar()
-    watching_count = db.query(func.count(MovieModel.id)).filter(MovieModel.status == WatchStatus.WATCHING).scalar()
-    completed_count = db.query(func.count(MovieModel.id)).filter(MovieModel.status == WatchStatus.COMPLETED).scalar()
+    Read from the analytics cube, which is refreshed in the background and
+    may lag behind the latest changes by ANALYTICS_REFRESH_SECONDS.
+    """
+    totals = analytics_cube.query(db, group_by=["content_type", "status"], filters={})
     
-    favorites_count = db.query(func.count(MovieModel.id)).filter(MovieModel.is_favorite == True).scalar()
+    def total(content_type: Optional[ContentType] = None, watch_status: Optional[WatchStatus] = None, field: str = "titles") -> int:
+        return sum(
+            row[field] for row in totals
+            if (content_type is None or row["content_type"] == content_type)
+            and (watch_status is None or row["status"] == watch_status)
+        )
     
     # Calculate total watch time for movies
-    total_movie_time = db.query(func.sum(MovieModel.duration)).filter(
-        MovieModel.content_type == ContentType.MOVIE,
-        MovieModel.status == WatchStatus.COMPLETED
-    ).scalar() or 0
-    
-    # Get genre distribution
-    genres_result = db.query(MovieModel.genre).filter(MovieModel.genre.isnot(None)).all()
-    genre_dict = {}
-    for (genre_str,) in genres_result:
-        if genre_str:
-            for genre in genre_str.split(","):
-                genre = genre.strip()
-                genre_dict[genre] = genre_dict.get(genre, 0) + 1
-    
-    # Get platform distribution
-    platform_result = db.query(MovieModel.platform, func.count(MovieModel.id)).filter(
-        MovieModel.platform.isnot(None)
-    ).group_by(MovieModel.platform).all()
-    platform_stats = {platform.value: count for platform, count in platform_result}
+    total_movie_time = total(ContentType.MOVIE, WatchStatus.COMPLETED, field="runtime_minutes")
+    
+    genre_dict = {
+        row["genre"]: row["titles"]
+        for row in analytics_cube.query(db, group_by=["genre"], filters={})
+    }
+    platform_stats = {
+        Platform[row["platform"]].value: row["titles"]
+        for row in analytics_cube.query(db, group_by=["platform"], filters={})
+        if row["platform"]
+    }
     
     return {
-        "total_content": total_count,
-        "movies": movies_count,
-        "tv_shows": tv_count,
-        "wishlist": wishlist_count,
-        "watching": watching_count,
-        "completed": completed_count,
-        "favorites": favorites_count,
+        "total_content": total(),
+        "movies": total(ContentType.MOVIE),
+        "tv_shows": total(ContentType.TV_SHOW),
+        "wishlist": total(watch_status=WatchStatus.WISHLIST),
+        "watching": total(watch_status=WatchStatus.WATCHING),
+        "completed": total(watch_status=WatchStatus.COMPLETED),
+        "favorites": total(field="favorites"),
         "total_watch_time_minutes": total_movie_time,
         "total_watch_time_hours": round(total_movie_time / 60, 1) if total_movie_time else 0,
         "genre_distribution": genre_dict,
@@ -392,90 +547,151 @@ def get_stats(db: Session = Depends(get_db)):
     }
 
 
+@router.get("/analytics/query", summary="Query the analytics cube")
+def query_analytics(
+    group_by: List[str] = Query([], description="Dimensions: content_type, status, platform, genre, month, year"),
+    content_type: List[ContentType] = Query([], description="Only these content types"),
+    watch_status: List[WatchStatus] = Query([], alias="status", description="Only these watch statuses"),
+    platform: List[Platform] = Query([], description="Only these platforms"),
+    genre: List[str] = Query([], description="Only these genres"),
+    period_from: Optional[date] = Query(None, alias="from", description="First month added (YYYY-MM-DD)"),
+    period_to: Optional[date] = Query(None, alias="to", description="Last month added (YYYY-MM-DD)"),
+    db: Session = Depends(get_read_db)
+):
+    """
+    Aggregate the collection by any combination of dimensions.
+    
+    Each row has the group's dimension values plus titles, favorites, rated,
+    avg_rating, runtime_minutes (movies) and episodes_watched. Periods are the
+    month a title was added. When grouping or filtering by genre, a title is
+    counted once for each of its matching genres. Like /analytics/stats, the
+    cube may lag behind the latest changes by ANALYTICS_REFRESH_SECONDS.
+    """
+    unknown = set(group_by) - ANALYTICS_DIMENSIONS
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown group_by dimension(s): {', '.join(sorted(unknown))}"
+        )
+    
+    rows = analytics_cube.query(
+        db,
+        group_by=list(dict.fromkeys(group_by)),
+        filters={
+            "content_type": content_type,
+            "status": watch_status,
+            "platform": [p.name for p in platform],
+            "genre": genre,
+        },
+        period_from=period_from,
+        period_to=period_to
+    )
+    for row in rows:
+        if "platform" in row:
+            row["platform"] = Platform[row["platform"]].value if row["platform"] else None
+    
+    return {
+        "group_by": group_by,
+        "rows": rows,
+        "total_rows": len(rows)
+    }
+
+
 @router.get("/analytics/watch-time", summary="Get watch time analytics")
 def get_watch_time_analytics(
     period: str = Query("weekly", regex="^(weekly|monthly)$", description="Time period: weekly or monthly"),
-    db: Session = Depends(get_db)
+    granularity: Optional[str] = Query(None, regex="^(day|week|month|year)$", description="Bucket size (overrides period)"),
+    start: Optional[datetime] = Query(None, alias="from", description="Only content watched at or after this ISO 8601 timestamp"),
+    end: Optional[datetime] = Query(None, alias="to", description="Only content watched before this ISO 8601 timestamp"),
+    db: Session = Depends(get_read_db)
 ):
     """
-    Get watch time analytics grouped by week or month.
+    Get watch time analytics grouped by day, week, month or year.
     Returns the time spent watching content over time.
+    
+    Reads the watch-history rollups, so TV shows count episodes in the period
+    they were watched and the cost grows with the number of buckets rather
+    than the number of titles. Ranges have day precision (UTC).
     """
-    from datetime import datetime, timedelta
-    from sqlalchemy import extract, case
-    
-    # Get completed movies and TV shows with their watch dates
-    completed_content = db.query(
-        MovieModel.watched_at,
-        MovieModel.duration,
-        MovieModel.content_type,
-        MovieModel.episodes_watched,
-        MovieModel.total_episodes
-    ).filter(
-        MovieModel.status == WatchStatus.COMPLETED,
-        MovieModel.watched_at.isnot(None)
-    ).all()
-    
-    # Group data by period
-    time_data = {}
-    
-    for watched_at, duration, content_type, episodes_watched, total_episodes in completed_content:
-        if not watched_at:
-            continue
-            
-        # Determine the period key
-        if period == "weekly":
-            # Get the Monday of the week
-            days_since_monday = watched_at.weekday()
-            monday = watched_at - timedelta(days=days_since_monday)
-            period_key = monday.strftime("%Y-%m-%d")
-            period_label = f"Week of {monday.strftime('%b %d, %Y')}"
-        else:  # monthly
-            period_key = watched_at.strftime("%Y-%m")
-            period_label = watched_at.strftime("%B %Y")
-        
-        # Calculate watch time
-        if content_type == ContentType.MOVIE:
-            watch_time = duration or 0
-        else:  # TV Show
-            # Estimate: assume each episode is ~45 minutes if no duration specified
-            if episodes_watched and episodes_watched > 0:
-                episode_duration = (duration / total_episodes) if (duration and total_episodes) else 45
-                watch_time = episodes_watched * episode_duration
-            else:
-                watch_time = 0
-        
-        # Add to time data
-        if period_key not in time_data:
-            time_data[period_key] = {
-                "period": period_label,
-                "date": period_key,
-                "watch_time_minutes": 0,
-                "watch_time_hours": 0,
-                "content_count": 0
-            }
-        
-        time_data[period_key]["watch_time_minutes"] += watch_time
-        time_data[period_key]["content_count"] += 1
+    from datetime import time, timedelta, timezone
+    from sqlalchemy import cast, Date, func
+    from app.models.watch_event import WatchTimeDaily, WatchTimeMonthly
+    
+    if start and end and start >= end:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="'from' must be earlier than 'to'"
+        )
+    unit = granularity or ("week" if period == "weekly" else "month")
+    
+    # Day bounds [first_day, end_day) in UTC; a day is included if it starts before `to`
+    def utc(moment: datetime) -> datetime:
+        return moment.astimezone(timezone.utc) if moment.tzinfo else moment
     
-    # Convert to hours and sort by date
-    sorted_data = []
-    for key in sorted(time_data.keys()):
-        data = time_data[key]
-        data["watch_time_hours"] = round(data["watch_time_minutes"] / 60, 1)
-        sorted_data.append(data)
+    first_day = utc(start).date() if start else None
+    end_day = None
+    if end:
+        end = utc(end)
+        end_day = end.date() if end.time() == time.min else end.date() + timedelta(days=1)
+    
+    # The monthly rollup is enough unless the range cuts through a month
+    month_aligned = all(day is None or day.day == 1 for day in (first_day, end_day))
+    if unit in ("month", "year") and month_aligned:
+        table, day_column = WatchTimeMonthly, WatchTimeMonthly.month
+    else:
+        table, day_column = WatchTimeDaily, WatchTimeDaily.day
+    
+    if unit == "day" or (unit == "month" and table is WatchTimeMonthly):
+        bucket = day_column.label("bucket")
+    else:
+        bucket = cast(func.date_trunc(unit, day_column), Date).label("bucket")
+    
+    query = db.query(
+        bucket,
+        func.sum(table.minutes).label("minutes"),
+        func.sum(table.completions).label("content_count")
+    )
+    if first_day:
+        query = query.filter(day_column >= first_day)
+    if end_day:
+        query = query.filter(day_column < end_day)
+    rows = query.group_by(bucket).order_by(bucket).all()
+    
+    key_formats = {"day": "%Y-%m-%d", "week": "%Y-%m-%d", "month": "%Y-%m", "year": "%Y"}
+    label_formats = {"day": "%b %d, %Y", "week": "Week of %b %d, %Y", "month": "%B %Y", "year": "%Y"}
+    
+    data = []
+    for bucket_start, minutes, content_count in rows:
+        minutes = round(float(minutes or 0), 1)
+        data.append({
+            "period": bucket_start.strftime(label_formats[unit]),
+            "date": bucket_start.strftime(key_formats[unit]),
+            "watch_time_minutes": minutes,
+            "watch_time_hours": round(minutes / 60, 1),
+            "content_count": content_count
+        })
     
     return {
         "period": period,
-        "data": sorted_data,
-        "total_periods": len(sorted_data)
+        "granularity": unit,
+        "from": start,
+        "to": end,
+        "data": data,
+        "total_periods": len(data)
     }
 
 
 # ==================== RECOMMENDATION ENDPOINTS ====================
 
+def load_cached_recommendations(db: Session) -> Tuple[int, Optional[Tuple[List[Dict[str, Any]], bool]]]:
+    """Collection size plus the snapshot's candidates and staleness (blocking, for run_blocking)."""
+    state = collection_snapshot.state(db)
+    return len(state.records), recommendation_prefetcher.cached(db, state)
+
+
 @router.get("/recommendations/surprise-me", summary="Get personalized recommendations from OMDb")
 async def get_surprise_me_recommendations(
+    background_tasks: BackgroundTasks,
     count: int = Query(10, ge=1, le=50, description="Number of recommendations to return"),
     db: Session = Depends(get_db)
 ):
@@ -484,20 +700,35 @@ async def get_surprise_me_recommendations(
     
     Searches OMDb for new movies matching your preferences (genres, directors, actors).
     Requires at least 1 movie in your collection to generate recommendations.
+    
+    Served from the precomputed snapshot when one exists; a stale snapshot is
+    still returned immediately and refreshed in the background.
     """
-    # Check how many movies exist first
-    total_movies = db.query(MovieModel).count()
+    # The database work blocks, so it runs off the event loop
+    total_movies, cached = await executors.run_blocking(load_cached_recommendations, db)
     
     logger.info("🎯 Surprise Me endpoint called with count=%s; total_movies=%s", count, total_movies)
-    engine = MovieRecommendationEngine()
-    try:
-        recommendations = await engine.get_recommendations(db, count=count)
-    except Exception as e:
-        logger.exception("❌ Error while generating recommendations: %s", e)
-        await engine.close()
-        # Return a JSON error so CORS middleware can attach headers
-        raise HTTPException(status_code=500, detail="Failed to generate recommendations")
-    await engine.close()
+    if cached is not None:
+        candidates, stale = cached
+        if stale:
+            CACHE_REQUESTS.labels(cache="recommendation_snapshot", result="stale").inc()
+            background_tasks.add_task(recommendation_prefetcher.warm_up)
+        else:
+            CACHE_REQUESTS.labels(cache="recommendation_snapshot", result="hit").inc()
+        recommendations = candidates[:count]
+    else:
+        # Nothing precomputed yet - compute now and keep the full ranked list
+        CACHE_REQUESTS.labels(cache="recommendation_snapshot", result="miss").inc()
+        try:
+            recommendations, complete = await recommendation_prefetcher.compute(db)
+            recommendations = recommendations[:count]
+            if not complete:
+                # Out of time budget - serve the partial list and finish in the background
+                background_tasks.add_task(recommendation_prefetcher.warm_up)
+        except Exception as e:
+            logger.exception("❌ Error while generating recommendations: %s", e)
+            # Return a JSON error so CORS middleware can attach headers
+            raise HTTPException(status_code=500, detail="Failed to generate recommendations")
     
     if not recommendations:
         # Return empty recommendations instead of error
@@ -567,19 +798,8 @@ async def get_surprise_me_recommendations(
 
 # ==================== AI REVIEW GENERATION ====================
 
-@router.post("/{movie_id}/generate-review", summary="Generate AI review summary")
-async def generate_ai_review(
-    movie_id: int = Path(..., description="Movie ID"),
-    user_comments: str = Query(..., description="User's thoughts/comments about the movie"),
-    db: Session = Depends(get_db)
-):
-    """
-    Generate a concise AI-powered review summary using Gemini based on user comments and movie overview.
-    """
-    logger.info(f"🤖 Generating AI review for movie ID: {movie_id}")
-    
-    # Get movie from database
-    movie = movie_crud.get_by_id(db, movie_id)
+def check_reviewable(movie: Optional[MovieModel]):
+    """Raise an HTTPException if an AI review can't be generated for this content."""
     if not movie:
         raise HTTPException(status_code=404, detail="Movie not found")
     
@@ -595,6 +815,23 @@ async def generate_ai_review(
             status_code=400,
             detail="Movie must have an overview/description to generate review"
         )
+
+
+@router.post("/{movie_id}/generate-review", summary="Generate AI review summary")
+async def generate_ai_review(
+    movie_id: int = Path(..., description="Movie ID"),
+    user_comments: str = Query(..., description="User's thoughts/comments about the movie"),
+    db: Session = Depends(get_db),
+    gemini_service=Depends(get_gemini_service)
+):
+    """
+    Generate a concise AI-powered review summary using Gemini based on user comments and movie overview.
+    """
+    logger.info(f"🤖 Generating AI review for movie ID: {movie_id}")
+    
+    # Get movie from database
+    movie = await executors.run_blocking(movie_crud.get_by_id, db, movie_id)
+    check_reviewable(movie)
     
     # Generate review using Gemini
     try:
@@ -621,9 +858,145 @@ async def generate_ai_review(
             "user_rating": movie.user_rating
         }
         
+    except DeadlineExceeded:
+        raise
+    except UpstreamUnavailable as e:
+        raise HTTPException(
+            status_code=503,
+            detail=str(e),
+            headers={"Retry-After": str(int(e.retry_after) + 1)}
+        )
     except Exception as e:
         logger.exception(f"❌ Error generating review: {e}")
         raise HTTPException(
             status_code=500,
             detail=f"Failed to generate review: {str(e)}"
         )
+
+
+@router.post("/generate-review/batch", response_model=BatchReviewResponse, summary="Generate AI reviews for several titles")
+async def generate_ai_reviews_batch(
+    batch: BatchReviewRequest,
+    db: Session = Depends(get_db),
+    gemini_service=Depends(get_gemini_service)
+):
+    """
+    Generate AI review summaries for several movies/TV shows in one call.
+    
+    All titles are loaded in a single query and Gemini is called concurrently
+    (bounded by GEMINI_MAX_CONCURRENCY). Each item gets its own result or error,
+    so one failing title doesn't fail the batch.
+    """
+    logger.info(f"🤖 Generating {len(batch.items)} AI reviews in batch")
+    
+    found = await executors.run_blocking(movie_crud.get_by_ids, db, [item.movie_id for item in batch.items])
+    movies = {m.id: m for m in found}
+    
+    async def generate_one(item: ReviewRequest) -> ReviewResult:
+        movie = movies.get(item.movie_id)
+        result = ReviewResult(movie_id=item.movie_id, user_comments=item.user_comments)
+        try:
+            check_reviewable(movie)
+            result.movie_title = movie.title
+            result.user_rating = movie.user_rating
+            
+            review_summary = await gemini_service.generate_review_summary(
+                movie_title=movie.title,
+                movie_overview=movie.description,
+                user_comments=item.user_comments,
+                user_rating=movie.user_rating
+            )
+            if not review_summary:
+                raise HTTPException(status_code=500, detail="Failed to generate review summary")
+            result.generated_review = review_summary
+        except HTTPException as e:
+            result.status_code = e.status_code
+            result.error = e.detail
+        except UpstreamUnavailable as e:
+            result.status_code = 503
+            result.error = str(e)
+        except DeadlineExceeded as e:
+            result.status_code = 504
+            result.error = str(e)
+        except Exception as e:
+            logger.exception(f"❌ Error generating review for movie {item.movie_id}: {e}")
+            result.status_code = 500
+            result.error = f"Failed to generate review: {str(e)}"
+        return result
+    
+    results = await asyncio.gather(*(generate_one(item) for item in batch.items))
+    failed = sum(1 for r in results if r.error)
+    
+    logger.info(f"✅ Batch review generation finished: {len(results) - failed} succeeded, {failed} failed")
+    return BatchReviewResponse(results=results, succeeded=len(results) - failed, failed=failed)
+
+@router.post("/{movie_id}/generate-review/stream", summary="Stream AI review summary (SSE)")
+async def stream_ai_review(
+    request: Request,
+    movie_id: int = Path(..., description="Movie ID"),
+    user_comments: str = Query(..., description="User's thoughts/comments about the movie"),
+    db: Session = Depends(get_db),
+    gemini_service=Depends(get_gemini_service)
+):
+    """
+    Stream an AI-powered review summary as Server-Sent Events.
+    
+    Emits `data: {"text": ...}` events as Gemini generates tokens, followed by
+    a final `done` event carrying the full review, or an `error` event.
+    """
+    logger.info(f"🤖 Streaming AI review for movie ID: {movie_id}")
+    
+    movie = await executors.run_blocking(movie_crud.get_by_id, db, movie_id)
+    check_reviewable(movie)
+    
+    # Copy what the stream needs; the DB session isn't used once streaming starts
+    movie_title = movie.title
+    movie_overview = movie.description
+    user_rating = movie.user_rating
+    
+    async def event_stream():
+        chunks = []
+        try:
+            async with aclosing(gemini_service.stream_review_summary(
+                movie_title=movie_title,
+                movie_overview=movie_overview,
+                user_comments=user_comments,
+                user_rating=user_rating
+            )) as stream:
+                async for text in stream:
+                    if await request.is_disconnected():
+                        logger.info(f"🔌 Client disconnected from review stream for {movie_title}")
+                        return
+                    chunks.append(text)
+                    yield f"data: {json.dumps({'text': text})}\n\n"
+            
+            logger.info(f"✅ Streamed review for {movie_title}")
+            done = {
+                "movie_id": movie_id,
+                "movie_title": movie_title,
+                "generated_review": "".join(chunks).strip(),
+                "user_comments": user_comments,
+                "user_rating": user_rating
+            }
+            yield f"event: done\ndata: {json.dumps(done)}\n\n"
+        except asyncio.CancelledError:
+            # Response task cancelled on disconnect; aclosing has already shut the upstream stream
+            logger.info(f"🔌 Review stream cancelled for {movie_title}")
+            raise
+        except Exception as e:
+            logger.exception(f"❌ Error streaming review: {e}")
+            yield f"event: error\ndata: {json.dumps({'detail': f'Failed to generate review: {str(e)}'})}\n\n"
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.get("/ai/review-cache/stats", summary="Get AI review cache statistics")
+def get_review_cache_stats():
+    """
+    Get hit/miss counters of the AI review cache for this worker process.
+    """
+    return review_cache.stats()
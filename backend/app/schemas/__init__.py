@@ -1,3 +1,7 @@
-from app.schemas.movie import MovieBase, MovieCreate, MovieUpdate, MovieInDB, Movie
+from app.schemas.movie import MovieBase, MovieCreate, MovieUpdate, MovieInDB, Movie, MovieChanges, FacetCount, MovieQueryResult
+from app.schemas.review import ReviewRequest, BatchReviewRequest, ReviewResult, BatchReviewResponse
 
-__all__ = ["MovieBase", "MovieCreate", "MovieUpdate", "MovieInDB", "Movie"]
+__all__ = [
+    "MovieBase", "MovieCreate", "MovieUpdate", "MovieInDB", "Movie", "MovieChanges", "FacetCount", "MovieQueryResult",
+    "ReviewRequest", "BatchReviewRequest", "ReviewResult", "BatchReviewResponse"
+]
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field, ConfigDict
-from typing import Optional
+from typing import Dict, List, Optional, Union
 from datetime import datetime
 from enum import Enum
 
@@ -121,3 +121,30 @@ class MovieInDB(MovieBase):
 class Movie(MovieInDB):
     """Schema for movie response."""
     pass
+
+
+class MovieChanges(BaseModel):
+    """Change-feed response: rows to upsert and IDs to drop since a version."""
+    
+    version: int = Field(..., description="Pass as `since` on the next call")
+    reset: bool = Field(False, description="Too many changes - reload the whole collection")
+    upserts: List[Movie] = []
+    deletes: List[int] = []
+
+
+class FacetCount(BaseModel):
+    """Number of matching titles with one value of a facet."""
+    
+    value: Union[bool, str, None]
+    count: int
+
+
+class MovieQueryResult(BaseModel):
+    """Page of a faceted collection query."""
+    
+    total: int = Field(..., description="Titles matching every filter")
+    items: List[Movie] = []
+    facets: Dict[str, List[FacetCount]] = Field(
+        default_factory=dict,
+        description="Per dimension: counts with every filter applied except that dimension's own"
+    )
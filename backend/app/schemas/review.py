@@ -0,0 +1,35 @@
+from pydantic import BaseModel, Field
+from typing import List, Optional
+
+
+class ReviewRequest(BaseModel):
+    """A single AI review request."""
+    
+    movie_id: int = Field(..., description="Movie ID")
+    user_comments: str = Field(..., min_length=1, description="User's thoughts/comments about the movie")
+
+
+class BatchReviewRequest(BaseModel):
+    """Schema for generating AI reviews for several titles at once."""
+    
+    items: List[ReviewRequest] = Field(..., min_length=1, max_length=50, description="Review requests")
+
+
+class ReviewResult(BaseModel):
+    """Outcome of one review request in a batch (either a review or an error)."""
+    
+    movie_id: int
+    movie_title: Optional[str] = None
+    generated_review: Optional[str] = None
+    user_comments: str
+    user_rating: Optional[float] = None
+    status_code: int = Field(200, description="HTTP-style status of this item")
+    error: Optional[str] = None
+
+
+class BatchReviewResponse(BaseModel):
+    """Schema for batch AI review response."""
+    
+    results: List[ReviewResult]
+    succeeded: int
+    failed: int
@@ -1,3 +1,41 @@
-from app.services.tmdb import tmdb_service
+"""
+Outbound API clients, built on first use.
 
-__all__ = ["tmdb_service"]
+The OMDb and Gemini services (and their httpx connection pools) are created
+by the first request that needs them, inside the worker serving it, instead
+of when the routers are imported. Use them as FastAPI dependencies:
+
+    async def endpoint(tmdb_service=Depends(get_tmdb_service)): ...
+"""
+from typing import Any, Callable, Dict
+
+_instances: Dict[str, Any] = {}
+
+
+def _instance(name: str, factory: Callable[[], Any]) -> Any:
+    service = _instances.get(name)
+    if service is None:
+        service = _instances[name] = factory()
+    return service
+
+
+async def get_tmdb_service():
+    """OMDb client shared by this worker."""
+    from app.services.tmdb import TMDBService
+    return _instance("tmdb", TMDBService)
+
+
+async def get_gemini_service():
+    """Gemini client shared by this worker."""
+    from app.services.gemini import GeminiService
+    return _instance("gemini", GeminiService)
+
+
+async def close_services():
+    """Close the clients built so far (application shutdown)."""
+    while _instances:
+        _, service = _instances.popitem()
+        await service.close()
+
+
+__all__ = ["get_tmdb_service", "get_gemini_service", "close_services"]
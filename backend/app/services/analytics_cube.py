@@ -0,0 +1,258 @@
+"""
+Analytics cube maintenance.
+
+Every flush that inserts, edits or deletes a Movie marks the month it was
+added as dirty (in the same transaction). A background worker recomputes
+only the dirty months from the movies table every ANALYTICS_REFRESH_SECONDS.
+Dashboards aggregate the small cube instead of the base table and may lag
+behind the latest writes by that interval.
+
+Marking updates an existing mark rather than skipping it, so the writer
+holds the mark's row lock until it commits. A refresh claiming the marks
+waits for that lock and then recomputes from a snapshot that includes the
+write; a mark made after the claim survives for the next refresh.
+
+    python -m app.services.analytics_cube rebuild   # recompute every month
+"""
+from datetime import date, datetime, timezone
+from typing import Dict, List, Optional, Sequence
+import asyncio
+import logging
+import sys
+
+from sqlalchemy import event, func, select, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app import executors
+from app.config import settings
+from app.database import SessionLocal
+from app.models.analytics import ALL_GENRES, AnalyticsCube, AnalyticsDirtyPeriod
+from app.models.movie import Movie
+
+logger = logging.getLogger(__name__)
+
+# pg_try_advisory_xact_lock key: one refresher at a time across workers
+REFRESH_LOCK_ID = 7_310_039
+
+# Recompute the cube rows of the given months; a title contributes one
+# ALL_GENRES row plus one row per distinct genre in its comma-separated list
+REFRESH_SQL = text(f"""
+    INSERT INTO analytics_cube (
+        period, content_type, status, platform, genre,
+        titles, favorites, rated, rating_sum, runtime_minutes, episodes_watched
+    )
+    SELECT
+        p.period,
+        m.content_type,
+        m.status,
+        coalesce(m.platform::text, ''),
+        g.genre,
+        count(*),
+        count(*) FILTER (WHERE m.is_favorite),
+        count(m.user_rating),
+        coalesce(sum(m.user_rating), 0),
+        coalesce(sum(m.duration) FILTER (WHERE m.content_type = 'MOVIE'), 0),
+        coalesce(sum(m.episodes_watched), 0)
+    FROM movies m
+    CROSS JOIN LATERAL (
+        SELECT date_trunc('month', timezone('UTC', coalesce(m.created_at, now())))::date AS period
+    ) p
+    CROSS JOIN LATERAL unnest(
+        ARRAY['{ALL_GENRES}'] || ARRAY(
+            SELECT DISTINCT btrim(name) FROM unnest(string_to_array(m.genre, ',')) AS name
+            WHERE btrim(name) <> ''
+        )
+    ) AS g(genre)
+    WHERE p.period = ANY(:periods)
+    GROUP BY 1, 2, 3, 4, 5
+""")
+
+
+def period_of(moment: Optional[datetime]) -> date:
+    """Cube period (first day of the UTC month) for a creation time."""
+    moment = moment or datetime.now(timezone.utc)
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc)
+    return moment.date().replace(day=1)
+
+
+@event.listens_for(SessionLocal, "before_flush")
+def mark_dirty_periods(session, flush_context, instances):
+    """Mark the periods of movies touched by this flush as needing a refresh."""
+    periods = {
+        period_of(obj.created_at)
+        for obj in (*session.new, *session.dirty, *session.deleted)
+        if isinstance(obj, Movie)
+    }
+    if not periods or session.get_bind().dialect.name != "postgresql":
+        return
+    # Through the connection, so this doesn't trigger another (recursive) flush
+    statement = insert(AnalyticsDirtyPeriod).values([{"period": period} for period in periods])
+    # Update rather than skip an existing mark: the row lock makes a concurrent refresh wait for this commit
+    session.connection().execute(
+        statement.on_conflict_do_update(
+            index_elements=[AnalyticsDirtyPeriod.period],
+            set_={"marked_at": func.now()}
+        )
+    )
+
+
+class AnalyticsCubeService:
+    """Refreshes and queries the analytics cube."""
+
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+
+    def refresh_dirty(self, db: Session) -> Optional[int]:
+        """
+        Recompute the cube for all dirty periods, in one transaction.
+
+        Returns:
+            Number of periods refreshed, or None if another worker holds the refresh lock
+        """
+        locked = db.execute(text("SELECT pg_try_advisory_xact_lock(:key)"), {"key": REFRESH_LOCK_ID}).scalar()
+        if not locked:
+            db.rollback()
+            return None
+
+        # Claim the marks. Waits for writers holding a mark; later writers mark again for the next run
+        periods = db.execute(
+            AnalyticsDirtyPeriod.__table__.delete().returning(AnalyticsDirtyPeriod.period)
+        ).scalars().all()
+        if periods:
+            db.execute(AnalyticsCube.__table__.delete().where(AnalyticsCube.period.in_(periods)))
+            db.execute(REFRESH_SQL, {"periods": list(periods)})
+        db.commit()
+        return len(periods)
+
+    def mark_all(self, db: Session):
+        """Mark every period that has titles (or cube rows) dirty. Does not commit."""
+        movie_periods = select(
+            func.date_trunc("month", func.timezone("UTC", func.coalesce(Movie.created_at, func.now())))
+            .cast(AnalyticsDirtyPeriod.period.type)
+        ).distinct()
+        cube_periods = select(AnalyticsCube.period).distinct()
+        for periods in (movie_periods, cube_periods):
+            db.execute(
+                insert(AnalyticsDirtyPeriod).from_select(["period"], periods).on_conflict_do_nothing()
+            )
+
+    def pending(self, db: Session) -> int:
+        """Number of periods waiting for a refresh."""
+        return db.query(func.count(AnalyticsDirtyPeriod.period)).scalar()
+
+    def query(
+        self,
+        db: Session,
+        group_by: Sequence[str],
+        filters: Dict[str, List],
+        period_from: Optional[date] = None,
+        period_to: Optional[date] = None
+    ) -> List[Dict]:
+        """
+        Aggregate the cube.
+
+        Args:
+            db: Database session
+            group_by: Dimensions among content_type, status, platform, genre, month, year
+            filters: Allowed values per dimension (content_type, status, platform, genre)
+            period_from: First month to include
+            period_to: Last month to include
+
+        Returns:
+            One dict per group with the dimension values and measures
+        """
+        dimensions = {
+            "content_type": AnalyticsCube.content_type,
+            "status": AnalyticsCube.status,
+            "platform": AnalyticsCube.platform,
+            "genre": AnalyticsCube.genre,
+            "month": AnalyticsCube.period,
+            "year": func.date_trunc("year", AnalyticsCube.period).cast(AnalyticsCube.period.type),
+        }
+        columns = [dimensions[name].label(name) for name in group_by]
+        query = db.query(
+            *columns,
+            func.sum(AnalyticsCube.titles).label("titles"),
+            func.sum(AnalyticsCube.favorites).label("favorites"),
+            func.sum(AnalyticsCube.rated).label("rated"),
+            func.sum(AnalyticsCube.rating_sum).label("rating_sum"),
+            func.sum(AnalyticsCube.runtime_minutes).label("runtime_minutes"),
+            func.sum(AnalyticsCube.episodes_watched).label("episodes_watched"),
+        )
+
+        # Per-genre rows only when genres are asked about; otherwise titles would count once per genre
+        if "genre" in group_by or filters.get("genre"):
+            query = query.filter(AnalyticsCube.genre != ALL_GENRES)
+        else:
+            query = query.filter(AnalyticsCube.genre == ALL_GENRES)
+        for name, values in filters.items():
+            if values:
+                query = query.filter(dimensions[name].in_(values))
+        if period_from:
+            query = query.filter(AnalyticsCube.period >= period_from.replace(day=1))
+        if period_to:
+            query = query.filter(AnalyticsCube.period <= period_to.replace(day=1))
+        if columns:
+            query = query.group_by(*columns).order_by(*columns)
+
+        rows = []
+        for row in query.all():
+            values = row._asdict()
+            if values["titles"] is None:
+                continue  # Aggregate over no rows
+            for name in ("titles", "favorites", "rated", "runtime_minutes", "episodes_watched"):
+                values[name] = int(values[name])
+            rated, rating_sum = values.pop("rated"), values.pop("rating_sum")
+            values["rated"] = rated
+            values["avg_rating"] = round(rating_sum / rated, 2) if rated else None
+            rows.append(values)
+        return rows
+
+    async def run_worker(self):
+        """Refresh dirty periods every ANALYTICS_REFRESH_SECONDS."""
+        with SessionLocal() as db:
+            if not db.query(AnalyticsCube.period).first() and not self.pending(db):
+                # First run against an existing collection
+                self.mark_all(db)
+                db.commit()
+
+        while True:
+            try:
+                refreshed = await executors.run_blocking(self._refresh_once)
+                if refreshed:
+                    logger.info(f"📊 Refreshed {refreshed} analytics period(s)")
+            except Exception as e:
+                logger.error(f"❌ Analytics cube refresh failed: {e}")
+            await asyncio.sleep(settings.ANALYTICS_REFRESH_SECONDS)
+
+    def _refresh_once(self) -> Optional[int]:
+        with SessionLocal() as db:
+            return self.refresh_dirty(db)
+
+    def start(self):
+        """Start the background refresher on the running event loop."""
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self.run_worker())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+# Create a singleton instance
+analytics_cube = AnalyticsCubeService()
+
+
+if __name__ == "__main__":
+    with SessionLocal() as db:
+        if len(sys.argv) > 1 and sys.argv[1] == "rebuild":
+            analytics_cube.mark_all(db)
+            db.commit()
+        print(f"✅ Refreshed {analytics_cube.refresh_dirty(db)} analytics period(s)")
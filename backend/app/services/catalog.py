@@ -0,0 +1,548 @@
+"""
+On-disk catalog of OMDb detail records, memory-mapped by every worker.
+
+    python -m app.services.catalog compact   # fold the append log into the base file
+    python -m app.services.catalog stats
+
+The catalog lives in CATALOG_DIR as two files:
+
+- `catalog.bin`, the base: records sorted by IMDb ID in fixed-width columns
+  (year, rating, runtime, genre bitmask, content type) plus one string heap
+  for titles, plots and genre names, addressed through offset arrays. Workers
+  map it read-only, so lookups are binary searches over shared pages and a
+  million titles cost no per-worker heap.
+- `catalog.log`, JSON lines appended as workers fetch details from OMDb.
+  Each worker keeps the records appended since the last compaction in memory
+  (at most CATALOG_MAX_RECENT, oldest dropped first) and reads new lines
+  every CATALOG_REFRESH_SECONDS.
+
+Compaction merges the log into a new base file, swaps it in with a rename
+and empties the log. Workers notice the new file and remap it. start.sh
+compacts before the workers start, and the first worker to see the log grow
+past CATALOG_COMPACT_LOG_BYTES compacts it while running.
+
+Lookups (`get`, `autocomplete`) only touch memory and the mapped file. File
+I/O and locking happen in `append`, `refresh` and `compact`, which async
+code runs through executors.run_blocking; each worker's background task
+(`start`) refreshes and compacts.
+
+Base file layout (native byte order, every section 8-byte aligned):
+
+    header      magic, version, record count, genre count, heap size
+    ids         uint32[count]   numeric part of the IMDb ID, ascending
+    years       uint16[count]   0 when unknown
+    runtimes    uint16[count]   minutes, 0 when unknown
+    ratings     float32[count]  NaN when unknown
+    genres      uint64[count]   bit i set when the title has genre i
+    kinds       uint8[count]    0 movie, 1 TV show
+    titles      uint64[count + 1]  heap offsets
+    plots       uint64[count + 1]  heap offsets
+    title_order uint32[count]   record indexes sorted by case-folded title
+    genre_names uint64[genres + 1] heap offsets
+    heap        UTF-8 bytes
+"""
+from bisect import bisect_left
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import array
+import asyncio
+import fcntl
+import json
+import logging
+import math
+import mmap
+import os
+import struct
+import sys
+import threading
+import time
+
+from app import executors
+from app.config import settings
+from app.preload import shared_cache
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"MMCATLG\0"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("=8sIIIxxxxQ")
+
+# Genres beyond this many distinct names are dropped from the bitmask
+MAX_GENRES = 64
+
+KINDS = ("movie", "tv_show")
+
+# (name, array typecode) in file order. Offset sections (titles, plots, genre_names)
+# have one entry more than the values they index.
+SECTIONS = (
+    ("ids", "I"), ("years", "H"), ("runtimes", "H"), ("ratings", "f"),
+    ("genres", "Q"), ("kinds", "B"), ("titles", "Q"), ("plots", "Q"),
+    ("title_order", "I"), ("genre_names", "Q"),
+)
+
+
+def imdb_number(imdb_id: Any) -> Optional[int]:
+    """tt0903747 -> 903747; None for anything that isn't an IMDb title ID."""
+    if not isinstance(imdb_id, str) or not imdb_id.startswith("tt") or not imdb_id[2:].isdigit():
+        return None
+    number = int(imdb_id[2:])
+    return number if number < 2 ** 32 else None
+
+
+def _aligned(position: int) -> int:
+    return (position + 7) & ~7
+
+
+def _record(details: Dict) -> Optional[Dict]:
+    """The catalogued subset of a get_movie_details / get_tv_show_details result."""
+    if imdb_number(details.get("id")) is None or not details.get("title"):
+        return None
+    return {
+        "id": details["id"],
+        "title": details["title"],
+        "release_year": details.get("release_year"),
+        "tmdb_rating": details.get("tmdb_rating"),
+        "duration": details.get("duration") or details.get("runtime"),
+        "genre": details.get("genre"),
+        "overview": details.get("overview") or details.get("description"),
+        "content_type": "tv_show" if details.get("content_type") == "tv_show" else "movie",
+    }
+
+
+class _BaseFile:
+    """Read-only view of one catalog.bin."""
+
+    def __init__(self, path: Path):
+        with open(path, "rb") as f:
+            stat = os.fstat(f.fileno())
+            self.identity = (stat.st_ino, stat.st_mtime_ns)
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.count, self.genre_count, heap_size = HEADER.unpack_from(self.map, 0)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise ValueError(f"{path} is not a version {FORMAT_VERSION} catalog")
+
+        view = memoryview(self.map)
+        position = _aligned(HEADER.size)
+        for name, typecode in SECTIONS:
+            length = self.genre_count + 1 if name == "genre_names" else self.count + (name in ("titles", "plots"))
+            size = length * array.array(typecode).itemsize
+            setattr(self, name, view[position:position + size].cast(typecode))
+            position = _aligned(position + size)
+        self.heap = view[position:position + heap_size]
+        self.genre_vocabulary = [self._string(self.genre_names, i) for i in range(self.genre_count)]
+
+    def _string(self, offsets, index: int) -> str:
+        return str(self.heap[offsets[index]:offsets[index + 1]], "utf-8")
+
+    def title(self, index: int) -> str:
+        return self._string(self.titles, index)
+
+    def find(self, number: int) -> int:
+        index = bisect_left(self.ids, number)
+        return index if index < self.count and self.ids[index] == number else -1
+
+    def record(self, index: int) -> Dict:
+        year, runtime, rating, mask = (
+            self.years[index], self.runtimes[index], self.ratings[index], self.genres[index]
+        )
+        genres = [name for bit, name in enumerate(self.genre_vocabulary) if mask >> bit & 1]
+        return {
+            "id": f"tt{self.ids[index]:07d}",
+            "title": self.title(index),
+            "release_year": year or None,
+            "tmdb_rating": None if math.isnan(rating) else round(rating, 1),
+            "duration": runtime or None,
+            "genre": ", ".join(genres) or None,
+            "overview": self._string(self.plots, index) or None,
+            "content_type": KINDS[self.kinds[index]],
+        }
+
+    def records(self) -> Iterable[Dict]:
+        return (self.record(i) for i in range(self.count))
+
+    def prefix_range(self, prefix: str) -> Iterable[int]:
+        """Record indexes whose case-folded title starts with `prefix`, in title order."""
+        order = self.title_order
+        position = bisect_left(order, prefix, key=lambda i: self.title(i).casefold())
+        while position < self.count:
+            index = order[position]
+            if not self.title(index).casefold().startswith(prefix):
+                break
+            yield index
+            position += 1
+
+
+def write_base(path: Path, records: List[Dict]):
+    """Write records (unique IDs) as a base file, atomically replacing `path`."""
+    records = sorted(records, key=lambda r: imdb_number(r["id"]))
+    genre_counts: Dict[str, int] = {}
+    for record in records:
+        for name in _genre_names(record.get("genre")):
+            genre_counts[name] = genre_counts.get(name, 0) + 1
+    vocabulary = sorted(genre_counts, key=lambda name: (-genre_counts[name], name))
+    if len(vocabulary) > MAX_GENRES:
+        logger.warning(f"⚠️ {len(vocabulary)} distinct genres, keeping the {MAX_GENRES} most common")
+        vocabulary = vocabulary[:MAX_GENRES]
+    bits = {name: 1 << bit for bit, name in enumerate(vocabulary)}
+
+    columns = {name: array.array(typecode) for name, typecode in SECTIONS}
+    heap = bytearray()
+
+    def add_string(offsets: array.array, value: Optional[str]):
+        if not offsets:
+            offsets.append(len(heap))
+        heap.extend((value or "").encode("utf-8"))
+        offsets.append(len(heap))
+
+    for record in records:
+        columns["ids"].append(imdb_number(record["id"]))
+        columns["years"].append(min(max(int(record.get("release_year") or 0), 0), 65535))
+        columns["runtimes"].append(min(max(int(record.get("duration") or 0), 0), 65535))
+        rating = record.get("tmdb_rating")
+        columns["ratings"].append(float("nan") if rating is None else float(rating))
+        mask = 0
+        for name in _genre_names(record.get("genre")):
+            mask |= bits.get(name, 0)
+        columns["genres"].append(mask)
+        columns["kinds"].append(KINDS.index(record.get("content_type") or "movie"))
+        add_string(columns["titles"], record["title"])
+    for record in records:
+        add_string(columns["plots"], record.get("overview"))
+    for name in vocabulary:
+        add_string(columns["genre_names"], name)
+    for offsets in (columns["titles"], columns["plots"], columns["genre_names"]):
+        if not offsets:
+            offsets.append(len(heap))
+    columns["title_order"].extend(sorted(range(len(records)), key=lambda i: records[i]["title"].casefold()))
+
+    temporary = path.with_suffix(".tmp")
+    with open(temporary, "wb") as f:
+        f.write(HEADER.pack(MAGIC, FORMAT_VERSION, len(records), len(vocabulary), len(heap)))
+        for name, _ in SECTIONS:
+            f.write(b"\0" * (_aligned(f.tell()) - f.tell()))
+            columns[name].tofile(f)
+        f.write(b"\0" * (_aligned(f.tell()) - f.tell()))
+        f.write(heap)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporary, path)
+
+
+def _genre_names(genre: Optional[str]) -> List[str]:
+    return [name.strip() for name in (genre or "").split(",") if name.strip()]
+
+
+def _same(stored: Dict, record: Dict) -> bool:
+    """Whether a catalogued record already holds these details (genre order and float width aside)."""
+    def comparable(r: Dict) -> Tuple:
+        rating = r.get("tmdb_rating")
+        return (
+            r["title"], r.get("release_year"), None if rating is None else round(rating, 1),
+            r.get("duration"), frozenset(_genre_names(r.get("genre"))), r.get("overview") or None,
+            r.get("content_type"),
+        )
+    return comparable(stored) == comparable(record)
+
+
+class OMDbCatalog:
+    """OMDb details shared by all workers: an mmapped base file plus recent appends."""
+
+    def __init__(self, directory: Optional[str] = None):
+        self._directory = directory
+        self._base: Optional[_BaseFile] = None
+        self._recent: Dict[int, Dict] = {}  # Appended since the last compaction, by IMDb number
+        self._log_position = 0
+        self._checked_at = 0.0
+        self._log_fd: Optional[int] = None
+        self._log_fd_pid: Optional[int] = None
+        self._log_size = 0
+        # Guards the in-memory state against refreshes and appends in executor threads
+        self._state_lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def directory(self) -> Path:
+        return Path(self._directory or settings.CATALOG_DIR)
+
+    @property
+    def base_path(self) -> Path:
+        return self.directory / "catalog.bin"
+
+    @property
+    def log_path(self) -> Path:
+        return self.directory / "catalog.log"
+
+    @property
+    def lock_path(self) -> Path:
+        return self.directory / "catalog.lock"
+
+    @property
+    def nbytes(self) -> int:
+        return len(self._base.map) if self._base is not None else 0
+
+    def _lock(self, mode: int) -> int:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+        fcntl.flock(fd, mode)
+        return fd
+
+    def open(self) -> "OMDbCatalog":
+        """Map the current base file and read the log (gunicorn master when preloading)."""
+        self.refresh(force=True)
+        return self
+
+    def refresh(self, force: bool = False):
+        """Pick up a compacted base file and newly appended records (blocking)."""
+        now = time.monotonic()
+        if not force and now - self._checked_at < settings.CATALOG_REFRESH_SECONDS:
+            return
+        self._checked_at = now
+
+        try:
+            stat = os.stat(self.base_path)
+            identity = (stat.st_ino, stat.st_mtime_ns)
+        except FileNotFoundError:
+            identity = None
+        current = self._base.identity if self._base is not None else None
+        if identity != current:
+            # Compacted: the new base holds everything that was in the log
+            base = _BaseFile(self.base_path) if identity is not None else None
+            with self._state_lock:
+                self._base = base
+                self._recent = {}
+                self._log_position = 0
+
+        try:
+            with open(self.log_path, "rb") as f:
+                size = os.fstat(f.fileno()).st_size
+                if size < self._log_position:
+                    # Emptied by a compaction, which replaced the base file first: map that one
+                    self._base = None
+                    return self.refresh(force=True)
+                f.seek(self._log_position)
+                data = f.read()
+        except FileNotFoundError:
+            return
+        self._log_size = size
+        complete = data[:data.rfind(b"\n") + 1]
+        with self._state_lock:
+            for line in complete.splitlines():
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                number = imdb_number(record.get("id"))
+                if number is not None:
+                    self._remember(number, record)
+            self._log_position += len(complete)
+
+    def _remember(self, number: int, record: Dict):
+        """Keep an appended record in memory, dropping the oldest beyond CATALOG_MAX_RECENT (hold _state_lock)."""
+        self._recent.pop(number, None)
+        self._recent[number] = record
+        while len(self._recent) > settings.CATALOG_MAX_RECENT:
+            # Still in the log; back in lookups after the next compaction
+            del self._recent[next(iter(self._recent))]
+
+    def maintain(self) -> Optional[Dict[str, int]]:
+        """
+        Refresh, and compact once the log has grown past CATALOG_COMPACT_LOG_BYTES (blocking).
+
+        Returns:
+            The compaction result, or None if nothing was compacted
+        """
+        self.refresh(force=True)
+        if self._log_size < settings.CATALOG_COMPACT_LOG_BYTES:
+            return None
+        return self.compact(wait=False)
+
+    def get(self, imdb_id: str) -> Optional[Dict]:
+        """
+        Look up a title without calling OMDb.
+
+        Args:
+            imdb_id: IMDb ID (e.g., tt1234567)
+
+        Returns:
+            Catalogued details (title, year, rating, runtime, genre, plot), or None
+        """
+        number = imdb_number(imdb_id)
+        if number is None or not settings.CATALOG_ENABLED:
+            return None
+        record = self._recent.get(number)
+        if record is not None:
+            return record
+        if self._base is not None:
+            index = self._base.find(number)
+            if index >= 0:
+                return self._base.record(index)
+        return None
+
+    def autocomplete(self, prefix: str, limit: int = 10) -> List[Dict]:
+        """
+        Titles starting with `prefix` (case-insensitive), in alphabetical order.
+
+        Args:
+            prefix: Beginning of the title
+            limit: Maximum number of matches
+
+        Returns:
+            {id, title, release_year, content_type} per match
+        """
+        prefix = prefix.strip().casefold()
+        if not prefix or not settings.CATALOG_ENABLED:
+            return []
+        recent = self._recent  # Replaced, not cleared, by a refresh
+        matches: Dict[int, Tuple[str, Optional[int], str]] = {}
+        for number, record in list(recent.items()):
+            if record["title"].casefold().startswith(prefix):
+                matches[number] = (record["title"], record.get("release_year"), record["content_type"])
+        if self._base is not None:
+            base = self._base
+            taken = 0
+            for index in base.prefix_range(prefix):
+                if taken >= limit:
+                    break
+                number = base.ids[index]
+                # Appended records supersede the base file's copy
+                if number not in recent:
+                    matches[number] = (base.title(index), base.years[index] or None, KINDS[base.kinds[index]])
+                    taken += 1
+        ranked = sorted(matches.items(), key=lambda item: item[1][0].casefold())
+        return [
+            {"id": f"tt{number:07d}", "title": title, "release_year": year, "content_type": kind}
+            for number, (title, year, kind) in ranked[:limit]
+        ]
+
+    def append(self, details: Dict):
+        """
+        Record details fetched from OMDb, unless the catalog already has them unchanged (blocking).
+
+        Args:
+            details: Result of get_movie_details or get_tv_show_details
+        """
+        if not settings.CATALOG_ENABLED:
+            return
+        record = _record(details)
+        if record is None:
+            return
+        stored = self.get(record["id"])
+        if stored is not None and _same(stored, record):
+            return
+        line = (json.dumps(record, separators=(",", ":")) + "\n").encode("utf-8")
+        try:
+            if self._log_fd is None or self._log_fd_pid != os.getpid():
+                self.directory.mkdir(parents=True, exist_ok=True)
+                self._log_fd = os.open(self.log_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+                self._log_fd_pid = os.getpid()
+            # Shared with other appenders; a running compaction holds it exclusively
+            lock = self._lock(fcntl.LOCK_SH | fcntl.LOCK_NB)
+            try:
+                if os.fstat(self._log_fd).st_ino != os.stat(self.log_path).st_ino:
+                    os.close(self._log_fd)
+                    self._log_fd = os.open(self.log_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+                os.write(self._log_fd, line)
+            finally:
+                os.close(lock)
+        except BlockingIOError:
+            # Compacting: keep the record in this worker only rather than wait for it
+            pass
+        except OSError as e:
+            logger.warning(f"⚠️ Could not append to the OMDb catalog: {e}")
+            return
+        with self._state_lock:
+            self._remember(imdb_number(record["id"]), record)
+
+    def compact(self, wait: bool = True) -> Optional[Dict[str, int]]:
+        """
+        Merge the append log into a new base file (blocking).
+
+        Args:
+            wait: Wait for appends and other compactions; if False, give up instead
+
+        Returns:
+            Record count and sizes of the new base file, or None if it gave up
+        """
+        try:
+            lock = self._lock(fcntl.LOCK_EX if wait else fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return None
+        try:
+            merged: Dict[int, Dict] = {}
+            if self.base_path.exists():
+                merged = {imdb_number(r["id"]): r for r in _BaseFile(self.base_path).records()}
+            appended = 0
+            if self.log_path.exists():
+                with open(self.log_path, "rb") as f:
+                    for line in f:
+                        try:
+                            record = _record(json.loads(line))
+                        except ValueError:
+                            continue
+                        if record is not None:
+                            merged[imdb_number(record["id"])] = record
+                            appended += 1
+            write_base(self.base_path, list(merged.values()))
+            # After the rename: a reader that sees the empty log also sees the new base
+            with open(self.log_path, "wb"):
+                pass
+        finally:
+            os.close(lock)
+        self.refresh(force=True)
+        return {"records": len(merged), "appended": appended, "bytes": self.nbytes}
+
+    async def run_worker(self):
+        """Refresh (and compact when due) now and every CATALOG_REFRESH_SECONDS."""
+        while True:
+            try:
+                result = await executors.run_blocking(self.maintain)
+                if result is not None:
+                    logger.info(f"🗜️ Catalog compacted: {result['records']} titles ({result['appended']} appended)")
+            except Exception as e:
+                logger.error(f"❌ Catalog refresh failed: {e}")
+            await asyncio.sleep(settings.CATALOG_REFRESH_SECONDS)
+
+    def start(self):
+        """Start the refresher on the running event loop (when CATALOG_ENABLED)."""
+        if settings.CATALOG_ENABLED and self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self.run_worker())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        self.refresh()
+        base = self._base
+        return {
+            "records": base.count if base is not None else 0,
+            "recent": len(self._recent),
+            "genres": base.genre_vocabulary if base is not None else [],
+            "bytes": self.nbytes,
+        }
+
+
+catalog = OMDbCatalog()
+
+
+@shared_cache("omdb_catalog")
+def mapped_catalog() -> OMDbCatalog:
+    """The catalog with its base file mapped, inherited by forked workers."""
+    return catalog.open()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    command = sys.argv[1] if len(sys.argv) > 1 else "stats"
+    if command == "compact":
+        result = catalog.compact()
+        print(f"✅ Catalog compacted: {result['records']} titles ({result['appended']} appended), {result['bytes']} bytes")
+    elif command == "stats":
+        print(json.dumps(catalog.stats(), indent=2))
+    else:
+        sys.exit("Usage: python -m app.services.catalog [compact|stats]")
@@ -0,0 +1,129 @@
+"""
+Change feed over the collection.
+
+Every insert and update stamps `movies.change_version` with the ID of the
+writing transaction, and deletes leave a tombstone in `movie_deletions`.
+Transaction IDs are assigned when a transaction starts but become visible
+when it commits, so the version handed back to clients is the oldest
+transaction still in progress (`pg_snapshot_xmin`): everything below it is
+settled. Rows at or above it may be sent again next time, which is harmless
+because applying an upsert or delete twice has the same result.
+
+Tombstones are kept for CHANGE_FEED_RETENTION_DAYS; housekeeping prunes older
+ones and records the newest it removed in `change_feed_horizon`. A client
+whose last sync is at or before that horizon may have missed a delete, so it
+gets `reset` instead of a delta.
+"""
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional
+
+from sqlalchemy import func, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models import ChangeFeedHorizon, Movie, MovieDeletion
+
+
+class ChangeFeed:
+    """Rows created, updated or deleted since a version or timestamp."""
+
+    # Beyond this many changes, a full reload is cheaper than a delta
+    MAX_CHANGES = 1000
+
+    def current_version(self, db: Session) -> int:
+        """Version below which every change has committed."""
+        return db.execute(text("SELECT pg_snapshot_xmin(pg_current_snapshot())::text::bigint")).scalar()
+
+    def changes_since(
+        self,
+        db: Session,
+        version: Optional[int] = None,
+        since_time: Optional[datetime] = None
+    ) -> Dict:
+        """
+        Collect changes after `version` (preferred) or `since_time`.
+
+        Args:
+            db: Database session
+            version: `version` from a previous response
+            since_time: Fallback for clients without a version (updated_at based)
+
+        Returns:
+            Dictionary with the new version, upserted Movie rows, deleted IDs
+            and `reset` when there are too many changes and the client should
+            reload the whole collection instead
+        """
+        # Taken before reading rows, so nothing committed after this point is skipped
+        current = self.current_version(db)
+        result = {"version": current, "reset": False, "upserts": [], "deletes": []}
+        if version is None and since_time is None:
+            return result
+
+        movies = db.query(Movie)
+        deletions = db.query(MovieDeletion.movie_id)
+        if version is not None:
+            movies = movies.filter(Movie.change_version >= version).order_by(Movie.change_version, Movie.id)
+            deletions = deletions.filter(MovieDeletion.change_version >= version).order_by(MovieDeletion.change_version)
+        else:
+            movies = movies.filter(Movie.updated_at >= since_time).order_by(Movie.updated_at, Movie.id)
+            deletions = deletions.filter(MovieDeletion.deleted_at >= since_time).order_by(MovieDeletion.deleted_at)
+
+        upserts = movies.limit(self.MAX_CHANGES + 1).all()
+        deleted_ids = [movie_id for (movie_id,) in deletions.limit(self.MAX_CHANGES + 1)]
+        # Read after the tombstones: a prune committed in between shows up here
+        if len(upserts) + len(deleted_ids) > self.MAX_CHANGES or self.is_behind(db, version, since_time):
+            result["reset"] = True
+            return result
+
+        result["upserts"] = upserts
+        result["deletes"] = sorted(set(deleted_ids))
+        return result
+
+    def is_behind(self, db: Session, version: Optional[int] = None, since_time: Optional[datetime] = None) -> bool:
+        """Whether tombstones after `version` or `since_time` have been pruned."""
+        horizon = db.get(ChangeFeedHorizon, 1)
+        if horizon is None:
+            return False
+        if version is not None:
+            return version <= horizon.pruned_version
+        return since_time is not None and since_time <= horizon.pruned_at
+
+    def prune(self) -> int:
+        """
+        Delete tombstones older than CHANGE_FEED_RETENTION_DAYS and move the horizon past them.
+
+        Returns:
+            Number of tombstones removed
+        """
+        cutoff = datetime.now(timezone.utc) - timedelta(days=settings.CHANGE_FEED_RETENTION_DAYS)
+        db = SessionLocal()
+        try:
+            pruned = db.execute(
+                MovieDeletion.__table__.delete()
+                .where(MovieDeletion.deleted_at < cutoff)
+                .returning(MovieDeletion.change_version, MovieDeletion.deleted_at)
+            ).all()
+            if pruned:
+                # In the same transaction as the delete, so no reader sees one without the other
+                statement = insert(ChangeFeedHorizon).values(
+                    id=1,
+                    pruned_version=max(row.change_version for row in pruned),
+                    pruned_at=max(row.deleted_at for row in pruned)
+                )
+                db.execute(statement.on_conflict_do_update(
+                    index_elements=[ChangeFeedHorizon.id],
+                    set_={
+                        "pruned_version": func.greatest(ChangeFeedHorizon.pruned_version, statement.excluded.pruned_version),
+                        "pruned_at": func.greatest(ChangeFeedHorizon.pruned_at, statement.excluded.pruned_at),
+                    }
+                ))
+            db.commit()
+            return len(pruned)
+        finally:
+            db.close()
+
+
+# Create a singleton instance
+change_feed = ChangeFeed()
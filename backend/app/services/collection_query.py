@@ -0,0 +1,226 @@
+"""
+Faceted collection queries.
+
+Filters on the faceted dimensions (content type, status, platform, genre,
+favorite) combine with AND across dimensions and OR within one. Facet counts
+follow the usual drill-down rule: a dimension's counts apply every filter
+except its own, so the other values of a selected facet stay visible.
+
+All facets and the total come from one GROUPING SETS query. Each title
+appears once with genre ALL_GENRES (counted by the non-genre facets) and once
+per genre in its comma-separated list (counted by the genre facet).
+"""
+from dataclasses import dataclass, field
+import re
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import and_, func, or_, true, tuple_
+from sqlalchemy.orm import Session
+
+from app.models.analytics import ALL_GENRES
+from app.models.movie import ContentType, Movie, Platform, WatchStatus
+
+# Sort keys accepted by `sort` (prefix with "-" for descending)
+SORT_FIELDS = {
+    "created_at": Movie.created_at,
+    "updated_at": Movie.updated_at,
+    "watched_at": Movie.watched_at,
+    "title": func.lower(Movie.title),
+    "release_year": Movie.release_year,
+    "user_rating": Movie.user_rating,
+    "tmdb_rating": Movie.tmdb_rating,
+    "duration": Movie.duration,
+}
+
+FACETS = ("content_type", "status", "platform", "genre", "favorite")
+
+
+@dataclass
+class MovieFilters:
+    """Filters of a collection query; empty lists and None mean "any"."""
+
+    content_type: List[ContentType] = field(default_factory=list)
+    status: List[WatchStatus] = field(default_factory=list)
+    platform: List[Platform] = field(default_factory=list)
+    genre: List[str] = field(default_factory=list)
+    favorite: Optional[bool] = None
+    year_min: Optional[int] = None
+    year_max: Optional[int] = None
+    rating_min: Optional[float] = None
+    rating_max: Optional[float] = None
+    q: Optional[str] = None
+
+
+def parse_sort(sort: str) -> List:
+    """
+    Turn "-user_rating,title" into ORDER BY clauses (NULLs last, ID as tiebreaker).
+
+    Raises:
+        ValueError: For unknown sort keys
+    """
+    clauses = []
+    for key in filter(None, (part.strip() for part in sort.split(","))):
+        descending = key.startswith("-")
+        name = key.lstrip("-+")
+        if name not in SORT_FIELDS:
+            raise ValueError(f"Unknown sort key '{name}'. Use one of: {', '.join(SORT_FIELDS)}")
+        column = SORT_FIELDS[name]
+        clauses.append((column.desc() if descending else column.asc()).nulls_last())
+    clauses.append(Movie.id.desc())
+    return clauses
+
+
+class CollectionQuery:
+    """Filtered, sorted and faceted reads of the collection."""
+
+    def _facet_conditions(self, filters: MovieFilters) -> Dict:
+        """One condition per faceted dimension (true() when unfiltered)."""
+        conditions = {name: true() for name in FACETS}
+        if filters.content_type:
+            conditions["content_type"] = Movie.content_type.in_(filters.content_type)
+        if filters.status:
+            conditions["status"] = Movie.status.in_(filters.status)
+        if filters.platform:
+            conditions["platform"] = Movie.platform.in_(filters.platform)
+        if filters.genre:
+            # Whole entries of the comma-separated list, case-insensitively
+            names = "|".join(re.escape(name.strip()) for name in filters.genre)
+            conditions["genre"] = Movie.genre.regexp_match(rf"(^|,)\s*({names})\s*(,|$)", flags="i")
+        if filters.favorite is not None:
+            conditions["favorite"] = func.coalesce(Movie.is_favorite, False) == filters.favorite
+        return conditions
+
+    def _common_conditions(self, filters: MovieFilters) -> List:
+        """Range and text filters, which have no facet."""
+        conditions = []
+        if filters.year_min is not None:
+            conditions.append(Movie.release_year >= filters.year_min)
+        if filters.year_max is not None:
+            conditions.append(Movie.release_year <= filters.year_max)
+        if filters.rating_min is not None:
+            conditions.append(Movie.user_rating >= filters.rating_min)
+        if filters.rating_max is not None:
+            conditions.append(Movie.user_rating <= filters.rating_max)
+        if filters.q:
+            pattern = f"%{filters.q}%"
+            conditions.append(or_(
+                Movie.title.ilike(pattern),
+                Movie.genre.ilike(pattern),
+                Movie.director.ilike(pattern)
+            ))
+        return conditions
+
+    def facets(self, db: Session, filters: MovieFilters) -> Tuple[int, Dict[str, List[Dict]]]:
+        """
+        Count titles per facet value in one pass.
+
+        Returns:
+            Total matching every filter, and per facet a list of {value, count}
+            (most common first; values with no matches are left out)
+        """
+        conditions = self._facet_conditions(filters)
+
+        def all_but(name: Optional[str]):
+            return and_(*(condition for other, condition in conditions.items() if other != name))
+
+        genres = func.unnest(
+            func.array_prepend(ALL_GENRES, func.string_to_array(Movie.genre, ","))
+        ).table_valued("name").alias("genres")
+        genre = func.btrim(genres.c.name)
+        per_title = genre == ALL_GENRES
+        favorite = func.coalesce(Movie.is_favorite, False)
+
+        dimensions = {
+            "content_type": Movie.content_type,
+            "status": Movie.status,
+            "platform": Movie.platform,
+            "genre": genre,
+            "favorite": favorite,
+        }
+        counts = {
+            name: func.count().filter(and_(per_title, all_but(name)))
+            for name in FACETS if name != "genre"
+        }
+        # A title listing a genre twice still counts once
+        counts["genre"] = func.count(Movie.id.distinct()).filter(
+            and_(~per_title, genre != "", all_but("genre"))
+        )
+
+        # One set per facet, plus () for the total
+        grouping_sets = func.grouping_sets(*(dimensions[name] for name in FACETS), tuple_())
+        rows = (
+            db.query(
+                func.grouping(*dimensions.values()).label("grouping"),
+                *(column.label(name) for name, column in dimensions.items()),
+                *(count.label(f"{name}_count") for name, count in counts.items()),
+                func.count().filter(and_(per_title, all_but(None))).label("total"),
+            )
+            .select_from(Movie)
+            .join(genres, true())
+            .filter(*self._common_conditions(filters))
+            .group_by(grouping_sets)
+            .all()
+        )
+
+        total = 0
+        facets: Dict[str, List[Dict]] = {name: [] for name in FACETS}
+        all_grouped = (1 << len(FACETS)) - 1
+        for row in rows:
+            if row.grouping == all_grouped:
+                total = row.total
+                continue
+            # grouping() has a 0 bit for the one dimension this row is grouped by
+            name = next(
+                name for i, name in enumerate(FACETS)
+                if not row.grouping & (1 << (len(FACETS) - 1 - i))
+            )
+            count = getattr(row, f"{name}_count")
+            if count:
+                facets[name].append({"value": getattr(row, name), "count": count})
+
+        for values in facets.values():
+            values.sort(key=lambda facet: (-facet["count"], str(facet["value"])))
+        return total, facets
+
+    def search(
+        self,
+        db: Session,
+        filters: MovieFilters,
+        sort: str = "-created_at",
+        skip: int = 0,
+        limit: int = 50,
+        with_facets: bool = True
+    ) -> Dict:
+        """
+        Run a collection query.
+
+        Args:
+            db: Database session
+            filters: Filters to apply
+            sort: Comma-separated sort keys (see SORT_FIELDS), "-" for descending
+            skip: Number of matching titles to skip
+            limit: Maximum number of titles to return
+            with_facets: Also compute facet counts
+
+        Returns:
+            Dictionary with total, items (Movie rows) and facets
+
+        Raises:
+            ValueError: For unknown sort keys
+        """
+        order_by = parse_sort(sort)
+        query = db.query(Movie).filter(
+            *self._facet_conditions(filters).values(),
+            *self._common_conditions(filters)
+        )
+        items = query.order_by(*order_by).offset(skip).limit(limit).all()
+
+        if with_facets:
+            total, facets = self.facets(db, filters)
+        else:
+            total, facets = query.order_by(None).count(), {}
+        return {"total": total, "items": items, "facets": facets}
+
+
+# Create a singleton instance
+collection_query = CollectionQuery()
@@ -0,0 +1,171 @@
+"""
+Compact, per-process copy of the columns whole-collection computations read.
+
+Recommendations (and the prefetcher's duplicate filter) look at every title
+but only at a handful of columns. Loading them as Movie ORM instances pays
+for every Text column, an identity map entry and instance state per row.
+`collection_snapshot.records(db)` instead returns `MovieRecord`s, slotted
+objects built from a column-restricted query, and keeps them between calls.
+
+The snapshot is brought up to date through the change feed before each use:
+rows whose change_version is at or above the version it was loaded at are
+re-read and tombstones in movie_deletions drop rows, so writes made by any
+worker are picked up. When nothing changed that costs three index lookups.
+A snapshot older than the change feed's retention is reloaded.
+
+`collection_snapshot.state(db)` also tells callers what changed: a
+`generation` that moves whenever the records do (to cache values derived
+from them) and the newest change_version applied (to compare against a
+version stored alongside derived data).
+"""
+from typing import Dict, List, NamedTuple, Optional, Tuple
+import logging
+import threading
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.models import Movie, MovieDeletion
+from app.services.changes import change_feed
+
+logger = logging.getLogger(__name__)
+
+
+class MovieRecord:
+    """The columns of a Movie that whole-collection computations read."""
+
+    __slots__ = (
+        "id", "title", "content_type", "genre", "director", "cast", "release_year",
+        "description", "status", "user_rating", "tmdb_id",
+    )
+
+    def __init__(self, *values):
+        for name, value in zip(self.__slots__, values):
+            setattr(self, name, value)
+
+    def __repr__(self) -> str:
+        return f"<MovieRecord {self.id} {self.title!r}>"
+
+
+RECORD_COLUMNS = [getattr(Movie, name) for name in MovieRecord.__slots__]
+
+
+class CollectionState(NamedTuple):
+    """The snapshot's records and what identifies their contents."""
+
+    records: List[MovieRecord]
+    # Increases whenever the records change, in this process
+    generation: int
+    # Newest change_version (insert, update or delete) the records reflect
+    last_change: int
+
+
+class CollectionSnapshot:
+    """The whole collection as MovieRecords, kept current through the change feed."""
+
+    # More changes than this (or a tenth of the collection) and a full reload is cheaper
+    MAX_DELTA = 1000
+
+    def __init__(self):
+        self._records: Dict[int, MovieRecord] = {}  # In ID order
+        self._ordered: List[MovieRecord] = []
+        self._version: Optional[int] = None
+        self._generation = 0
+        self._last_change = 0
+        self._lock = threading.Lock()
+
+    def _load(self, db: Session, since: Optional[int] = None, limit: Optional[int] = None) -> Tuple[List[MovieRecord], int]:
+        """Records in ID order and the newest change_version among them (0 when there are none)."""
+        query = db.query(*RECORD_COLUMNS, Movie.change_version)
+        if since is not None:
+            query = query.filter(Movie.change_version >= since)
+        records = []
+        newest = 0
+        for row in query.order_by(Movie.id).limit(limit):
+            records.append(MovieRecord(*row[:-1]))
+            newest = max(newest, row[-1])
+        return records, newest
+
+    def _reload(self, db: Session):
+        self._ordered, newest = self._load(db)
+        self._records = {record.id: record for record in self._ordered}
+        last_deletion = db.query(func.max(MovieDeletion.change_version)).scalar() or 0
+        self._last_change = max(newest, last_deletion)
+        self._generation += 1
+        logger.info(f"📸 Loaded a snapshot of {len(self._records)} titles")
+
+    def _catch_up(self, db: Session) -> bool:
+        """Apply changes since the snapshot's version; False when there are too many or some were pruned."""
+        limit = max(self.MAX_DELTA, len(self._records) // 10)
+        tombstones = (
+            db.query(MovieDeletion.movie_id, MovieDeletion.change_version)
+            .filter(MovieDeletion.change_version >= self._version)
+            .limit(limit + 1)
+            .all()
+        )
+        if len(tombstones) > limit:
+            return False
+        deleted = [movie_id for movie_id, _ in tombstones]
+        changed, newest = self._load(db, since=self._version, limit=limit + 1)
+        if len(changed) + len(deleted) > limit or change_feed.is_behind(db, self._version):
+            return False
+        if not changed and not any(movie_id in self._records for movie_id in deleted):
+            return True
+
+        last_id = self._ordered[-1].id if self._ordered else 0
+        for movie_id in deleted:
+            self._records.pop(movie_id, None)
+        reordered = False
+        for record in changed:
+            # New titles usually have higher IDs than any loaded so far, which keeps ID order
+            reordered |= record.id < last_id and record.id not in self._records
+            self._records[record.id] = record
+        if reordered:
+            self._records = dict(sorted(self._records.items()))
+        self._ordered = list(self._records.values())
+        self._last_change = max(self._last_change, newest, *(version for _, version in tombstones))
+        self._generation += 1
+        return True
+
+    def state(self, db: Session) -> CollectionState:
+        """
+        Bring the snapshot up to date and describe it.
+
+        Args:
+            db: Database session
+
+        Returns:
+            The records with their generation and newest change_version
+        """
+        with self._lock:
+            # Taken before reading rows, so nothing committed after this point is skipped
+            current = change_feed.current_version(db)
+            if self._version is None or not self._catch_up(db):
+                self._reload(db)
+            self._version = current
+            return CollectionState(self._ordered, self._generation, self._last_change)
+
+    def records(self, db: Session) -> List[MovieRecord]:
+        """
+        Get every title in the collection.
+
+        Args:
+            db: Database session
+
+        Returns:
+            MovieRecords in ID order. Treat them (and the list) as read-only;
+            they are shared with other callers in this process.
+        """
+        return self.state(db).records
+
+    def invalidate(self):
+        """Drop the snapshot; the next call reloads it."""
+        with self._lock:
+            self._records = {}
+            self._ordered = []
+            self._version = None
+            self._last_change = 0
+
+
+# Create singleton instance
+collection_snapshot = CollectionSnapshot()
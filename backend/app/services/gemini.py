@@ -1,22 +1,109 @@
+import asyncio
+import hashlib
+import json
 import httpx
-from typing import Optional
+import logging
+from typing import AsyncIterator, Dict, List, Optional
+from app import deadline, executors
 from app.config import settings
+from app.metrics import UPSTREAM_ERRORS
+from app.services.resilience import gemini_upstream
+from app.services.review_cache import review_cache
+
+logger = logging.getLogger(__name__)
+
+# Result handed to coalesced followers when the leading request was cancelled: generate again
+_RETRY = object()
+
+
+class _StreamBroadcast:
+    """Chunks of one streamed generation, replayed to every request following it."""
+    
+    def __init__(self):
+        self.chunks: List[str] = []
+        self.finished = False
+        self.error: Optional[BaseException] = None
+        self.readers = 0
+        self.task: Optional[asyncio.Task] = None
+        # Replaced after every change; followers wait on the one they last saw
+        self.changed = asyncio.Event()
+    
+    def _notify(self):
+        self.changed.set()
+        self.changed = asyncio.Event()
+    
+    def publish(self, text: str):
+        self.chunks.append(text)
+        self._notify()
+    
+    def finish(self, error: Optional[BaseException] = None):
+        if not self.finished:
+            self.finished = True
+            self.error = error
+            self._notify()
 
 
 class GeminiService:
     """Service for interacting with Google Gemini API."""
     
     # Use v1beta API with gemini-2.0-flash
-    BASE_URL = "https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash:generateContent"
+    BASE_URL = f"{settings.GEMINI_BASE_URL}:generateContent"
+    STREAM_URL = f"{settings.GEMINI_BASE_URL}:streamGenerateContent"
+    
+    GENERATION_CONFIG = {
+        "temperature": 0.7,
+        "maxOutputTokens": 150,
+        "topP": 0.8,
+        "topK": 40
+    }
     
     def __init__(self):
         self.api_key = settings.GEMINI_API_KEY
         self.client = httpx.AsyncClient(timeout=30.0)
+        # In-flight generations by cache key, so identical concurrent requests share one call
+        self._inflight: Dict[str, asyncio.Future] = {}
+        # In-flight streamed generations by cache key, followed by every identical stream request
+        self._inflight_streams: Dict[str, _StreamBroadcast] = {}
+        # Caps concurrent Gemini calls from this worker (e.g. during batch generation)
+        self._concurrency = asyncio.Semaphore(settings.GEMINI_MAX_CONCURRENCY)
     
     async def close(self):
         """Close the HTTP client."""
         await self.client.aclose()
     
+    def build_payload(
+        self,
+        movie_title: str,
+        movie_overview: str,
+        user_comments: str,
+        user_rating: Optional[float] = None
+    ) -> Dict:
+        """Render the review prompt into a Gemini request payload."""
+        rating_text = f"rated {user_rating}/10" if user_rating else "watched"
+        
+        prompt = f"""You are a movie review assistant. Based on the following information, generate a SHORT, engaging review summary (2-3 sentences maximum) that captures the user's perspective.
+
+Movie: {movie_title}
+Plot: {movie_overview}
+User's thoughts: {user_comments}
+User {rating_text}
+
+Generate a natural, conversational review summary that combines the plot context with the user's personal opinion. Keep it concise and engaging."""
+
+        return {
+            "contents": [{
+                "parts": [{
+                    "text": prompt
+                }]
+            }],
+            "generationConfig": self.GENERATION_CONFIG
+        }
+    
+    def cache_key(self, payload: Dict) -> str:
+        """Content address of a request: model endpoint plus rendered prompt and config."""
+        canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(f"{self.BASE_URL}\n{canonical}".encode("utf-8")).hexdigest()
+    
     async def generate_review_summary(
         self,
         movie_title: str,
@@ -27,6 +114,9 @@ class GeminiService:
         """
         Generate a concise review summary using Gemini AI.
         
+        Identical requests are answered from the review cache, and concurrent
+        identical requests share a single Gemini call.
+        
         Args:
             movie_title: Title of the movie
             movie_overview: Movie plot/overview
@@ -36,34 +126,174 @@ class GeminiService:
         Returns:
             Generated review summary or None if failed
         """
-        try:
-            
-            rating_text = f"rated {user_rating}/10" if user_rating else "watched"
+        payload = self.build_payload(movie_title, movie_overview, user_comments, user_rating)
+        key = self.cache_key(payload)
+        
+        while True:
+            inflight = self._inflight.get(key)
+            if inflight is not None:
+                review_cache.record_coalesced()
+                result = await asyncio.shield(inflight)
+                if result is _RETRY:
+                    continue  # The leader's client went away; lead (or join whoever does) instead
+                return result
             
-            prompt = f"""You are a movie review assistant. Based on the following information, generate a SHORT, engaging review summary (2-3 sentences maximum) that captures the user's perspective.
-
-Movie: {movie_title}
-Plot: {movie_overview}
-User's thoughts: {user_comments}
-User {rating_text}
-
-Generate a natural, conversational review summary that combines the plot context with the user's personal opinion. Keep it concise and engaging."""
-
-            payload = {
-                "contents": [{
-                    "parts": [{
-                        "text": prompt
-                    }]
-                }],
-                "generationConfig": {
-                    "temperature": 0.7,
-                    "maxOutputTokens": 150,
-                    "topP": 0.8,
-                    "topK": 40
-                }
-            }
+            cached = await executors.run_blocking(review_cache.get, key)
+            if cached is not None:
+                logger.info(f"✅ Gemini cache hit: {key[:12]}")
+                return cached
+            if key not in self._inflight:
+                break
+            # Another request started generating while this one checked the cache
+        
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            async with self._concurrency:
+                generated_text = await self._generate(payload)
+            future.set_result(generated_text)
+            if generated_text:
+                await executors.run_blocking(review_cache.set, key, generated_text)
+            return generated_text
+        except asyncio.CancelledError:
+            # Only this request was cancelled; followers still want a review
+            if not future.done():
+                future.set_result(_RETRY)
+            raise
+        except Exception as e:
+            if not future.done():
+                future.set_exception(e)
+                # Followers re-raise it; mark retrieved so an unwatched future doesn't warn
+                future.exception()
+            raise
+        finally:
+            self._inflight.pop(key, None)
+    
+    async def stream_review_summary(
+        self,
+        movie_title: str,
+        movie_overview: str,
+        user_comments: str,
+        user_rating: Optional[float] = None
+    ) -> AsyncIterator[str]:
+        """
+        Generate a review summary, yielding text chunks as Gemini produces them.
+        
+        A cached review is yielded as a single chunk. A completed stream is
+        stored in the same cache as generate_review_summary.
+        
+        The upstream body is read by a background task (see _pump_stream), so
+        a slow client doesn't hold one of the GEMINI_MAX_CONCURRENCY slots, and
+        concurrent identical requests follow the same upstream stream. Once
+        every request following it has closed its generator (e.g. clients
+        disconnected), the upstream connection is closed and the partial text
+        isn't cached.
+        """
+        payload = self.build_payload(movie_title, movie_overview, user_comments, user_rating)
+        key = self.cache_key(payload)
+        
+        if key not in self._inflight_streams:
+            cached = await executors.run_blocking(review_cache.get, key)
+            if cached is not None:
+                logger.info(f"✅ Gemini cache hit: {key[:12]}")
+                yield cached
+                return
+        
+        # Checked again: another request may have started streaming while this one read the cache
+        broadcast = self._inflight_streams.get(key)
+        if broadcast is None:
+            broadcast = self._inflight_streams[key] = _StreamBroadcast()
+            broadcast.task = asyncio.create_task(self._pump_stream(key, payload, broadcast))
+        else:
+            review_cache.record_coalesced()
+        
+        broadcast.readers += 1
+        position = 0
+        try:
+            while True:
+                changed = broadcast.changed
+                while position < len(broadcast.chunks):
+                    yield broadcast.chunks[position]
+                    position += 1
+                if broadcast.finished:
+                    if broadcast.error is not None:
+                        raise broadcast.error
+                    return
+                await changed.wait()
+        finally:
+            broadcast.readers -= 1
+            if broadcast.readers == 0 and not broadcast.finished:
+                # Nobody is listening any more: close the upstream connection, and
+                # let the next identical request start a stream of its own
+                if self._inflight_streams.get(key) is broadcast:
+                    del self._inflight_streams[key]
+                broadcast.task.cancel()
+    
+    async def _pump_stream(self, key: str, payload: Dict, broadcast: "_StreamBroadcast"):
+        """Read one streamed generation into `broadcast`, then cache the text if it completed."""
+        try:
+            async with self._concurrency:
+                # Streams aren't retried (tokens may already have been relayed), but still
+                # respect the rate limit and circuit breaker
+                await gemini_upstream.acquire()
+                # Bound connect and per-chunk waits by whatever is left of the request budget
+                options = {}
+                if deadline.remaining() is not None:
+                    options["timeout"] = deadline.timeout(self.client.timeout.read or 30.0, "Gemini stream")
+                try:
+                    async with self.client.stream(
+                        "POST",
+                        self.STREAM_URL,
+                        params={"alt": "sse", "key": self.api_key},
+                        json=payload,
+                        headers={"Content-Type": "application/json"},
+                        **options
+                    ) as response:
+                        if response.status_code != 200:
+                            gemini_upstream.record_response(response)
+                            error_body = (await response.aread()).decode("utf-8", errors="replace")
+                            logger.error(f"❌ Gemini API Error (Status {response.status_code}): {error_body}")
+                            response.raise_for_status()
+                        
+                        async for line in response.aiter_lines():
+                            # Server-sent events: each "data:" line holds one partial GenerateContentResponse
+                            if not line.startswith("data:"):
+                                continue
+                            data = json.loads(line[len("data:"):])
+                            for candidate in data.get("candidates", [])[:1]:
+                                for part in candidate.get("content", {}).get("parts", []):
+                                    text = part.get("text")
+                                    if text:
+                                        broadcast.publish(text)
+                        # Recorded once the whole body arrived; a transport error mid-stream is the failure instead
+                        gemini_upstream.record_response(response)
+                except httpx.TransportError:
+                    UPSTREAM_ERRORS.labels(upstream=gemini_upstream.name, kind="transport").inc()
+                    gemini_upstream.record_failure()
+                    raise
+            # The slot is free again before the followers have relayed everything
+            broadcast.finish()
             
-            response = await self.client.post(
+            generated_text = "".join(broadcast.chunks).strip()
+            if generated_text:
+                logger.info(f"✅ Gemini API Success: Streamed {len(generated_text)} characters")
+                await executors.run_blocking(review_cache.set, key, generated_text)
+        except asyncio.CancelledError:
+            broadcast.finish(asyncio.CancelledError())
+            raise
+        except Exception as e:
+            # Raised by every request following the stream
+            broadcast.finish(e)
+        finally:
+            if self._inflight_streams.get(key) is broadcast:
+                del self._inflight_streams[key]
+    
+    async def _generate(self, payload: Dict) -> Optional[str]:
+        """Send a rendered payload to Gemini and return the generated text."""
+        try:
+            response = await gemini_upstream.request(
+                self.client,
+                "POST",
                 f"{self.BASE_URL}?key={self.api_key}",
                 json=payload,
                 headers={"Content-Type": "application/json"}
@@ -72,7 +302,7 @@ Generate a natural, conversational review summary that combines the plot context
             # Log detailed error if request fails
             if response.status_code != 200:
                 error_body = response.text
-                print(f"❌ Gemini API Error (Status {response.status_code}): {error_body}")
+                logger.error(f"❌ Gemini API Error (Status {response.status_code}): {error_body}")
                 response.raise_for_status()
             
             data = response.json()
@@ -81,19 +311,16 @@ Generate a natural, conversational review summary that combines the plot context
                 candidate = data["candidates"][0]
                 if candidate.get("content", {}).get("parts"):
                     generated_text = candidate["content"]["parts"][0].get("text", "").strip()
-                    print(f"✅ Gemini API Success: Generated {len(generated_text)} characters")
+                    logger.info(f"✅ Gemini API Success: Generated {len(generated_text)} characters")
                     return generated_text
             
-            print(f"⚠️ Gemini API returned no candidates: {data}")
+            logger.warning(f"⚠️ Gemini API returned no candidates: {data}")
             return None
             
         except httpx.HTTPStatusError as e:
-            print(f"❌ Gemini API HTTP Error: {e.response.status_code} - {e.response.text}")
+            logger.error(f"❌ Gemini API HTTP Error: {e.response.status_code} - {e.response.text}")
             raise
         except Exception as e:
-            print(f"❌ Error generating review with Gemini: {type(e).__name__}: {e}")
+            logger.error(f"❌ Error generating review with Gemini: {type(e).__name__}: {e}")
             raise
 
-
-# Create singleton instance
-gemini_service = GeminiService()
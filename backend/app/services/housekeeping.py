@@ -0,0 +1,73 @@
+"""
+Periodic clean-up of tables that would otherwise only grow.
+
+Every HOUSEKEEPING_INTERVAL_MINUTES each worker deletes expired review cache
+entries and change-feed tombstones older than CHANGE_FEED_RETENTION_DAYS.
+The deletes are idempotent, so workers running them at the same time only
+repeat a cheap indexed scan.
+
+    python -m app.services.housekeeping   # run once
+"""
+from typing import Dict, Optional
+import asyncio
+import logging
+
+from app import executors
+from app.config import settings
+from app.services.changes import change_feed
+from app.services.review_cache import review_cache
+
+logger = logging.getLogger(__name__)
+
+
+class Housekeeping:
+    """Runs the clean-up jobs on a timer."""
+
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+
+    def run_once(self) -> Dict[str, int]:
+        """
+        Run every clean-up job (blocking).
+
+        Returns:
+            Rows removed per job
+        """
+        return {
+            "review_cache": review_cache.purge_expired(),
+            "movie_deletions": change_feed.prune(),
+        }
+
+    async def run_worker(self):
+        """Run the clean-up jobs every HOUSEKEEPING_INTERVAL_MINUTES."""
+        while True:
+            await asyncio.sleep(settings.HOUSEKEEPING_INTERVAL_MINUTES * 60)
+            try:
+                removed = await executors.run_blocking(self.run_once)
+                if any(removed.values()):
+                    logger.info(f"🧹 Housekeeping removed {removed}")
+            except Exception as e:
+                logger.error(f"❌ Housekeeping failed: {e}")
+
+    def start(self):
+        """Start the timer on the running event loop."""
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self.run_worker())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+# Create a singleton instance
+housekeeping = Housekeeping()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    print(f"✅ Removed {housekeeping.run_once()}")
@@ -0,0 +1,245 @@
+"""
+Live collection updates.
+
+MovieCRUD write methods publish a compact event ({"op", "id", "version"})
+inside their transaction. With PostgreSQL the event is sent with
+pg_notify, so it is delivered only if the transaction commits and reaches
+every worker process: each worker keeps one LISTEN connection and fans
+events out to its own subscribers. Without PostgreSQL (or with
+LIVE_UPDATES_BACKEND=memory) events are fanned out in-process after commit,
+which is enough for a single worker.
+
+Each subscriber has a bounded buffer. A subscriber that falls behind has its
+buffer replaced by a single `resync` event instead of slowing down the
+publisher; clients then catch up through the change feed
+(GET /api/movies/changes).
+"""
+from typing import Any, Dict, List, Optional, Set
+import asyncio
+import json
+import logging
+
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+
+from app import executors
+from app.config import settings
+from app.database import SessionLocal, direct_engine, engine
+
+logger = logging.getLogger(__name__)
+
+# NOTIFY channel shared by all workers
+CHANNEL = "movie_changes"
+
+# Sent to subscribers that may have missed events
+RESYNC = {"op": "resync"}
+
+# Session.info key for events waiting for the commit (in-memory backend)
+PENDING_KEY = "live_update_events"
+
+NOTIFY_SQL = text(
+    "SELECT pg_notify(:channel, json_build_object("
+    "'op', CAST(:op AS text), 'id', CAST(:id AS bigint), "
+    "'version', pg_current_xact_id()::text::bigint)::text)"
+)
+
+# One notification per ID, in a single statement
+NOTIFY_MANY_SQL = text(
+    "SELECT pg_notify(:channel, json_build_object("
+    "'op', CAST(:op AS text), 'id', id, "
+    "'version', pg_current_xact_id()::text::bigint)::text) "
+    "FROM unnest(CAST(:ids AS bigint[])) AS id"
+)
+
+
+class Subscription:
+    """One connected client: a bounded buffer of pending events."""
+
+    def __init__(self, maxsize: int):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self.overflows = 0
+
+    def offer(self, change: Dict[str, Any]):
+        """Buffer an event; on overflow drop the backlog and ask the client to resync."""
+        try:
+            self.queue.put_nowait(change)
+        except asyncio.QueueFull:
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(RESYNC)
+            self.overflows += 1
+
+    async def next_batch(self, timeout: float) -> Optional[List[Dict[str, Any]]]:
+        """
+        Wait for events.
+
+        Returns:
+            Every buffered event (at least one), or None if none arrived within `timeout`
+        """
+        try:
+            first = await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+        batch = [first]
+        while not self.queue.empty():
+            batch.append(self.queue.get_nowait())
+        return batch
+
+
+class LiveUpdates:
+    """Publishes collection changes and fans them out to connected clients."""
+
+    def __init__(self):
+        self._subscribers: Set[Subscription] = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def backend(self) -> str:
+        """'postgres' (LISTEN/NOTIFY across workers) or 'memory' (this process only)."""
+        if settings.LIVE_UPDATES_BACKEND == "auto":
+            return "postgres" if engine.dialect.name == "postgresql" else "memory"
+        return settings.LIVE_UPDATES_BACKEND
+
+    def publish(self, db: Session, op: str, movie_id: int):
+        """
+        Announce a change as part of the current transaction.
+
+        Args:
+            db: Session holding the write; nothing is sent if it rolls back
+            op: "upsert" or "delete"
+            movie_id: ID of the changed row
+        """
+        if self.backend == "postgres":
+            db.execute(NOTIFY_SQL, {"channel": CHANNEL, "op": op, "id": movie_id})
+        else:
+            db.info.setdefault(PENDING_KEY, []).append({"op": op, "id": movie_id, "version": None})
+
+    def publish_many(self, db: Session, op: str, movie_ids: List[int]):
+        """Announce changes to several rows (bulk writes) as part of the current transaction."""
+        if not movie_ids:
+            return
+        if self.backend == "postgres":
+            db.execute(NOTIFY_MANY_SQL, {"channel": CHANNEL, "op": op, "ids": list(movie_ids)})
+        else:
+            db.info.setdefault(PENDING_KEY, []).extend(
+                {"op": op, "id": movie_id, "version": None} for movie_id in movie_ids
+            )
+
+    def subscribe(self) -> Optional[Subscription]:
+        """Register a client, or return None when this worker is at LIVE_UPDATES_MAX_CONNECTIONS."""
+        if len(self._subscribers) >= settings.LIVE_UPDATES_MAX_CONNECTIONS:
+            return None
+        subscription = Subscription(settings.LIVE_UPDATES_BUFFER)
+        self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        self._subscribers.discard(subscription)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": self.backend,
+            "listening": self._task is not None and not self._task.done(),
+            "subscribers": len(self._subscribers),
+            "overflows": sum(s.overflows for s in self._subscribers),
+        }
+
+    def broadcast(self, change: Dict[str, Any]):
+        """Hand an event to every subscriber of this process (event loop thread only)."""
+        for subscription in list(self._subscribers):
+            subscription.offer(change)
+
+    def dispatch_threadsafe(self, changes: List[Dict[str, Any]]):
+        """Broadcast from any thread (sync endpoints run in the threadpool)."""
+        if self._loop is None or self._loop.is_closed():
+            return  # No server running (CLI scripts, seeding)
+        for change in changes:
+            self._loop.call_soon_threadsafe(self.broadcast, change)
+
+    def _open_listener(self):
+        """Dedicated autocommit connection LISTENing on CHANNEL (blocking)."""
+        pooled = direct_engine.raw_connection()
+        pooled.detach()  # Lives outside the pool for the lifetime of the worker
+        conn = pooled.dbapi_connection
+        conn.autocommit = True
+        with conn.cursor() as cursor:
+            cursor.execute(f"LISTEN {CHANNEL}")
+        return conn
+
+    def _drain(self, conn, lost: asyncio.Future):
+        """Reader callback: broadcast every notification received on the LISTEN connection."""
+        try:
+            conn.poll()
+        except Exception as e:
+            if not lost.done():
+                lost.set_result(e)
+            return
+        while conn.notifies:
+            note = conn.notifies.pop(0)
+            try:
+                self.broadcast(json.loads(note.payload))
+            except ValueError:
+                logger.warning(f"⚠️ Ignoring malformed change notification: {note.payload!r}")
+
+    async def run_listener(self):
+        """Keep a LISTEN connection open, reconnecting after LIVE_UPDATES_RECONNECT_SECONDS."""
+        loop = asyncio.get_running_loop()
+        connected_before = False
+        while True:
+            try:
+                conn = await executors.run_blocking(self._open_listener)
+            except Exception as e:
+                logger.error(f"❌ Could not listen for collection changes: {e}")
+                await asyncio.sleep(settings.LIVE_UPDATES_RECONNECT_SECONDS)
+                continue
+
+            logger.info(f"📡 Listening for collection changes on '{CHANNEL}'")
+            if connected_before:
+                # Notifications sent while disconnected are lost
+                self.broadcast(RESYNC)
+            connected_before = True
+
+            lost = loop.create_future()
+            fd = conn.fileno()  # Not readable from the connection once it has failed
+            loop.add_reader(fd, self._drain, conn, lost)
+            try:
+                error = await lost
+                logger.warning(f"⚠️ Change listener connection lost: {error}")
+            finally:
+                loop.remove_reader(fd)
+                conn.close()
+            await asyncio.sleep(settings.LIVE_UPDATES_RECONNECT_SECONDS)
+
+    def start(self):
+        """Start fanning out events on the running event loop."""
+        self._loop = asyncio.get_running_loop()
+        if self.backend == "postgres" and self._task is None:
+            self._task = self._loop.create_task(self.run_listener())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._loop = None
+
+
+# Create a singleton instance
+live_updates = LiveUpdates()
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def dispatch_committed_events(session):
+    """In-memory backend: deliver the events of a committed transaction."""
+    changes = session.info.pop(PENDING_KEY, None)
+    if changes:
+        live_updates.dispatch_threadsafe(changes)
+
+
+@event.listens_for(SessionLocal, "after_soft_rollback")
+def discard_rolled_back_events(session, previous_transaction):
+    session.info.pop(PENDING_KEY, None)
@@ -0,0 +1,390 @@
+"""
+Scheduled refresh of the OMDb metadata stored with collection titles.
+
+Ratings, posters, plots and season counts are copied from OMDb when a title
+is added. A refresh run visits the titles whose metadata is older than
+METADATA_REFRESH_MAX_AGE_DAYS in ID order, fetches them concurrently through
+the shared OMDb rate limiter and writes back only the fields that changed:
+one UPDATE per batch and set of changed fields. Changed rows get a new
+change_version and a live update event; titles whose metadata is unchanged
+are only stamped as refreshed.
+
+The run's position is checkpointed after every batch (metadata_refresh_runs),
+so a run stopped by a restart, an OMDb outage or METADATA_REFRESH_DAILY_QUOTA
+resumes where it left off. With METADATA_REFRESH_ENABLED every worker runs
+the scheduler and an advisory lock lets one of them refresh at a time. The
+lock belongs to a database session, so behind PgBouncer in transaction mode
+the refresh needs DATABASE_DIRECT_URL and refuses to run without it.
+
+    python -m app.services.metadata_refresh run      # refresh now (resumes an unfinished run)
+    python -m app.services.metadata_refresh status
+"""
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+import asyncio
+import logging
+import sys
+
+from sqlalchemy import BigInteger, Integer, column, func, text, update, values
+from sqlalchemy.engine import Connection, Row
+from sqlalchemy.orm import Session
+
+from app import executors
+from app.config import settings
+from app.database import SessionLocal, direct_engine
+from app.metrics import METADATA_REFRESH_TITLES
+from app.models.metadata_refresh import MetadataRefreshRun
+from app.models.movie import ContentType, Movie
+from app.services.live_updates import live_updates
+from app.services.resilience import UpstreamUnavailable, omdb_upstream
+
+logger = logging.getLogger(__name__)
+
+# pg_try_advisory_lock key: one refresher at a time across workers and CLI runs
+REFRESH_LOCK_ID = 7_310_050
+
+LOCK_UNAVAILABLE = (
+    "The metadata refresh needs DATABASE_DIRECT_URL with DB_POOL_MODE=transaction: "
+    "PgBouncer would hand its session lock to other clients"
+)
+
+# Fields that come from OMDb and nowhere else; titles, genres, cast etc. may
+# have been edited by the user and are left alone
+REFRESH_FIELDS = ("description", "poster_url", "tmdb_rating", "total_seasons")
+
+BATCH_COLUMNS = [Movie.id, Movie.tmdb_id, Movie.content_type, Movie.change_version] + [
+    getattr(Movie, name) for name in REFRESH_FIELDS
+]
+
+
+def _with_session(fn: Callable[..., Any], *args) -> Any:
+    """Call fn(db, *args) with a session of its own (for executors.run_blocking)."""
+    with SessionLocal() as db:
+        return fn(db, *args)
+
+
+def diff(stored: Row, details: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Compare a title's stored metadata with freshly fetched OMDb details.
+
+    Returns:
+        The REFRESH_FIELDS whose OMDb value differs, with the new values.
+        Values OMDb no longer has (N/A) don't erase the stored ones.
+    """
+    return {
+        name: details[name]
+        for name in REFRESH_FIELDS
+        if details.get(name) is not None and details[name] != getattr(stored, name)
+    }
+
+
+class MetadataRefresh:
+    """Finds stale titles, re-fetches them from OMDb and applies the differences."""
+
+    # How often idle workers check whether a run is due
+    POLL_SECONDS = 300.0
+
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+
+    def current_run(self, db: Session, force: bool = False) -> Optional[MetadataRefreshRun]:
+        """
+        The unfinished run, or a new one when the last run started at least
+        METADATA_REFRESH_INTERVAL_HOURS ago (or force is set). Commits a new run.
+
+        Returns:
+            The run to work on, or None when no run is due
+        """
+        run = db.query(MetadataRefreshRun).order_by(MetadataRefreshRun.id.desc()).first()
+        if run is not None and run.finished_at is None:
+            return run
+        now = datetime.now(timezone.utc)
+        if run is not None and not force and run.started_at > now - timedelta(hours=settings.METADATA_REFRESH_INTERVAL_HOURS):
+            return None
+
+        run = MetadataRefreshRun(
+            cutoff=now - timedelta(days=settings.METADATA_REFRESH_MAX_AGE_DAYS),
+            last_movie_id=0, checked=0, changed=0, failed=0, quota_calls=0,
+        )
+        db.add(run)
+        db.commit()
+        db.refresh(run)
+        logger.info(f"🔄 Starting metadata refresh run {run.id} (titles refreshed before {run.cutoff:%Y-%m-%d})")
+        return run
+
+    def next_batch(self, db: Session, run_id: int) -> Optional[List[Row]]:
+        """
+        Reserve quota for and select the next stale titles after the checkpoint.
+
+        Returns:
+            Up to METADATA_REFRESH_BATCH_SIZE rows (empty when the run is
+            complete), or None when today's quota is spent
+        """
+        run = db.get(MetadataRefreshRun, run_id)
+        today = datetime.now(timezone.utc).date()
+        if run.quota_day != today:
+            run.quota_day = today
+            run.quota_calls = 0
+        limit = min(settings.METADATA_REFRESH_BATCH_SIZE, settings.METADATA_REFRESH_DAILY_QUOTA - run.quota_calls)
+        if limit <= 0:
+            db.commit()
+            return None
+
+        # Keyset pagination over the primary key: each batch starts where the last one ended
+        rows = (
+            db.query(*BATCH_COLUMNS)
+            .filter(
+                Movie.id > run.last_movie_id,
+                Movie.tmdb_id.like("tt%"),  # IMDb IDs; older rows may hold TMDB IDs OMDb can't resolve
+                func.coalesce(Movie.metadata_refreshed_at, Movie.created_at) < run.cutoff,
+            )
+            .order_by(Movie.id)
+            .limit(limit)
+            .all()
+        )
+        run.quota_calls += len(rows)
+        db.commit()
+        return rows
+
+    def apply(
+        self,
+        db: Session,
+        run_id: int,
+        rows: Sequence[Row],
+        results: Sequence[Optional[Dict[str, Any]]],
+        advance: bool = True
+    ) -> int:
+        """
+        Write back a fetched batch and move the checkpoint past it, in one transaction.
+
+        Args:
+            db: Database session
+            run_id: Run the batch belongs to
+            rows: Titles as selected by next_batch
+            results: Their OMDb details, None where the fetch failed
+            advance: False keeps the checkpoint (an outage cut the batch short;
+                it is selected again, minus the titles refreshed here)
+
+        Returns:
+            Number of titles whose metadata changed
+        """
+        unchanged: List[int] = []
+        failed = 0
+        # Rows grouped by which fields changed, so each group is one UPDATE
+        changes: Dict[Tuple[str, ...], List[Tuple]] = {}
+        for row, details in zip(rows, results):
+            if details is None:
+                failed += 1
+                continue
+            fields = diff(row, details)
+            if fields:
+                names = tuple(sorted(fields))
+                changes.setdefault(names, []).append((row.id, row.change_version, *(fields[name] for name in names)))
+            else:
+                unchanged.append(row.id)
+
+        changed_ids = []
+        for names, data in changes.items():
+            refreshed = values(
+                column("id", Integer),
+                column("change_version", BigInteger),
+                *(column(name, Movie.__table__.c[name].type) for name in names),
+                name="refreshed",
+            ).data(data)
+            changed_ids += db.execute(
+                update(Movie)
+                # Titles edited since they were selected are skipped and stay stale for the next run
+                .where(Movie.id == refreshed.c.id, Movie.change_version == refreshed.c.change_version)
+                .values(metadata_refreshed_at=func.now(), **{name: refreshed.c[name] for name in names})
+                .returning(Movie.id)
+            ).scalars().all()
+
+        if unchanged:
+            db.execute(
+                update(Movie)
+                .where(Movie.id.in_(unchanged))
+                # Nothing a client sees changed: keep the change-feed version and update time
+                .values(metadata_refreshed_at=func.now(), change_version=Movie.change_version, updated_at=Movie.updated_at)
+            )
+        live_updates.publish_many(db, "upsert", changed_ids)
+
+        run = db.get(MetadataRefreshRun, run_id)
+        run.checked += len(rows) - failed
+        run.changed += len(changed_ids)
+        if advance:
+            run.failed += failed
+            run.last_movie_id = rows[-1].id
+        db.commit()
+
+        METADATA_REFRESH_TITLES.labels(outcome="changed").inc(len(changed_ids))
+        METADATA_REFRESH_TITLES.labels(outcome="unchanged").inc(len(unchanged))
+        METADATA_REFRESH_TITLES.labels(outcome="conflict").inc(sum(map(len, changes.values())) - len(changed_ids))
+        METADATA_REFRESH_TITLES.labels(outcome="failed").inc(failed)
+        return len(changed_ids)
+
+    def finish(self, db: Session, run_id: int) -> MetadataRefreshRun:
+        run = db.get(MetadataRefreshRun, run_id)
+        run.finished_at = func.now()
+        db.commit()
+        db.refresh(run)
+        logger.info(
+            f"✅ Metadata refresh run {run.id} finished: {run.checked} checked, "
+            f"{run.changed} changed, {run.failed} failed"
+        )
+        return run
+
+    def can_lock(self) -> bool:
+        """Whether the refresh lock is safe: it needs a real session, not a PgBouncer transaction."""
+        return settings.DB_POOL_MODE != "transaction" or bool(settings.DATABASE_DIRECT_URL)
+
+    def _try_lock(self) -> Optional[Connection]:
+        """Take the refresh lock on a connection held for the whole run, or None if it is taken."""
+        if not self.can_lock():
+            raise RuntimeError(LOCK_UNAVAILABLE)
+        connection = direct_engine.connect()
+        if connection.dialect.name != "postgresql":
+            return connection
+        locked = connection.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": REFRESH_LOCK_ID}).scalar()
+        connection.commit()  # The lock outlives the transaction; don't sit idle in one
+        if not locked:
+            connection.close()
+            return None
+        return connection
+
+    def _unlock(self, connection: Connection):
+        try:
+            if connection.dialect.name == "postgresql":
+                connection.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": REFRESH_LOCK_ID})
+                connection.commit()
+        finally:
+            connection.close()
+
+    async def _fetch(self, tmdb_service, semaphore: asyncio.Semaphore, row: Row) -> Optional[Dict[str, Any]]:
+        async with semaphore:
+            try:
+                if row.content_type == ContentType.TV_SHOW:
+                    return await tmdb_service.get_tv_show_details(row.tmdb_id)
+                return await tmdb_service.get_movie_details(row.tmdb_id)
+            except UpstreamUnavailable:
+                return None  # The breaker opened mid-batch; run() keeps the checkpoint and pauses
+
+    async def run(self, tmdb_service, force: bool = False) -> bool:
+        """
+        Work on the current run until it finishes, today's quota is spent or OMDb is unavailable.
+
+        Args:
+            tmdb_service: OMDb client
+            force: Start a new run even if the last one started less than
+                METADATA_REFRESH_INTERVAL_HOURS ago
+
+        Returns:
+            False if another worker (or CLI run) holds the refresh lock
+
+        Raises:
+            RuntimeError: The lock can't be taken safely (see can_lock)
+        """
+        lock = await executors.run_blocking(self._try_lock)
+        if lock is None:
+            return False
+        try:
+            run = await executors.run_blocking(_with_session, self.current_run, force)
+            if run is None:
+                return True
+            semaphore = asyncio.Semaphore(settings.METADATA_REFRESH_CONCURRENCY)
+            batches = 0
+            while True:
+                if omdb_upstream.is_open:
+                    logger.warning(f"⚠️ OMDb is unavailable, pausing metadata refresh run {run.id}")
+                    break
+                rows = await executors.run_blocking(_with_session, self.next_batch, run.id)
+                if rows is None:
+                    if batches:
+                        logger.info(f"⏸️ Daily OMDb quota for the metadata refresh spent, run {run.id} resumes tomorrow")
+                    break
+                if not rows:
+                    await executors.run_blocking(_with_session, self.finish, run.id)
+                    break
+
+                results = await asyncio.gather(*(self._fetch(tmdb_service, semaphore, row) for row in rows))
+                changed = await executors.run_blocking(
+                    _with_session, self.apply, run.id, rows, results, not omdb_upstream.is_open
+                )
+                batches += 1
+                logger.info(f"🔄 Metadata refresh run {run.id}: {len(rows)} titles checked, {changed} changed")
+            return True
+        finally:
+            await executors.run_blocking(self._unlock, lock)
+
+    def status(self, db: Session) -> Dict[str, Any]:
+        """Progress of the latest run and the number of titles stale right now."""
+        run = db.query(MetadataRefreshRun).order_by(MetadataRefreshRun.id.desc()).first()
+        cutoff = datetime.now(timezone.utc) - timedelta(days=settings.METADATA_REFRESH_MAX_AGE_DAYS)
+        stale = db.query(func.count(Movie.id)).filter(
+            Movie.tmdb_id.like("tt%"),
+            func.coalesce(Movie.metadata_refreshed_at, Movie.created_at) < cutoff,
+        ).scalar()
+        latest = None
+        if run is not None:
+            latest = {
+                name: getattr(run, name)
+                for name in (
+                    "id", "cutoff", "last_movie_id", "checked", "changed", "failed",
+                    "quota_day", "quota_calls", "started_at", "finished_at",
+                )
+            }
+        return {"stale_titles": stale, "latest_run": latest}
+
+    async def run_scheduler(self):
+        """Start or resume a run whenever one is due; every POLL_SECONDS."""
+        from app.services import get_tmdb_service
+        while True:
+            try:
+                await self.run(await get_tmdb_service())
+            except Exception as e:
+                logger.error(f"❌ Metadata refresh failed: {e}")
+            await asyncio.sleep(self.POLL_SECONDS)
+
+    def start(self):
+        """Start the scheduler on the running event loop (when METADATA_REFRESH_ENABLED)."""
+        if not settings.METADATA_REFRESH_ENABLED or self._task is not None:
+            return
+        if not self.can_lock():
+            logger.error(f"❌ {LOCK_UNAVAILABLE}, not starting the scheduler")
+            return
+        self._task = asyncio.get_running_loop().create_task(self.run_scheduler())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+# Create a singleton instance
+metadata_refresh = MetadataRefresh()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    if len(sys.argv) > 1 and sys.argv[1] == "run":
+        from app.services.tmdb import TMDBService
+
+        if not metadata_refresh.can_lock():
+            sys.exit(f"❌ {LOCK_UNAVAILABLE}")
+
+        async def main() -> bool:
+            tmdb_service = TMDBService()
+            try:
+                return await metadata_refresh.run(tmdb_service, force=True)
+            finally:
+                await tmdb_service.close()
+                executors.shutdown()
+
+        if not asyncio.run(main()):
+            print("⚠️ A metadata refresh is already running elsewhere")
+    with SessionLocal() as db:
+        for key, value in metadata_refresh.status(db).items():
+            print(f"{key}: {value}")
@@ -0,0 +1,146 @@
+from datetime import datetime, timedelta, timezone
+from typing import List, Dict, Any, FrozenSet, Optional, Tuple
+import logging
+
+from sqlalchemy.orm import Session
+
+from app import executors
+from app.config import settings
+from app.deadline import deadline_scope
+from app.database import SessionLocal
+from app.models.recommendation import RecommendationSnapshot
+from app.services.changes import change_feed
+from app.services.collection_snapshot import CollectionState, collection_snapshot
+from app.services.recommendations import MovieRecommendationEngine
+
+logger = logging.getLogger(__name__)
+
+
+class RecommendationPrefetcher:
+    """
+    Precomputes "Surprise Me" candidates in the background so the endpoint
+    can answer from a stored snapshot instead of calling OMDb on the spot.
+
+    Each snapshot stores the change feed version it was computed at; it is
+    stale once the collection snapshot has applied a change at or after it.
+    """
+
+    # Matches the largest `count` accepted by the surprise-me endpoint
+    MAX_CANDIDATES = 50
+
+    def __init__(self):
+        self._warming = False
+        self._pending = False
+        # Collection generation, lowercased titles and OMDb IDs, rebuilt when the collection changes
+        self._membership: Optional[Tuple[int, FrozenSet[str], FrozenSet[str]]] = None
+
+    def get_snapshot(self, db: Session) -> Optional[RecommendationSnapshot]:
+        """Get the most recent snapshot, if any."""
+        return db.query(RecommendationSnapshot).order_by(RecommendationSnapshot.created_at.desc()).first()
+
+    def is_stale(self, snapshot: RecommendationSnapshot, state: CollectionState) -> bool:
+        """A snapshot is stale when the collection changed since it was computed or it outlived its TTL."""
+        if snapshot.change_version is None or state.last_change >= snapshot.change_version:
+            return True
+
+        created_at = snapshot.created_at
+        if created_at.tzinfo is None:
+            created_at = created_at.replace(tzinfo=timezone.utc)
+        max_age = timedelta(minutes=settings.RECOMMENDATION_SNAPSHOT_TTL_MINUTES)
+        return datetime.now(timezone.utc) - created_at > max_age
+
+    def filter_existing(self, candidates: List[Dict[str, Any]], state: CollectionState) -> List[Dict[str, Any]]:
+        """Drop candidates that were added to the collection after the snapshot was taken."""
+        membership = self._membership
+        if membership is None or membership[0] != state.generation:
+            membership = self._membership = (
+                state.generation,
+                frozenset(record.title.lower() for record in state.records if record.title),
+                frozenset(record.tmdb_id for record in state.records if record.tmdb_id),
+            )
+        _, existing_titles, existing_ids = membership
+
+        return [
+            c for c in candidates
+            if (c.get("title") or "").lower() not in existing_titles
+            and c.get("id") not in existing_ids
+        ]
+
+    def cached(self, db: Session, state: CollectionState) -> Optional[Tuple[List[Dict[str, Any]], bool]]:
+        """
+        Candidates of the latest snapshot, without titles added since (blocking).
+
+        Args:
+            db: Database session
+            state: The collection, from collection_snapshot.state(db)
+
+        Returns:
+            The candidates and whether the snapshot is stale, or None if there is no snapshot
+        """
+        snapshot = self.get_snapshot(db)
+        if snapshot is None:
+            return None
+        return self.filter_existing(snapshot.candidates, state), self.is_stale(snapshot, state)
+
+    def store(self, db: Session, version: int, candidates: List[Dict[str, Any]]) -> RecommendationSnapshot:
+        """Replace any previous snapshot with a freshly computed one."""
+        db.query(RecommendationSnapshot).delete()
+        snapshot = RecommendationSnapshot(change_version=version, candidates=candidates)
+        db.add(snapshot)
+        db.commit()
+        db.refresh(snapshot)
+        return snapshot
+
+    async def compute(self, db: Session) -> Tuple[List[Dict[str, Any]], bool]:
+        """
+        Run the recommendation engine and store its ranked output.
+
+        Returns the candidates and whether the run was complete. A run cut
+        short by the request deadline is returned but not stored.
+        """
+        # Taken before reading the collection: any change it misses is at or after this version
+        version = await executors.run_blocking(change_feed.current_version, db)
+        engine = MovieRecommendationEngine()
+        try:
+            candidates = await engine.get_recommendations(db, count=self.MAX_CANDIDATES)
+        finally:
+            await engine.close()
+
+        if engine.truncated:
+            return candidates, False
+
+        await executors.run_blocking(self.store, db, version, candidates)
+        return candidates, True
+
+    async def warm_up(self):
+        """
+        Background task: recompute the snapshot after the collection changed.
+        Requests arriving while a warm-up is running in this process are
+        coalesced into a single follow-up run.
+        """
+        if self._warming:
+            self._pending = True
+            return
+
+        self._warming = True
+        try:
+            while True:
+                self._pending = False
+                db = SessionLocal()
+                try:
+                    # Background work isn't bound by the deadline of the request that scheduled it
+                    with deadline_scope(None):
+                        candidates, _ = await self.compute(db)
+                    logger.info(f"🔥 Warmed up {len(candidates)} recommendation candidates")
+                except Exception as e:
+                    logger.exception(f"❌ Recommendation warm-up failed: {e}")
+                finally:
+                    db.close()
+                if not self._pending:
+                    break
+        finally:
+            self._warming = False
+
+
+# Create singleton instance
+recommendation_prefetcher = RecommendationPrefetcher()
@@ -1,13 +1,14 @@
-﻿from typing import List, Dict, Any, Set
-from collections import Counter
-import asyncio
+﻿from typing import List, Dict, Any, Optional
 import logging
-import re
 
 from sqlalchemy.orm import Session
 
-from ..models import Movie, WatchStatus
-from .tmdb import TMDBService
+from .. import deadline, executors
+from ..models import WatchStatus
+from . import scoring
+from .catalog import catalog
+from .collection_snapshot import MovieRecord, collection_snapshot
+from .resilience import UpstreamUnavailable, omdb_upstream
 
 logger = logging.getLogger(__name__)
 
@@ -18,122 +19,47 @@ class MovieRecommendationEngine:
     based on user's collection preferences.
     """
     
+    # Stop fetching when less than this many seconds of the request budget remain
+    DEADLINE_MARGIN_SECONDS = 0.5
+    
     def __init__(self):
+        # Imported here so loading the prefetcher doesn't pull in httpx
+        from .tmdb import TMDBService
         self.tmdb_service = TMDBService()
+        # Set when the request deadline or an OMDb outage cut candidate fetching short
+        self.truncated = False
     
-    def _analyze_preferences(self, movies: List[Movie]) -> Dict[str, Any]:
-        """Analyze user's movie collection to determine preferences"""
-        genres = []
-        directors = []
-        actors = []
-        years = []
-        plot_keywords = []
-        highly_rated = []
-        
-        for movie in movies:
-            # Collect genres
-            if movie.genre:
-                genre_list = [g.strip() for g in movie.genre.split(',')]
-                genres.extend(genre_list)
-            
-            # Collect directors
-            if movie.director:
-                directors.append(movie.director)
-            
-            # Collect cast
-            if movie.cast:
-                cast_list = [c.strip() for c in movie.cast.split(',')[:3]]
-                actors.extend(cast_list)
-            
-            # Collect years for time period matching
-            if movie.release_year:
-                years.append(movie.release_year)
-            
-            # Extract keywords from description/overview
-            if movie.description:
-                keywords = self._extract_keywords(movie.description)
-                plot_keywords.extend(keywords)
-            
-            # Track highly rated movies
-            if movie.user_rating and movie.user_rating >= 4:
-                highly_rated.append(movie)
-        
-        # Get top preferences
-        genre_counter = Counter(genres)
-        director_counter = Counter(directors)
-        actor_counter = Counter(actors)
-        keyword_counter = Counter(plot_keywords)
-        
-        # Calculate average year and range
-        avg_year = sum(years) / len(years) if years else 2020
-        year_range = (min(years) if years else 2000, max(years) if years else 2024)
-        
-        return {
-            'top_genres': [genre for genre, _ in genre_counter.most_common(5)],
-            'top_directors': [director for director, _ in director_counter.most_common(2)],
-            'top_actors': [actor for actor, _ in actor_counter.most_common(2)],
-            'top_keywords': [kw for kw, _ in keyword_counter.most_common(10)],
-            'avg_year': int(avg_year),
-            'year_range': year_range,
-            'highly_rated': highly_rated[:3],
-            'all_genres': set(genres)
-        }
+    def _out_of_time(self) -> bool:
+        """Whether to stop calling OMDb and score what has been fetched so far."""
+        if deadline.expired(self.DEADLINE_MARGIN_SECONDS):
+            if not self.truncated:
+                logger.warning("⏱️ Time budget nearly spent, scoring the candidates fetched so far")
+            self.truncated = True
+        return self.truncated
     
-    def _extract_keywords(self, text: str) -> List[str]:
-        """Extract meaningful keywords from plot text"""
-        if not text:
+    async def _search(self, query: str) -> List[Dict[str, Any]]:
+        """OMDb search results, or none once OMDb is unavailable or the budget is spent."""
+        try:
+            return (await self.tmdb_service.search_movies(query)).get('results', [])
+        except (UpstreamUnavailable, deadline.DeadlineExceeded) as e:
+            logger.warning(f"⚠️ Stopping OMDb searches: {e}")
+            self.truncated = True
             return []
-        
-        # Remove common words
-        stop_words = {'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 
-                     'of', 'with', 'by', 'from', 'as', 'is', 'was', 'are', 'were', 'been',
-                     'be', 'have', 'has', 'had', 'do', 'does', 'did', 'will', 'would',
-                     'could', 'should', 'may', 'might', 'must', 'can', 'his', 'her', 'their'}
-        
-        # Extract words (lowercase, alphanumeric only)
-        words = re.findall(r'\b[a-z]{4,}\b', text.lower())
-        keywords = [w for w in words if w not in stop_words]
-        return keywords[:15]  # Limit to 15 keywords per movie
     
-    def _calculate_similarity(self, candidate: Dict, preferences: Dict, existing_titles: Set[str]) -> float:
-        """
-        Calculate similarity score between candidate movie and user preferences.
-        Scores based on: genre match, year proximity, plot keyword overlap.
-        """
-        score = 0.0
-        
-        # Genre matching (40% weight)
-        candidate_genres = set()
-        if candidate.get('genres'):
-            candidate_genres = set(g.strip() for g in candidate['genres'].split(','))
-        elif candidate.get('genre'):
-            candidate_genres = set(g.strip() for g in candidate['genre'].split(','))
-        
-        genre_overlap = len(candidate_genres & preferences['all_genres'])
-        if genre_overlap > 0:
-            score += 0.4 * (genre_overlap / max(len(preferences['all_genres']), 1))
-        
-        # Year proximity (30% weight)
-        candidate_year = candidate.get('release_year')
-        if candidate_year:
-            try:
-                year = int(str(candidate_year).split('-')[0][:4])
-                year_diff = abs(year - preferences['avg_year'])
-                # Closer years get higher scores (max diff 50 years)
-                year_score = max(0, 1 - (year_diff / 50))
-                score += 0.3 * year_score
-            except:
-                pass
-        
-        # Plot keyword matching (30% weight)
-        candidate_plot = candidate.get('overview') or candidate.get('description') or ''
-        if candidate_plot and preferences['top_keywords']:
-            candidate_keywords = set(self._extract_keywords(candidate_plot))
-            keyword_overlap = len(candidate_keywords & set(preferences['top_keywords']))
-            if keyword_overlap > 0:
-                score += 0.3 * (keyword_overlap / len(preferences['top_keywords']))
-        
-        return score
+    async def _details(self, imdb_id: str) -> Optional[Dict[str, Any]]:
+        """OMDb details, or None once OMDb is unavailable or the budget is spent."""
+        try:
+            return await self.tmdb_service.get_movie_details(imdb_id)
+        except (UpstreamUnavailable, deadline.DeadlineExceeded) as e:
+            logger.warning(f"⚠️ Stopping OMDb detail fetches: {e}")
+            self.truncated = True
+            return None
+    
+    async def _analyze_preferences(self, movies: List[MovieRecord]) -> Dict[str, Any]:
+        """Analyze user's movie collection to determine preferences (in the CPU pool)"""
+        rows = await executors.run_blocking(scoring.profile_rows, movies)
+        counts = await executors.map_cpu(scoring.count_preferences, executors.split(rows))
+        return scoring.merge_preferences(counts)
     
     async def get_recommendations(
         self,
@@ -145,7 +71,7 @@ class MovieRecommendationEngine:
         Uses content-based filtering: genre similarity, year proximity, plot keyword matching.
         """
         logger.info(f"🎬 Starting recommendation generation for count={count}")
-        all_movies = db.query(Movie).all()
+        all_movies = await executors.run_blocking(collection_snapshot.records, db)
         logger.info(f"📊 Found {len(all_movies)} movies in collection")
         
         if len(all_movies) < 1:
@@ -162,7 +88,7 @@ class MovieRecommendationEngine:
             watched_movies = all_movies
             logger.info("ℹ️ No watched movies, using all movies for preferences")
         
-        preferences = self._analyze_preferences(watched_movies)
+        preferences = await self._analyze_preferences(watched_movies)
         logger.info(f"🎯 Preferences: genres={preferences['top_genres'][:3]}, "
                    f"years={preferences['year_range']}, keywords={preferences['top_keywords'][:5]}")
         
@@ -175,11 +101,12 @@ class MovieRecommendationEngine:
         # Strategy 1: Search by top genres to find movies with similar genres
         logger.info("🔍 Strategy 1: Searching for movies by genre...")
         for genre in preferences['top_genres'][:4]:  # Top 4 genres
+            if self._out_of_time():
+                break
             if genre not in searches_done:
                 searches_done.add(genre)
                 logger.info(f"  🎭 Searching: {genre}")
-                search_result = await self.tmdb_service.search_movies(genre)
-                results = search_result.get('results', [])
+                results = await self._search(genre)
                 logger.info(f"  📝 Found {len(results)} results")
                 
                 for movie_data in results[:8]:  # Get more candidates
@@ -194,11 +121,12 @@ class MovieRecommendationEngine:
         # Strategy 2: Search by plot keywords to find similar themes
         logger.info("🔍 Strategy 2: Searching by plot keywords...")
         for keyword in preferences['top_keywords'][:5]:  # Top 5 keywords
+            if self._out_of_time():
+                break
             if keyword not in searches_done:
                 searches_done.add(keyword)
                 logger.info(f"  🔑 Searching: {keyword}")
-                search_result = await self.tmdb_service.search_movies(keyword)
-                results = search_result.get('results', [])
+                results = await self._search(keyword)
                 logger.info(f"  📝 Found {len(results)} results")
                 
                 for movie_data in results[:5]:
@@ -213,11 +141,12 @@ class MovieRecommendationEngine:
         # Strategy 3: Search by directors for stylistic similarity
         logger.info("🔍 Strategy 3: Searching by favorite directors...")
         for director in preferences['top_directors'][:2]:
+            if self._out_of_time():
+                break
             if director not in searches_done:
                 searches_done.add(director)
                 logger.info(f"  🎬 Searching: {director}")
-                search_result = await self.tmdb_service.search_movies(director)
-                results = search_result.get('results', [])
+                results = await self._search(director)
                 
                 for movie_data in results[:5]:
                     title_lower = movie_data.get('title', '').lower()
@@ -241,23 +170,34 @@ class MovieRecommendationEngine:
         
         logger.info(f"� Deduplication: {len(unique_candidates)} unique candidates")
         
-        # Fetch full details and calculate scores
+        # Fetch full details, then score them together
         logger.info("📊 Fetching details and calculating similarity scores...")
-        scored_recommendations = []
+        fetched = []
         
         for candidate in unique_candidates[:30]:  # Limit API calls
+            if omdb_upstream.is_open:
+                logger.warning("⚠️ OMDb circuit is open, scoring the candidates fetched so far")
+                break
+            if self._out_of_time():
+                break
+            
             imdb_id = candidate.get('id')
             if not imdb_id:
                 continue
             
-            # Fetch full details (includes genre, plot, year)
-            details = await self.tmdb_service.get_movie_details(imdb_id)
-            if not details:
+            # Catalogued titles that can't pass the threshold don't need an OMDb call
+            known = catalog.get(imdb_id)
+            if known is not None and scoring.calculate_similarity(known, preferences) <= 0.2:
                 continue
             
-            # Calculate similarity score
-            score = self._calculate_similarity(details, preferences, existing_titles)
-            
+            # Fetch full details (includes genre, plot, year)
+            details = await self._details(imdb_id)
+            if details:
+                fetched.append(details)
+        
+        scores = await executors.run_cpu(scoring.score_candidates, fetched, preferences)
+        scored_recommendations = []
+        for details, score in zip(fetched, scores):
             if score > 0.2:  # Only keep reasonably similar movies
                 # Build match reason
                 reasons = []
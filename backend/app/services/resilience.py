@@ -0,0 +1,298 @@
+import asyncio
+import logging
+import random
+import time
+from collections import deque
+from typing import TYPE_CHECKING, Callable, Deque, Dict, Optional
+
+from app import deadline
+from app.config import settings
+from app.metrics import UPSTREAM_ERRORS, UPSTREAM_LATENCY
+
+if TYPE_CHECKING:
+    import httpx  # Imported by the clients that actually send requests
+
+logger = logging.getLogger(__name__)
+
+# Status codes that mean "try again later" rather than "bad request"
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class UpstreamUnavailable(Exception):
+    """Raised instead of calling an upstream whose circuit breaker is open."""
+
+    def __init__(self, upstream: str, retry_after: float):
+        self.upstream = upstream
+        self.retry_after = retry_after
+        super().__init__(f"{upstream} is temporarily unavailable (retry in {retry_after:.0f}s)")
+
+
+class TokenBucket:
+    """
+    Adaptive token-bucket rate limiter.
+
+    The refill rate halves whenever the upstream throttles us and creeps back
+    towards the configured rate on every successful call.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[int] = None):
+        self.max_rate = rate
+        self.rate = rate
+        self.capacity = capacity or max(1, int(rate))
+        self.tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self):
+        """Wait until a token is available and take it."""
+        async with self._lock:
+            while True:
+                self._refill()
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    def throttled(self):
+        """Multiplicative decrease after a 429."""
+        self.rate = max(self.max_rate / 16, self.rate / 2)
+
+    def succeeded(self):
+        """Additive increase after a successful call."""
+        self.rate = min(self.max_rate, self.rate + self.max_rate / 20)
+
+
+class CircuitBreaker:
+    """
+    Error-rate circuit breaker over a rolling window of recent calls.
+
+    closed -> open when the failure ratio crosses the threshold,
+    open -> half_open after the cool-down, letting a single probe through,
+    half_open -> closed on success or back to open on failure.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: float, min_calls: int, window: int, open_seconds: float):
+        self.failure_threshold = failure_threshold
+        self.min_calls = min_calls
+        self.open_seconds = open_seconds
+        self.state = self.CLOSED
+        self._outcomes: Deque[bool] = deque(maxlen=window)
+        self._opened_at = 0.0
+        self._probe_started: Optional[float] = None
+
+    @property
+    def failure_rate(self) -> float:
+        if not self._outcomes:
+            return 0.0
+        return self._outcomes.count(False) / len(self._outcomes)
+
+    def retry_after(self) -> float:
+        """Seconds until the breaker lets a probe through."""
+        return max(0.0, self._opened_at + self.open_seconds - time.monotonic())
+
+    def allow(self) -> bool:
+        """Whether a call may be attempted right now."""
+        if self.state == self.OPEN:
+            if self.retry_after() > 0:
+                return False
+            self.state = self.HALF_OPEN
+
+        if self.state == self.HALF_OPEN:
+            # A probe that never reported back (e.g. cancelled) stops blocking after one cool-down
+            now = time.monotonic()
+            if self._probe_started is not None and now - self._probe_started < self.open_seconds:
+                return False
+            self._probe_started = now
+        return True
+
+    def record(self, success: bool):
+        """Record the outcome of an attempted call."""
+        if self.state == self.HALF_OPEN:
+            self._probe_started = None
+            if success:
+                self.state = self.CLOSED
+                self._outcomes.clear()
+            else:
+                self._open()
+            return
+
+        self._outcomes.append(success)
+        if (
+            self.state == self.CLOSED
+            and len(self._outcomes) >= self.min_calls
+            and self.failure_rate >= self.failure_threshold
+        ):
+            self._open()
+
+    def _open(self):
+        self.state = self.OPEN
+        self._opened_at = time.monotonic()
+
+
+class Upstream:
+    """
+    Outbound call policy for one upstream API: rate limit, circuit breaker
+    and retries with jittered exponential backoff on 429/5xx and transport errors.
+    Limits are per worker process.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        rate_per_second: float,
+        is_throttled: Optional[Callable[["httpx.Response"], bool]] = None
+    ):
+        self.name = name
+        # Recognises throttling the upstream reports in some other way than HTTP 429
+        self.is_throttled = is_throttled or (lambda response: False)
+        self.bucket = TokenBucket(rate_per_second)
+        self.breaker = CircuitBreaker(
+            failure_threshold=settings.CIRCUIT_FAILURE_THRESHOLD,
+            min_calls=settings.CIRCUIT_MIN_CALLS,
+            window=settings.CIRCUIT_WINDOW,
+            open_seconds=settings.CIRCUIT_OPEN_SECONDS
+        )
+        self.max_retries = settings.UPSTREAM_MAX_RETRIES
+        self.calls = 0
+        self.failures = 0
+        self.rejected = 0
+
+    @property
+    def is_open(self) -> bool:
+        return self.breaker.state == CircuitBreaker.OPEN and self.breaker.retry_after() > 0
+
+    async def acquire(self):
+        """
+        Check the breaker and wait for a rate-limit token before a call.
+        The wait is bounded by the current request deadline.
+        """
+        if not self.breaker.allow():
+            self.rejected += 1
+            UPSTREAM_ERRORS.labels(upstream=self.name, kind="circuit_open").inc()
+            raise UpstreamUnavailable(self.name, self.breaker.retry_after())
+        
+        budget = deadline.remaining()
+        if budget is None:
+            await self.bucket.acquire()
+        else:
+            try:
+                await asyncio.wait_for(self.bucket.acquire(), budget)
+            except asyncio.TimeoutError:
+                raise deadline.DeadlineExceeded(f"{self.name} call")
+        self.calls += 1
+
+    def record_response(self, response: "httpx.Response"):
+        """Feed an upstream response into the breaker and rate limiter (once per response)."""
+        if response.status_code == 429 or self.is_throttled(response):
+            self.record_throttled()
+        elif response.status_code >= 500:
+            UPSTREAM_ERRORS.labels(upstream=self.name, kind="server_error").inc()
+            self.record_failure()
+        else:
+            self.bucket.succeeded()
+            self.breaker.record(True)
+
+    def record_failure(self):
+        self.failures += 1
+        self.breaker.record(False)
+
+    def record_throttled(self):
+        """The upstream told us to slow down (HTTP 429 or a quota error in the body)."""
+        UPSTREAM_ERRORS.labels(upstream=self.name, kind="throttled").inc()
+        self.bucket.throttled()
+        self.record_failure()
+
+    def _backoff(self, attempt: int, response: Optional["httpx.Response"] = None) -> float:
+        """Full-jitter exponential backoff, honouring Retry-After when given."""
+        if response is not None and response.headers.get("Retry-After", "").isdigit():
+            return min(float(response.headers["Retry-After"]), settings.UPSTREAM_BACKOFF_MAX_SECONDS)
+        ceiling = min(settings.UPSTREAM_BACKOFF_MAX_SECONDS, settings.UPSTREAM_BACKOFF_BASE_SECONDS * (2 ** attempt))
+        return random.uniform(0, ceiling)
+
+    async def request(self, client: "httpx.AsyncClient", method: str, url: str, **kwargs) -> "httpx.Response":
+        """
+        Send a request through the rate limiter and circuit breaker, retrying
+        retryable failures. Returns the last response (which may still be an
+        error status) or raises the last transport error.
+
+        Each attempt's timeout is capped by the remaining request deadline, and
+        no retry is scheduled that couldn't finish within it.
+
+        Raises:
+            UpstreamUnavailable: If the circuit breaker is open
+            DeadlineExceeded: If the request deadline is spent before a call
+        """
+        import httpx
+
+        default_timeout = client.timeout.read or 30.0
+        for attempt in range(self.max_retries + 1):
+            await self.acquire()
+            if deadline.remaining() is not None:
+                kwargs["timeout"] = deadline.timeout(default_timeout, f"{self.name} call")
+            start = time.perf_counter()
+            try:
+                response = await client.request(method, url, **kwargs)
+            except httpx.TransportError as e:
+                UPSTREAM_LATENCY.labels(upstream=self.name).observe(time.perf_counter() - start)
+                UPSTREAM_ERRORS.labels(upstream=self.name, kind="transport").inc()
+                self.record_failure()
+                delay = self._backoff(attempt)
+                if attempt >= self.max_retries or deadline.expired(delay):
+                    raise
+                logger.warning(f"⚠️ {self.name} {type(e).__name__}, retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+                continue
+
+            UPSTREAM_LATENCY.labels(upstream=self.name).observe(time.perf_counter() - start)
+            self.record_response(response)
+            if response.status_code not in RETRYABLE_STATUS_CODES or attempt >= self.max_retries:
+                return response
+
+            delay = self._backoff(attempt, response)
+            if deadline.expired(delay):
+                return response
+            logger.warning(f"⚠️ {self.name} returned {response.status_code}, retrying in {delay:.1f}s")
+            await response.aclose()
+            await asyncio.sleep(delay)
+
+    def health(self) -> Dict:
+        """Current breaker and limiter state for /health."""
+        return {
+            "state": self.breaker.state,
+            "failure_rate": round(self.breaker.failure_rate, 3),
+            "retry_after_seconds": round(self.breaker.retry_after(), 1) if self.is_open else 0,
+            "rate_limit_per_second": round(self.bucket.rate, 2),
+            "calls": self.calls,
+            "failures": self.failures,
+            "rejected": self.rejected
+        }
+
+
+def omdb_quota_exceeded(response: "httpx.Response") -> bool:
+    """OMDb reports an exhausted daily quota as HTTP 401 with a "Request limit reached!" error."""
+    if response.status_code != 401:
+        return False
+    try:
+        data = response.json()
+    except ValueError:
+        return False
+    return data.get("Response") == "False" and "limit" in (data.get("Error") or "").lower()
+
+
+# Shared upstream policies
+omdb_upstream = Upstream("omdb", settings.OMDB_RATE_LIMIT_PER_SECOND, is_throttled=omdb_quota_exceeded)
+gemini_upstream = Upstream("gemini", settings.GEMINI_RATE_LIMIT_PER_SECOND)
+
+upstreams = {
+    omdb_upstream.name: omdb_upstream,
+    gemini_upstream.name: gemini_upstream,
+}
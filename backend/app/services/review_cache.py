@@ -0,0 +1,91 @@
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional
+import logging
+
+from app.config import settings
+from app.database import SessionLocal
+from app.metrics import CACHE_REQUESTS
+from app.models.review_cache import ReviewCacheEntry
+
+logger = logging.getLogger(__name__)
+
+
+class ReviewCache:
+    """
+    Persistent, TTL-bound cache of generated reviews.
+    Entries live in the database so every worker process shares them.
+    """
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def get(self, cache_key: str) -> Optional[str]:
+        """Get a cached review, or None if missing or expired."""
+        db = SessionLocal()
+        try:
+            entry = db.query(ReviewCacheEntry).filter(
+                ReviewCacheEntry.cache_key == cache_key,
+                ReviewCacheEntry.expires_at > datetime.now(timezone.utc)
+            ).first()
+        finally:
+            db.close()
+
+        if entry is None:
+            self.misses += 1
+            CACHE_REQUESTS.labels(cache="review", result="miss").inc()
+            return None
+
+        self.hits += 1
+        CACHE_REQUESTS.labels(cache="review", result="hit").inc()
+        return entry.generated_text
+
+    def record_coalesced(self):
+        """Count a request that joined an identical in-flight generation."""
+        self.coalesced += 1
+        CACHE_REQUESTS.labels(cache="review", result="coalesced").inc()
+
+    def set(self, cache_key: str, generated_text: str):
+        """Store a review, replacing any expired entry under the same key."""
+        expires_at = datetime.now(timezone.utc) + timedelta(hours=settings.REVIEW_CACHE_TTL_HOURS)
+        db = SessionLocal()
+        try:
+            db.merge(ReviewCacheEntry(
+                cache_key=cache_key,
+                generated_text=generated_text,
+                expires_at=expires_at
+            ))
+            db.commit()
+        except Exception as e:
+            # A concurrent worker may have stored the same key first
+            db.rollback()
+            logger.warning(f"⚠️ Could not store review cache entry: {e}")
+        finally:
+            db.close()
+
+    def purge_expired(self) -> int:
+        """Delete expired entries and return how many were removed."""
+        db = SessionLocal()
+        try:
+            removed = db.query(ReviewCacheEntry).filter(
+                ReviewCacheEntry.expires_at <= datetime.now(timezone.utc)
+            ).delete()
+            db.commit()
+            return removed
+        finally:
+            db.close()
+
+    def stats(self) -> Dict:
+        """Hit/miss counters for this worker process (coalesced requests count as hits)."""
+        requests = self.hits + self.misses + self.coalesced
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "hit_rate": round((self.hits + self.coalesced) / requests, 3) if requests else 0.0
+        }
+
+
+# Create singleton instance
+review_cache = ReviewCache()
@@ -0,0 +1,147 @@
+"""
+CPU-bound parts of the recommendation engine, as plain functions.
+
+They take and return only builtins (tuples, dicts, Counters), so they can run
+in the process pool (app.executors.run_cpu) as well as inline. Keep this
+module free of database and HTTP imports: pool processes import it on start.
+"""
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import re
+
+STOP_WORDS = frozenset({
+    'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for',
+    'of', 'with', 'by', 'from', 'as', 'is', 'was', 'are', 'were', 'been',
+    'be', 'have', 'has', 'had', 'do', 'does', 'did', 'will', 'would',
+    'could', 'should', 'may', 'might', 'must', 'can', 'his', 'her', 'their',
+})
+
+# Lowercase words of four letters or more
+WORD_PATTERN = re.compile(r'\b[a-z]{4,}\b')
+
+# (genre, director, cast, release_year, description) - see profile_rows
+ProfileRow = Tuple[Optional[str], Optional[str], Optional[str], Optional[int], Optional[str]]
+
+
+def extract_keywords(text: Optional[str]) -> List[str]:
+    """Extract meaningful keywords from plot text"""
+    if not text:
+        return []
+    words = WORD_PATTERN.findall(text.lower())
+    keywords = [w for w in words if w not in STOP_WORDS]
+    return keywords[:15]  # Limit to 15 keywords per movie
+
+
+def profile_rows(movies: Iterable[Any]) -> List[ProfileRow]:
+    """The fields of collection titles that feed the preference profile."""
+    return [(m.genre, m.director, m.cast, m.release_year, m.description) for m in movies]
+
+
+def count_preferences(rows: Iterable[ProfileRow]) -> Dict[str, Any]:
+    """
+    Tally genres, directors, actors, plot keywords and years over some titles.
+
+    Args:
+        rows: profile_rows() tuples
+
+    Returns:
+        Partial counts; combine those of several batches with merge_preferences
+    """
+    genres, directors, actors, keywords = Counter(), Counter(), Counter(), Counter()
+    years = []
+    for genre, director, cast, release_year, description in rows:
+        if genre:
+            genres.update(g.strip() for g in genre.split(','))
+        if director:
+            directors[director] += 1
+        if cast:
+            actors.update(c.strip() for c in cast.split(',')[:3])
+        if release_year:
+            years.append(release_year)
+        if description:
+            keywords.update(extract_keywords(description))
+    return {
+        "genres": genres,
+        "directors": directors,
+        "actors": actors,
+        "keywords": keywords,
+        "year_sum": sum(years),
+        "year_count": len(years),
+        "year_min": min(years) if years else None,
+        "year_max": max(years) if years else None,
+    }
+
+
+def merge_preferences(batches: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Combine count_preferences() results (in collection order) into a preference profile.
+
+    Returns:
+        Top genres, directors, actors and keywords, the average year and year range
+    """
+    genres, directors, actors, keywords = Counter(), Counter(), Counter(), Counter()
+    for batch in batches:
+        genres.update(batch["genres"])
+        directors.update(batch["directors"])
+        actors.update(batch["actors"])
+        keywords.update(batch["keywords"])
+    year_count = sum(batch["year_count"] for batch in batches)
+    year_mins = [batch["year_min"] for batch in batches if batch["year_min"] is not None]
+    year_maxes = [batch["year_max"] for batch in batches if batch["year_max"] is not None]
+
+    avg_year = sum(batch["year_sum"] for batch in batches) / year_count if year_count else 2020
+    return {
+        'top_genres': [genre for genre, _ in genres.most_common(5)],
+        'top_directors': [director for director, _ in directors.most_common(2)],
+        'top_actors': [actor for actor, _ in actors.most_common(2)],
+        'top_keywords': [kw for kw, _ in keywords.most_common(10)],
+        'avg_year': int(avg_year),
+        'year_range': (min(year_mins) if year_mins else 2000, max(year_maxes) if year_maxes else 2024),
+        'all_genres': set(genres)
+    }
+
+
+def calculate_similarity(candidate: Dict, preferences: Dict) -> float:
+    """
+    Calculate similarity score between candidate movie and user preferences.
+    Scores based on: genre match, year proximity, plot keyword overlap.
+    """
+    score = 0.0
+
+    # Genre matching (40% weight)
+    candidate_genres = set()
+    if candidate.get('genres'):
+        candidate_genres = set(g.strip() for g in candidate['genres'].split(','))
+    elif candidate.get('genre'):
+        candidate_genres = set(g.strip() for g in candidate['genre'].split(','))
+
+    genre_overlap = len(candidate_genres & preferences['all_genres'])
+    if genre_overlap > 0:
+        score += 0.4 * (genre_overlap / max(len(preferences['all_genres']), 1))
+
+    # Year proximity (30% weight)
+    candidate_year = candidate.get('release_year')
+    if candidate_year:
+        try:
+            year = int(str(candidate_year).split('-')[0][:4])
+            year_diff = abs(year - preferences['avg_year'])
+            # Closer years get higher scores (max diff 50 years)
+            year_score = max(0, 1 - (year_diff / 50))
+            score += 0.3 * year_score
+        except ValueError:
+            pass
+
+    # Plot keyword matching (30% weight)
+    candidate_plot = candidate.get('overview') or candidate.get('description') or ''
+    if candidate_plot and preferences['top_keywords']:
+        candidate_keywords = set(extract_keywords(candidate_plot))
+        keyword_overlap = len(candidate_keywords & set(preferences['top_keywords']))
+        if keyword_overlap > 0:
+            score += 0.3 * (keyword_overlap / len(preferences['top_keywords']))
+
+    return score
+
+
+def score_candidates(candidates: List[Dict], preferences: Dict) -> List[float]:
+    """calculate_similarity for a batch of candidates, in order."""
+    return [calculate_similarity(candidate, preferences) for candidate in candidates]
@@ -1,12 +1,19 @@
 import httpx
+import logging
 from typing import List, Dict, Optional
+from app import executors
 from app.config import settings
+from app.deadline import DeadlineExceeded
+from app.services.catalog import catalog
+from app.services.resilience import UpstreamUnavailable, omdb_quota_exceeded, omdb_upstream
+
+logger = logging.getLogger(__name__)
 
 
 class TMDBService:
     """Service for interacting with OMDb API (replacing TMDB)."""
     
-    BASE_URL = "http://www.omdbapi.com"
+    BASE_URL = settings.OMDB_BASE_URL
     
     def __init__(self):
         # OMDb API key from settings
@@ -17,6 +24,21 @@ class TMDBService:
         """Close the HTTP client."""
         await self.client.aclose()
     
+    async def _get(self, params: Dict) -> httpx.Response:
+        """GET from OMDb through the shared rate limiter and circuit breaker."""
+        return await omdb_upstream.request(self.client, "GET", self.BASE_URL, params=params)
+    
+    def _parse(self, response: httpx.Response) -> Dict:
+        """Decode an OMDb response (omdb_upstream already counted a quota error as throttling)."""
+        try:
+            data = response.json()
+        except ValueError:
+            data = {}
+        if omdb_quota_exceeded(response):
+            logger.warning(f"⚠️ OMDb quota error: {data.get('Error')}")
+        response.raise_for_status()
+        return data
+    
     async def search_movies(self, query: str, page: int = 1) -> Dict:
         """
         Search for movies by title using OMDb.
@@ -27,10 +49,13 @@ class TMDBService:
             
         Returns:
             Dictionary with search results in TMDB-like format
+
+        Raises:
+            UpstreamUnavailable: If OMDb's circuit breaker is open
+            DeadlineExceeded: If the request's time budget runs out
         """
         try:
-            response = await self.client.get(
-                self.BASE_URL,
+            response = await self._get(
                 params={
                     "apikey": self.api_key,
                     "s": query,
@@ -38,8 +63,7 @@ class TMDBService:
                     "page": page
                 }
             )
-            response.raise_for_status()
-            data = response.json()
+            data = self._parse(response)
             
             if data.get("Response") == "True":
                 # Convert OMDb format to TMDB-like format
@@ -62,8 +86,10 @@ class TMDBService:
                 }
             else:
                 return {"results": [], "total_results": 0}
+        except (UpstreamUnavailable, DeadlineExceeded):
+            raise  # Not "no results": the router answers 503/504
         except Exception as e:
-            print(f"Error searching movies: {e}")
+            logger.warning(f"Error searching movies: {e}")
             return {"results": [], "total_results": 0}
     
     async def search_tv_shows(self, query: str, page: int = 1) -> Dict:
@@ -76,10 +102,13 @@ class TMDBService:
             
         Returns:
             Dictionary with search results in TMDB-like format
+
+        Raises:
+            UpstreamUnavailable: If OMDb's circuit breaker is open
+            DeadlineExceeded: If the request's time budget runs out
         """
         try:
-            response = await self.client.get(
-                self.BASE_URL,
+            response = await self._get(
                 params={
                     "apikey": self.api_key,
                     "s": query,
@@ -87,8 +116,7 @@ class TMDBService:
                     "page": page
                 }
             )
-            response.raise_for_status()
-            data = response.json()
+            data = self._parse(response)
             
             if data.get("Response") == "True":
                 # Convert OMDb format to TMDB-like format
@@ -113,8 +141,10 @@ class TMDBService:
                 }
             else:
                 return {"results": [], "total_results": 0}
+        except (UpstreamUnavailable, DeadlineExceeded):
+            raise  # Not "no results": the router answers 503/504
         except Exception as e:
-            print(f"Error searching TV shows: {e}")
+            logger.warning(f"Error searching TV shows: {e}")
             return {"results": [], "total_results": 0}
     
     async def get_movie_details(self, imdb_id: str) -> Optional[Dict]:
@@ -126,28 +156,34 @@ class TMDBService:
             
         Returns:
             Dictionary with movie details in TMDB-like format
+
+        Raises:
+            UpstreamUnavailable: If OMDb's circuit breaker is open
+            DeadlineExceeded: If the request's time budget runs out
         """
         try:
             # If imdb_id is an integer, it's from the old system, skip
             if isinstance(imdb_id, int):
                 return None
                 
-            response = await self.client.get(
-                self.BASE_URL,
+            response = await self._get(
                 params={
                     "apikey": self.api_key,
                     "i": str(imdb_id),
                     "plot": "full"
                 }
             )
-            response.raise_for_status()
-            data = response.json()
+            data = self._parse(response)
             
             if data.get("Response") == "True":
-                return self.format_movie_for_db(data)
+                details = self.format_movie_for_db(data)
+                await executors.run_blocking(catalog.append, details)
+                return details
             return None
+        except (UpstreamUnavailable, DeadlineExceeded):
+            raise  # Not "no results": the router answers 503/504
         except Exception as e:
-            print(f"Error fetching movie details: {e}")
+            logger.warning(f"Error fetching movie details: {e}")
             return None
     
     async def get_tv_show_details(self, imdb_id: str) -> Optional[Dict]:
@@ -159,28 +195,34 @@ class TMDBService:
             
         Returns:
             Dictionary with TV show details in TMDB-like format
+
+        Raises:
+            UpstreamUnavailable: If OMDb's circuit breaker is open
+            DeadlineExceeded: If the request's time budget runs out
         """
         try:
             # If imdb_id is an integer, it's from the old system, skip
             if isinstance(imdb_id, int):
                 return None
                 
-            response = await self.client.get(
-                self.BASE_URL,
+            response = await self._get(
                 params={
                     "apikey": self.api_key,
                     "i": str(imdb_id),
                     "plot": "full"
                 }
             )
-            response.raise_for_status()
-            data = response.json()
+            data = self._parse(response)
             
             if data.get("Response") == "True":
-                return self.format_tv_show_for_db(data)
+                details = self.format_tv_show_for_db(data)
+                await executors.run_blocking(catalog.append, details)
+                return details
             return None
+        except (UpstreamUnavailable, DeadlineExceeded):
+            raise  # Not "no results": the router answers 503/504
         except Exception as e:
-            print(f"Error fetching TV show details: {e}")
+            logger.warning(f"Error fetching TV show details: {e}")
             return None
     
     async def get_trending(self, media_type: str = "all", time_window: str = "week") -> Dict:
@@ -310,6 +352,3 @@ class TMDBService:
             "id": omdb_data.get("imdbID")
         }
 
-
-# Create singleton instance
-tmdb_service = TMDBService()
@@ -0,0 +1,191 @@
+"""
+Watch history: append-only watch events plus daily/monthly rollups.
+
+CRUD writes call `watch_history.record` inside their own transaction, so an
+event and its rollup increments commit (or roll back) together with the
+change that caused them. Analytics read the rollup tables.
+
+    python -m app.services.watch_history backfill   # seed history from existing titles
+    python -m app.services.watch_history rebuild    # recompute rollups from events
+"""
+from datetime import datetime, timezone
+from typing import Optional, Tuple
+import logging
+import sys
+
+from sqlalchemy import Float, and_, case, cast, func, select, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.models.movie import ContentType, Movie, WatchStatus
+from app.models.watch_event import WatchEvent, WatchTimeDaily, WatchTimeMonthly
+
+logger = logging.getLogger(__name__)
+
+# pg_advisory_xact_lock key serializing backfills across workers
+BACKFILL_LOCK_ID = 7_310_038
+
+DEFAULT_EPISODE_MINUTES = 45.0
+
+# State captured before a change: (status, episodes_watched)
+WatchState = Tuple[Optional[WatchStatus], int]
+
+
+class WatchHistory:
+    """Records watch events and keeps the rollup tables current."""
+
+    def episode_minutes(self, movie: Movie) -> float:
+        """Average episode length, or ~45 minutes when unknown."""
+        if movie.duration and movie.total_episodes:
+            return movie.duration / movie.total_episodes
+        return DEFAULT_EPISODE_MINUTES
+
+    def state(self, movie: Optional[Movie]) -> WatchState:
+        """Capture the fields `record` compares against; None for a new title."""
+        if movie is None:
+            return (None, 0)
+        return (movie.status, movie.episodes_watched or 0)
+
+    def record(self, db: Session, movie: Movie, before: WatchState) -> Optional[WatchEvent]:
+        """
+        Append an event for the difference between `before` and the movie's
+        current state, and add it to the rollups. Does not commit.
+
+        Movies account for their runtime when completed; TV shows for the
+        episodes watched since the last event.
+
+        Args:
+            db: Session holding the caller's transaction
+            movie: Title after the change
+            before: Result of `state()` taken before the change
+
+        Returns:
+            The new event, or None if nothing relevant changed
+        """
+        old_status, old_episodes = before
+        new_episodes = movie.episodes_watched or 0
+        completions = int(movie.status == WatchStatus.COMPLETED) - int(old_status == WatchStatus.COMPLETED)
+
+        if movie.content_type == ContentType.TV_SHOW:
+            episodes_delta = new_episodes - old_episodes
+            minutes = episodes_delta * self.episode_minutes(movie)
+        else:
+            episodes_delta = 0
+            minutes = completions * (movie.duration or 0)
+
+        if movie.status == old_status and episodes_delta == 0:
+            return None
+
+        if movie.id is None:
+            db.flush()
+        occurred_at = datetime.now(timezone.utc)
+        event = WatchEvent(
+            movie_id=movie.id,
+            content_type=movie.content_type,
+            status=movie.status,
+            episodes_delta=episodes_delta,
+            minutes=minutes,
+            completions=completions,
+            occurred_at=occurred_at
+        )
+        db.add(event)
+        self._add_to_rollups(db, occurred_at, movie.content_type, minutes, completions)
+        return event
+
+    def _add_to_rollups(self, db: Session, occurred_at: datetime, content_type: ContentType,
+                        minutes: float, completions: int):
+        day = occurred_at.astimezone(timezone.utc).date()
+        for table, key, bucket in (
+            (WatchTimeDaily, "day", day),
+            (WatchTimeMonthly, "month", day.replace(day=1)),
+        ):
+            stmt = insert(table).values(
+                {key: bucket, "content_type": content_type, "minutes": minutes, "completions": completions, "events": 1}
+            )
+            db.execute(stmt.on_conflict_do_update(
+                index_elements=[key, "content_type"],
+                set_={
+                    "minutes": table.minutes + stmt.excluded.minutes,
+                    "completions": table.completions + stmt.excluded.completions,
+                    "events": table.events + 1,
+                }
+            ))
+
+    def rebuild_rollups(self, db: Session):
+        """Recompute both rollup tables from the event log. Does not commit."""
+        for table, key, unit in ((WatchTimeDaily, "day", "day"), (WatchTimeMonthly, "month", "month")):
+            bucket = cast(func.date_trunc(unit, func.timezone("UTC", WatchEvent.occurred_at)), table.__table__.c[key].type)
+            db.execute(table.__table__.delete())
+            db.execute(insert(table).from_select(
+                [key, "content_type", "minutes", "completions", "events"],
+                select(
+                    bucket,
+                    WatchEvent.content_type,
+                    func.sum(WatchEvent.minutes),
+                    func.sum(WatchEvent.completions),
+                    func.count()
+                ).group_by(bucket, WatchEvent.content_type)
+            ))
+
+    def backfill(self, db: Session) -> int:
+        """
+        Seed the history from existing titles the first time it runs: one event
+        per completed title or TV show in progress, dated at watched_at (or the
+        last update), with the same watch-time estimate analytics used before.
+        Runs once per database - does nothing when any event exists.
+
+        Returns:
+            Number of events created
+        """
+        if db.get_bind().dialect.name == "postgresql":
+            # Concurrent workers queue here; later ones then see the events and skip
+            db.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": BACKFILL_LOCK_ID})
+        if db.query(WatchEvent.id).first() is not None:
+            db.commit()
+            return 0
+
+        is_completed = Movie.status == WatchStatus.COMPLETED
+        episode_minutes = case(
+            (and_(Movie.duration > 0, Movie.total_episodes > 0), cast(Movie.duration, Float) / Movie.total_episodes),
+            else_=DEFAULT_EPISODE_MINUTES
+        )
+        is_show = Movie.content_type == ContentType.TV_SHOW
+        episodes = func.coalesce(Movie.episodes_watched, 0)
+        minutes = case(
+            (is_show, episodes * episode_minutes),
+            (is_completed, func.coalesce(Movie.duration, 0)),
+            else_=0
+        )
+        result = db.execute(insert(WatchEvent).from_select(
+            ["movie_id", "content_type", "status", "episodes_delta", "minutes", "completions", "occurred_at"],
+            select(
+                Movie.id,
+                Movie.content_type,
+                Movie.status,
+                case((is_show, episodes), else_=0),
+                minutes,
+                case((is_completed, 1), else_=0),
+                func.coalesce(Movie.watched_at, Movie.updated_at, Movie.created_at, func.now())
+            ).where(is_completed | (is_show & (episodes > 0)))
+        ))
+        self.rebuild_rollups(db)
+        db.commit()
+        logger.info(f"✅ Backfilled {result.rowcount} watch events")
+        return result.rowcount
+
+
+# Create a singleton instance
+watch_history = WatchHistory()
+
+
+if __name__ == "__main__":
+    from app.database import SessionLocal
+
+    command = sys.argv[1] if len(sys.argv) > 1 else "backfill"
+    with SessionLocal() as db:
+        if command == "rebuild":
+            watch_history.rebuild_rollups(db)
+            db.commit()
+            print("✅ Rebuilt watch-time rollups")
+        else:
+            print(f"✅ Backfilled {watch_history.backfill(db)} watch events")
@@ -0,0 +1 @@
+"""Local stand-ins for external APIs, for offline benchmarks and latency testing."""
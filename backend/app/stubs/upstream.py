@@ -0,0 +1,204 @@
+"""
+Offline stand-in for OMDb and Gemini.
+
+Replays the fixture corpus in app/stubs/fixtures (unknown OMDb queries get
+deterministic synthetic results) with injectable latency and faults:
+
+    STUB_LATENCY_MS=150 STUB_ERROR_RATE=0.05 uvicorn app.stubs.upstream:app --port 8765
+
+and point the API at it:
+
+    OMDB_BASE_URL=http://127.0.0.1:8765/omdb
+    GEMINI_BASE_URL=http://127.0.0.1:8765/gemini
+
+Faults can also be changed while running with POST /_stub/config.
+"""
+from dataclasses import asdict, dataclass, fields
+from pathlib import Path
+from typing import Dict, Optional
+import asyncio
+import hashlib
+import json
+import os
+import random
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+FIXTURES_DIR = Path(__file__).resolve().parent / "fixtures"
+
+GENRES = ["Action", "Adventure", "Comedy", "Crime", "Drama", "Fantasy", "Horror", "Mystery", "Romance", "Sci-Fi", "Thriller"]
+
+
+@dataclass
+class StubConfig:
+    """Latency and fault injection settings."""
+
+    latency_ms: float = 100.0
+    jitter_ms: float = 0.0  # Uniform extra latency in [0, jitter_ms]
+    error_rate: float = 0.0  # Fraction of calls answered with HTTP 500
+    throttle_rate: float = 0.0  # Fraction of calls throttled (OMDb quota error / Gemini 429)
+    seed: Optional[int] = None  # Seed for latency jitter and fault selection
+
+    @classmethod
+    def from_env(cls) -> "StubConfig":
+        """Read STUB_LATENCY_MS, STUB_JITTER_MS, STUB_ERROR_RATE, STUB_THROTTLE_RATE, STUB_SEED."""
+        values = {}
+        for field in fields(cls):
+            raw = os.environ.get(f"STUB_{field.name.upper()}")
+            if raw:
+                values[field.name] = int(raw) if field.name == "seed" else float(raw)
+        return cls(**values)
+
+
+def _load(name: str) -> Dict:
+    with open(FIXTURES_DIR / name, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _number(text: str) -> int:
+    """Stable pseudo-random number derived from a string."""
+    return int(hashlib.sha256(text.encode("utf-8")).hexdigest()[:8], 16)
+
+
+def _synthetic_detail(imdb_id: str) -> Dict:
+    n = _number(imdb_id)
+    return {
+        "Title": f"Stub Title {n % 100000}",
+        "Year": str(1960 + n % 65),
+        "Runtime": f"{80 + n % 90} min",
+        "Genre": ", ".join(dict.fromkeys(GENRES[(n >> shift) % len(GENRES)] for shift in (0, 5))),
+        "Director": f"Director {n % 500}",
+        "Actors": ", ".join(f"Actor {(n >> shift) % 2000}" for shift in (0, 4, 8)),
+        "Plot": "A synthetic plot for an unrecorded title.",
+        "Poster": "N/A",
+        "imdbRating": f"{(n % 60) / 10 + 4:.1f}",
+        "imdbID": imdb_id,
+        "Type": "movie",
+        "Response": "True",
+    }
+
+
+def _completion(text: str) -> Dict:
+    return {"candidates": [{"content": {"parts": [{"text": text}], "role": "model"}, "finishReason": "STOP"}]}
+
+
+def create_app(config: Optional[StubConfig] = None) -> FastAPI:
+    """Build a stub app; each app has its own config and random state."""
+    config = config or StubConfig()
+    omdb = _load("omdb.json")
+    gemini = _load("gemini.json")
+    rng = random.Random(config.seed)
+    stub = FastAPI(title="MovieMate upstream stub", docs_url=None, redoc_url=None)
+    stub.state.config = config
+
+    async def delay(scale: float = 1.0):
+        seconds = (config.latency_ms + rng.uniform(0, config.jitter_ms)) / 1000 * scale
+        if seconds > 0:
+            await asyncio.sleep(seconds)
+
+    def fault() -> Optional[str]:
+        """Pick the injected fault for this call, if any."""
+        roll = rng.random()
+        if roll < config.throttle_rate:
+            return "throttle"
+        if roll < config.throttle_rate + config.error_rate:
+            return "error"
+        return None
+
+    # ==================== OMDB ====================
+
+    @stub.get("/omdb")
+    async def omdb_api(request: Request):
+        """OMDb search (s=) and detail (i=) lookups."""
+        await delay()
+        injected = fault()
+        if injected == "throttle":
+            return JSONResponse(status_code=401, content={"Response": "False", "Error": "Request limit reached!"})
+        if injected == "error":
+            return JSONResponse(status_code=500, content={"Response": "False", "Error": "Internal error"})
+
+        params = request.query_params
+        if "i" in params:
+            return omdb["details"].get(params["i"]) or _synthetic_detail(params["i"])
+
+        query = params.get("s", "").strip().lower()
+        wanted = "series" if params.get("type") == "series" else "movie"
+        page = int(params.get("page", 1))
+        if query in omdb["search"]:
+            records = [omdb["details"][imdb_id] for imdb_id in omdb["search"][query]]
+            records = [r for r in records if r["Type"] == wanted]
+        else:
+            n = _number(f"{query}|{wanted}")
+            records = [_synthetic_detail(f"tt{(n + page * 10 + i) % 9_000_000 + 1_000_000:07d}") for i in range(10)]
+            for record in records:
+                record["Type"] = wanted
+        if not records:
+            return {"Response": "False", "Error": "Movie not found!"}
+
+        results = [{k: r[k] for k in ("Title", "Year", "imdbID", "Type", "Poster")} for r in records]
+        return {"Search": results, "totalResults": str(len(results) * 10), "Response": "True"}
+
+    # ==================== GEMINI ====================
+
+    def completion_text(payload: Dict) -> str:
+        """Pick a recorded completion deterministically from the prompt."""
+        prompt = json.dumps(payload.get("contents", []), sort_keys=True)
+        texts = gemini["completions"]
+        return texts[_number(prompt) % len(texts)]
+
+    def gemini_fault() -> Optional[JSONResponse]:
+        injected = fault()
+        if injected == "throttle":
+            return JSONResponse(
+                status_code=429,
+                headers={"Retry-After": "1"},
+                content={"error": {"code": 429, "message": "Resource has been exhausted", "status": "RESOURCE_EXHAUSTED"}}
+            )
+        if injected == "error":
+            return JSONResponse(
+                status_code=500,
+                content={"error": {"code": 500, "message": "Internal error", "status": "INTERNAL"}}
+            )
+        return None
+
+    @stub.post("/gemini:generateContent")
+    async def generate_content(request: Request):
+        await delay()
+        return gemini_fault() or _completion(completion_text(await request.json()))
+
+    @stub.post("/gemini:streamGenerateContent")
+    async def stream_generate_content(request: Request):
+        await delay(0.2)  # Time to first token
+        error = gemini_fault()
+        if error is not None:
+            return error
+        words = completion_text(await request.json()).split(" ")
+
+        async def events():
+            for i in range(0, len(words), 4):
+                await delay(0.1)
+                yield f"data: {json.dumps(_completion(' '.join(words[i:i + 4]) + ' '))}\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    # ==================== CONTROL ====================
+
+    @stub.get("/_stub/config")
+    async def get_config():
+        return asdict(config)
+
+    @stub.post("/_stub/config")
+    async def update_config(changes: Dict):
+        """Change latency/faults at runtime, e.g. {"error_rate": 0.5}."""
+        for name, value in changes.items():
+            if name in StubConfig.__dataclass_fields__:
+                setattr(config, name, value)
+        if "seed" in changes:
+            rng.seed(config.seed)
+        return asdict(config)
+
+    return stub
+
+
+app = create_app(StubConfig.from_env())
@@ -0,0 +1 @@
+"""Reproducible load benchmarks for the MovieMate API (see README.md)."""
@@ -0,0 +1,130 @@
+"""
+Import-time report for the API (what a gunicorn worker or a fresh container
+pays before it can serve a request).
+
+    python -m benchmarks.importtime --runs 5 --output importtime.json
+    python -m benchmarks.importtime --budget-ms 1500     # exit 1 if over budget
+
+Runs `python -X importtime -c "import app.main"` in fresh interpreters and
+reports the median total plus the slowest packages and modules. Modules in
+--forbid (by default the outbound API clients and httpx, which are built on
+first use) must not be imported at startup; the run fails if they are.
+"""
+from pathlib import Path
+from typing import Dict, List
+import argparse
+import json
+import re
+import statistics
+import subprocess
+import sys
+
+from benchmarks.run import git_revision
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+DEFAULT_FORBIDDEN = ["httpx", "app.services.tmdb", "app.services.gemini"]
+
+LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+
+def measure(target: str) -> List[Dict]:
+    """
+    Import `target` in a fresh interpreter.
+
+    Returns:
+        One {module, self_us, cumulative_us, depth} entry per imported module, in import order
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {target}"],
+        cwd=BACKEND_DIR, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {target} failed:\n{result.stderr[-2000:]}")
+
+    modules = []
+    for line in result.stderr.splitlines():
+        match = LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            modules.append({
+                "module": module,
+                "self_us": int(self_us),
+                "cumulative_us": int(cumulative_us),
+                "depth": len(indent) // 2,
+            })
+    return modules
+
+
+def summarize(runs: List[List[Dict]], target: str, top: int) -> Dict:
+    """Median figures over several runs."""
+    def median_of(run_values: List[Dict[str, int]]) -> Dict[str, float]:
+        names = set().union(*run_values)
+        return {name: statistics.median(values.get(name, 0) for values in run_values) for name in names}
+
+    totals = [next(m["cumulative_us"] for m in run if m["module"] == target) for run in runs]
+
+    by_package, by_module = [], []
+    for run in runs:
+        packages: Dict[str, int] = {}
+        for m in run:
+            package = m["module"].split(".")[0]
+            packages[package] = packages.get(package, 0) + m["self_us"]
+        by_package.append(packages)
+        by_module.append({m["module"]: m["self_us"] for m in run})
+
+    def ranked(values: Dict[str, float]) -> List[Dict]:
+        slowest = sorted(values.items(), key=lambda item: -item[1])[:top]
+        return [{"name": name, "ms": round(us / 1000, 1)} for name, us in slowest]
+
+    return {
+        "total_ms": round(statistics.median(totals) / 1000, 1),
+        "runs_ms": [round(total / 1000, 1) for total in totals],
+        "modules_imported": len(runs[0]),
+        "packages": ranked(median_of(by_package)),
+        "modules": ranked(median_of(by_module)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure API import time")
+    parser.add_argument("--target", default="app.main", help="Module to import")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters to measure (median reported)")
+    parser.add_argument("--top", type=int, default=15, help="Slowest packages/modules to list")
+    parser.add_argument("--budget-ms", type=float, help="Fail if the median total exceeds this")
+    parser.add_argument("--forbid", nargs="*", default=DEFAULT_FORBIDDEN, help="Modules that must not be imported")
+    parser.add_argument("--output", help="Write the JSON report here")
+    args = parser.parse_args()
+
+    runs = [measure(args.target) for _ in range(args.runs)]
+    report = {
+        "git": git_revision(),
+        "python": sys.version.split()[0],
+        "target": args.target,
+        **summarize(runs, args.target, args.top),
+    }
+    imported = {m["module"] for m in runs[0]}
+    report["forbidden_imported"] = sorted(name for name in args.forbid if name in imported)
+
+    print(f"import {args.target}: {report['total_ms']} ms median ({report['modules_imported']} modules)")
+    print("\nslowest packages (self time)")
+    for entry in report["packages"]:
+        print(f"  {entry['name']:<40}{entry['ms']:>8} ms")
+    print("\nslowest modules (self time)")
+    for entry in report["modules"]:
+        print(f"  {entry['name']:<40}{entry['ms']:>8} ms")
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2) + "\n")
+
+    failures = []
+    if report["forbidden_imported"]:
+        failures.append(f"imported at startup: {', '.join(report['forbidden_imported'])}")
+    if args.budget_ms is not None and report["total_ms"] > args.budget_ms:
+        failures.append(f"{report['total_ms']} ms is over the {args.budget_ms} ms budget")
+    if failures:
+        print("\n❌ " + "\n❌ ".join(failures))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
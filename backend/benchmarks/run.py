@@ -0,0 +1,203 @@
+"""
+Load benchmark for the main API routes.
+
+    python -m benchmarks.run --titles 10000 --concurrency 16 --duration 10 --output results.json
+
+Seeds DATABASE_URL, starts the upstream stub (app.stubs.upstream) and the
+API (uvicorn) as subprocesses, drives each scenario with concurrent clients
+and reports throughput and latency percentiles as JSON, tagged with the git
+commit so runs can be compared with benchmarks.compare.
+"""
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+SCENARIOS = {
+    "list": "/api/movies/?limit=100",
+    "search": "/api/movies/search?q=Night",
+    "stats": "/api/movies/analytics/stats",
+    "watch_time": "/api/movies/analytics/watch-time?period=monthly",
+    "surprise_me": "/api/movies/recommendations/surprise-me?count=10",
+}
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, round(pct / 100 * len(sorted_values) + 0.5) - 1))
+    return sorted_values[rank]
+
+
+def summarize(latencies: List[float], errors: int, elapsed: float) -> Dict:
+    """Throughput and latency summary in milliseconds."""
+    latencies = sorted(latencies)
+    ms = lambda seconds: round(seconds * 1000, 2)
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "mean_ms": ms(statistics.fmean(latencies)) if latencies else 0.0,
+        "p50_ms": ms(percentile(latencies, 50)),
+        "p95_ms": ms(percentile(latencies, 95)),
+        "p99_ms": ms(percentile(latencies, 99)),
+        "max_ms": ms(latencies[-1]) if latencies else 0.0,
+    }
+
+
+async def drive(client: httpx.AsyncClient, path: str, concurrency: int, duration: float, warmup: float) -> Dict:
+    """Run `concurrency` closed-loop clients against one route."""
+    latencies: List[float] = []
+    errors = 0
+    measure_from = time.perf_counter() + warmup
+    stop_at = measure_from + duration
+
+    async def worker():
+        nonlocal errors
+        while True:
+            start = time.perf_counter()
+            if start >= stop_at:
+                return
+            try:
+                response = await client.get(path)
+                failed = response.status_code >= 400
+            except httpx.HTTPError:
+                failed = True
+            if start >= measure_from:
+                if failed:
+                    errors += 1
+                else:
+                    latencies.append(time.perf_counter() - start)
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, errors, duration)
+
+
+def git_revision() -> Dict:
+    """Current commit and whether the tree has local changes."""
+    def git(*args):
+        result = subprocess.run(["git", *args], cwd=BACKEND_DIR, capture_output=True, text=True)
+        return result.stdout.strip() if result.returncode == 0 else None
+
+    return {"commit": git("rev-parse", "HEAD"), "dirty": bool(git("status", "--porcelain", "--", "."))}
+
+
+def wait_until_up(url: str, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(url, timeout=1.0).status_code < 500:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"{url} did not come up within {timeout:.0f}s")
+
+
+def start_server(app_path: str, port: int, env: Dict, workers: int = 1) -> subprocess.Popen:
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", app_path, "--port", str(port), "--workers", str(workers), "--log-level", "warning"],
+        cwd=BACKEND_DIR,
+        env=env,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the MovieMate API")
+    parser.add_argument("--titles", type=int, default=1000, help="Collection size to seed (1k to 1M)")
+    parser.add_argument("--no-seed", action="store_true", help="Benchmark the database as it is")
+    parser.add_argument("--scenarios", nargs="+", choices=sorted(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent clients per scenario")
+    parser.add_argument("--duration", type=float, default=10.0, help="Measured seconds per scenario")
+    parser.add_argument("--warmup", type=float, default=2.0, help="Unmeasured seconds before each scenario")
+    parser.add_argument("--workers", type=int, default=1, help="API worker processes")
+    parser.add_argument("--stub-latency-ms", type=float, default=100.0, help="Upstream stub response latency")
+    parser.add_argument("--stub-jitter-ms", type=float, default=0.0, help="Extra uniform upstream latency")
+    parser.add_argument("--stub-error-rate", type=float, default=0.0, help="Fraction of upstream calls failing with 500")
+    parser.add_argument("--stub-throttle-rate", type=float, default=0.0, help="Fraction of upstream calls throttled")
+    parser.add_argument("--port", type=int, default=8010)
+    parser.add_argument("--stub-port", type=int, default=8765)
+    parser.add_argument("--output", help="Write the JSON report here instead of stdout")
+    args = parser.parse_args()
+
+    stub_url = f"http://127.0.0.1:{args.stub_port}"
+    env = {
+        **os.environ,
+        "OMDB_API_KEY": os.environ.get("OMDB_API_KEY", "benchmark"),
+        "GEMINI_API_KEY": os.environ.get("GEMINI_API_KEY", "benchmark"),
+        "OMDB_BASE_URL": f"{stub_url}/omdb",
+        "GEMINI_BASE_URL": f"{stub_url}/gemini",
+        "STUB_LATENCY_MS": str(args.stub_latency_ms),
+        "STUB_JITTER_MS": str(args.stub_jitter_ms),
+        "STUB_ERROR_RATE": str(args.stub_error_rate),
+        "STUB_THROTTLE_RATE": str(args.stub_throttle_rate),
+        "STUB_SEED": "42",
+        "DEBUG": "False",
+        # The stub is local; don't let the production limits dominate the numbers
+        "OMDB_RATE_LIMIT_PER_SECOND": os.environ.get("OMDB_RATE_LIMIT_PER_SECOND", "1000"),
+        "GEMINI_RATE_LIMIT_PER_SECOND": os.environ.get("GEMINI_RATE_LIMIT_PER_SECOND", "1000"),
+    }
+
+    if not args.no_seed:
+        subprocess.run([sys.executable, "-m", "benchmarks.seed", "--titles", str(args.titles)], cwd=BACKEND_DIR, env=env, check=True)
+
+    stub = start_server("app.stubs.upstream:app", args.stub_port, env)
+    api = start_server("app.main:app", args.port, env, args.workers)
+    try:
+        wait_until_up(f"{stub_url}/omdb?s=ping")
+        wait_until_up(f"http://127.0.0.1:{args.port}/health")
+
+        async def run_all() -> Dict:
+            limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+            async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{args.port}", timeout=60.0, limits=limits) as client:
+                results = {}
+                for name in args.scenarios:
+                    results[name] = await drive(client, SCENARIOS[name], args.concurrency, args.duration, args.warmup)
+                    print(f"📊 {name}: {results[name]['throughput_rps']} req/s, p95 {results[name]['p95_ms']} ms", file=sys.stderr)
+                return results
+
+        results = asyncio.run(run_all())
+    finally:
+        for process in (api, stub):
+            process.terminate()
+            process.wait()
+
+    report = {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "git": git_revision(),
+        "python": platform.python_version(),
+        "config": {
+            "titles": None if args.no_seed else args.titles,
+            "concurrency": args.concurrency,
+            "duration_seconds": args.duration,
+            "workers": args.workers,
+            "stub_latency_ms": args.stub_latency_ms,
+            "stub_jitter_ms": args.stub_jitter_ms,
+            "stub_error_rate": args.stub_error_rate,
+            "stub_throttle_rate": args.stub_throttle_rate,
+            "database": env.get("DATABASE_URL", "").split("://", 1)[0],
+        },
+        "results": results,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+# Gunicorn server hooks (worker count, bind address etc. are passed by start.sh)
+import gc
+import os
+import subprocess
+import sys
+
+from prometheus_client import multiprocess
+
+# Import the app once in the master so workers share its read-only caches (app/preload.py).
+# Set GUNICORN_PRELOAD=false to have every worker import the app itself.
+preload_app = os.getenv("GUNICORN_PRELOAD", "true").lower() in ("1", "true", "yes")
+
+if preload_app:
+    # No collections in the master until the workers are forked, so freed cycles
+    # don't leave holes in pages the workers share; post_fork re-enables it
+    gc.disable()
+
+
+def on_starting(server):
+    """
+    Warn once if the schema is behind (start.sh migrates before gunicorn starts).
+    Runs in a subprocess so the master doesn't import the app or open a connection for it.
+    """
+    result = subprocess.run(
+        [sys.executable, "-m", "app.migrate", "check"],
+        capture_output=True, text=True, timeout=60
+    )
+    if result.returncode != 0:
+        lines = (result.stderr or result.stdout).strip().splitlines()
+        server.log.warning(lines[-1] if lines else "⚠️ Could not check the database schema revision")
+
+
+def when_ready(server):
+    """Build the shared caches in the master, after the app has been imported."""
+    if server.cfg.preload_app:
+        from app import preload
+        preload.build_all()
+
+
+def pre_fork(server, worker):
+    if server.cfg.preload_app:
+        from app import preload
+        preload.before_fork()
+
+
+def post_fork(server, worker):
+    """Give each worker its own database connections and API clients."""
+    if server.cfg.preload_app:
+        from app import preload
+        preload.after_fork()
+
+
+def child_exit(server, worker):
+    """Drop a dead worker's live gauges from the shared Prometheus metrics."""
+    multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,62 @@
+"""Baseline: the movies table as originally created by create_all
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+CONTENT_TYPES = ("MOVIE", "TV_SHOW")
+WATCH_STATUSES = ("WISHLIST", "WATCHING", "COMPLETED")
+PLATFORMS = ("NETFLIX", "PRIME_VIDEO", "DISNEY_PLUS", "HBO_MAX", "HULU", "APPLE_TV", "YOUTUBE", "THEATER", "OTHER")
+
+
+def upgrade() -> None:
+    op.create_table(
+        "movies",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("content_type", sa.Enum(*CONTENT_TYPES, name="contenttype"), nullable=False),
+        sa.Column("title", sa.String(length=255), nullable=False),
+        sa.Column("description", sa.Text(), nullable=True),
+        sa.Column("release_year", sa.Integer(), nullable=True),
+        sa.Column("genre", sa.String(length=200), nullable=True),
+        sa.Column("director", sa.String(length=200), nullable=True),
+        sa.Column("cast", sa.Text(), nullable=True),
+        sa.Column("poster_url", sa.String(length=500), nullable=True),
+        sa.Column("backdrop_url", sa.String(length=500), nullable=True),
+        sa.Column("trailer_url", sa.String(length=500), nullable=True),
+        sa.Column("platform", sa.Enum(*PLATFORMS, name="platform"), nullable=True),
+        sa.Column("status", sa.Enum(*WATCH_STATUSES, name="watchstatus"), nullable=False),
+        sa.Column("duration", sa.Integer(), nullable=True),
+        sa.Column("total_seasons", sa.Integer(), nullable=True),
+        sa.Column("total_episodes", sa.Integer(), nullable=True),
+        sa.Column("episodes_watched", sa.Integer(), nullable=True),
+        sa.Column("current_season", sa.Integer(), nullable=True),
+        sa.Column("current_episode", sa.Integer(), nullable=True),
+        sa.Column("user_rating", sa.Float(), nullable=True),
+        sa.Column("tmdb_rating", sa.Float(), nullable=True),
+        sa.Column("review", sa.Text(), nullable=True),
+        sa.Column("notes", sa.Text(), nullable=True),
+        sa.Column("tmdb_id", sa.String(length=50), nullable=True),
+        sa.Column("is_favorite", sa.Boolean(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=True),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("watched_at", sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    for column in ("id", "content_type", "title", "genre", "platform", "status", "tmdb_id", "is_favorite"):
+        op.create_index(f"ix_movies_{column}", "movies", [column])
+
+
+def downgrade() -> None:
+    op.drop_table("movies")
+    for name in ("contenttype", "watchstatus", "platform"):
+        sa.Enum(name=name).drop(op.get_bind(), checkfirst=True)
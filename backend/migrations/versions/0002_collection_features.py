@@ -0,0 +1,154 @@
+"""Review cache, recommendation snapshots, watch history, analytics cube and change feed
+
+Databases created by the old create_all startup may already have any of
+these tables, so every step is skipped when its object exists.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+CHANGE_VERSION_SQL = "pg_current_xact_id()::text::bigint"
+
+# Existing enum types from 0001
+content_type = postgresql.ENUM(name="contenttype", create_type=False)
+watch_status = postgresql.ENUM(name="watchstatus", create_type=False)
+
+
+def has_table(name: str) -> bool:
+    return sa.inspect(op.get_bind()).has_table(name)
+
+
+def has_column(table: str, column: str) -> bool:
+    return column in {c["name"] for c in sa.inspect(op.get_bind()).get_columns(table)}
+
+
+def create_index(name: str, table: str, columns, **kwargs):
+    if name not in {i["name"] for i in sa.inspect(op.get_bind()).get_indexes(table)}:
+        op.create_index(name, table, columns, **kwargs)
+
+
+def upgrade() -> None:
+    if not has_table("review_cache"):
+        op.create_table(
+            "review_cache",
+            sa.Column("cache_key", sa.String(length=64), nullable=False),
+            sa.Column("generated_text", sa.Text(), nullable=False),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=True),
+            sa.Column("expires_at", sa.DateTime(timezone=True), nullable=False),
+            sa.PrimaryKeyConstraint("cache_key"),
+        )
+    create_index("ix_review_cache_expires_at", "review_cache", ["expires_at"])
+
+    if not has_table("recommendation_snapshots"):
+        op.create_table(
+            "recommendation_snapshots",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("collection_fingerprint", sa.String(length=64), nullable=False),
+            sa.Column("candidates", sa.JSON(), nullable=False),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=True),
+            sa.PrimaryKeyConstraint("id"),
+        )
+    create_index("ix_recommendation_snapshots_id", "recommendation_snapshots", ["id"])
+    create_index("ix_recommendation_snapshots_created_at", "recommendation_snapshots", ["created_at"])
+
+    # Watch history
+    if not has_table("watch_events"):
+        op.create_table(
+            "watch_events",
+            sa.Column("id", sa.BigInteger(), nullable=False),
+            sa.Column("movie_id", sa.Integer(), nullable=False),
+            sa.Column("content_type", content_type, nullable=False),
+            sa.Column("status", watch_status, nullable=False),
+            sa.Column("episodes_delta", sa.Integer(), nullable=False),
+            sa.Column("minutes", sa.Float(), nullable=False),
+            sa.Column("completions", sa.Integer(), nullable=False),
+            sa.Column("occurred_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+            sa.PrimaryKeyConstraint("id"),
+        )
+    create_index("ix_watch_events_movie_id", "watch_events", ["movie_id"])
+    create_index("ix_watch_events_occurred_at_brin", "watch_events", ["occurred_at"], postgresql_using="brin")
+
+    for table, key in (("watch_time_daily", "day"), ("watch_time_monthly", "month")):
+        if not has_table(table):
+            op.create_table(
+                table,
+                sa.Column(key, sa.Date(), nullable=False),
+                sa.Column("content_type", content_type, nullable=False),
+                sa.Column("minutes", sa.Float(), nullable=False),
+                sa.Column("completions", sa.Integer(), nullable=False),
+                sa.Column("events", sa.Integer(), nullable=False),
+                sa.PrimaryKeyConstraint(key, "content_type"),
+            )
+
+    # Analytics cube
+    if not has_table("analytics_cube"):
+        op.create_table(
+            "analytics_cube",
+            sa.Column("period", sa.Date(), nullable=False),
+            sa.Column("content_type", content_type, nullable=False),
+            sa.Column("status", watch_status, nullable=False),
+            sa.Column("platform", sa.String(length=32), nullable=False),
+            sa.Column("genre", sa.String(length=100), nullable=False),
+            sa.Column("titles", sa.Integer(), nullable=False),
+            sa.Column("favorites", sa.Integer(), nullable=False),
+            sa.Column("rated", sa.Integer(), nullable=False),
+            sa.Column("rating_sum", sa.Float(), nullable=False),
+            sa.Column("runtime_minutes", sa.BigInteger(), nullable=False),
+            sa.Column("episodes_watched", sa.BigInteger(), nullable=False),
+            sa.PrimaryKeyConstraint("period", "content_type", "status", "platform", "genre"),
+        )
+    if not has_table("analytics_dirty_periods"):
+        op.create_table(
+            "analytics_dirty_periods",
+            sa.Column("period", sa.Date(), nullable=False),
+            sa.Column("marked_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=True),
+            sa.PrimaryKeyConstraint("period"),
+        )
+
+    # Change feed
+    op.alter_column("movies", "updated_at", server_default=sa.text("now()"))
+    if not has_column("movies", "change_version"):
+        op.add_column(
+            "movies",
+            sa.Column("change_version", sa.BigInteger(), server_default=sa.text(CHANGE_VERSION_SQL), nullable=False),
+        )
+    create_index("ix_movies_change_version", "movies", ["change_version"])
+    create_index("ix_movies_updated_at", "movies", ["updated_at"])
+    create_index("ix_movies_status_watched_at", "movies", ["status", "watched_at"])
+
+    if not has_table("movie_deletions"):
+        op.create_table(
+            "movie_deletions",
+            sa.Column("id", sa.BigInteger(), nullable=False),
+            sa.Column("movie_id", sa.Integer(), nullable=False),
+            sa.Column("change_version", sa.BigInteger(), server_default=sa.text(CHANGE_VERSION_SQL), nullable=False),
+            sa.Column("deleted_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=True),
+            sa.PrimaryKeyConstraint("id"),
+        )
+    create_index("ix_movie_deletions_change_version", "movie_deletions", ["change_version"])
+    create_index("ix_movie_deletions_deleted_at", "movie_deletions", ["deleted_at"])
+
+
+def downgrade() -> None:
+    op.drop_table("movie_deletions")
+    op.drop_index("ix_movies_status_watched_at", table_name="movies")
+    op.drop_index("ix_movies_updated_at", table_name="movies")
+    op.drop_index("ix_movies_change_version", table_name="movies")
+    op.drop_column("movies", "change_version")
+    op.alter_column("movies", "updated_at", server_default=None)
+    for table in (
+        "analytics_dirty_periods", "analytics_cube", "watch_time_monthly", "watch_time_daily",
+        "watch_events", "recommendation_snapshots", "review_cache",
+    ):
+        op.drop_table(table)
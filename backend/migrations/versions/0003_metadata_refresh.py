@@ -0,0 +1,41 @@
+"""OMDb metadata refresh: per-title refresh time and run checkpoints
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Nullable without a default: adding it doesn't rewrite the table
+    op.add_column("movies", sa.Column("metadata_refreshed_at", sa.DateTime(timezone=True), nullable=True))
+
+    op.create_table(
+        "metadata_refresh_runs",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("cutoff", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("last_movie_id", sa.Integer(), nullable=False),
+        sa.Column("checked", sa.Integer(), nullable=False),
+        sa.Column("changed", sa.Integer(), nullable=False),
+        sa.Column("failed", sa.Integer(), nullable=False),
+        sa.Column("quota_day", sa.Date(), nullable=True),
+        sa.Column("quota_calls", sa.Integer(), nullable=False),
+        sa.Column("started_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=True),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=True),
+        sa.Column("finished_at", sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("metadata_refresh_runs")
+    op.drop_column("movies", "metadata_refreshed_at")
@@ -0,0 +1,31 @@
+"""Recommendation snapshots: change feed version instead of a collection fingerprint
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Existing snapshots have no version and count as stale until recomputed
+    op.add_column("recommendation_snapshots", sa.Column("change_version", sa.BigInteger(), nullable=True))
+    op.drop_column("recommendation_snapshots", "collection_fingerprint")
+
+
+def downgrade() -> None:
+    # Fingerprints can't be rebuilt for stored candidates: drop them, the prefetcher recomputes
+    op.execute("DELETE FROM recommendation_snapshots")
+    op.add_column(
+        "recommendation_snapshots",
+        sa.Column("collection_fingerprint", sa.String(length=64), nullable=False)
+    )
+    op.drop_column("recommendation_snapshots", "change_version")
@@ -0,0 +1,22 @@
+"""Drop ix_movies_status_watched_at: watch-time analytics read the watch history rollups
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-19
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_movies_status_watched_at")
+
+
+def downgrade() -> None:
+    op.create_index("ix_movies_status_watched_at", "movies", ["status", "watched_at"])
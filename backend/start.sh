@@ -4,10 +4,24 @@
 # Use Railway's PORT or default to 8000
 PORT=${PORT:-8000}
 
+# Shared directory for per-worker Prometheus metrics, emptied on every start
+export PROMETHEUS_MULTIPROC_DIR=${PROMETHEUS_MULTIPROC_DIR:-/tmp/moviemate-metrics}
+rm -rf "$PROMETHEUS_MULTIPROC_DIR"
+mkdir -p "$PROMETHEUS_MULTIPROC_DIR"
+
+# Apply schema migrations once, before any worker starts
+echo "Applying database migrations..."
+python -m app.migrate || exit 1
+
+# Fold OMDb details appended since the last start into the shared catalog file
+python -m app.services.catalog compact || echo "Catalog compaction failed, continuing"
+
 echo "Starting Gunicorn on port $PORT..."
 
-# Start gunicorn with the Railway PORT
+# Start gunicorn with the Railway PORT (the app is preloaded in the master,
+# see gunicorn.conf.py; GUNICORN_PRELOAD=false turns that off)
 exec gunicorn app.main:app \
+    --config gunicorn.conf.py \
     --workers 4 \
     --worker-class uvicorn.workers.UvicornWorker \
     --bind "0.0.0.0:$PORT" \
@@ -0,0 +1,48 @@
+"""
+Shared test setup.
+
+Settings come from the environment as usual; the defaults below only let
+the app be imported without a .env file. Nothing here talks to OMDb or Gemini.
+Tests that need PostgreSQL use the `db` fixture, which points the app at
+`TEST_DATABASE_URL` and skips them when it is unset.
+"""
+import os
+
+import pytest
+
+TEST_DATABASE_URL = os.environ.get("TEST_DATABASE_URL")
+
+if TEST_DATABASE_URL:
+    os.environ["DATABASE_URL"] = TEST_DATABASE_URL
+    os.environ.pop("DATABASE_DIRECT_URL", None)
+    os.environ.pop("DATABASE_REPLICA_URLS", None)
+os.environ.setdefault("DATABASE_URL", "postgresql://postgres@localhost:5432/moviemate_test")
+os.environ.setdefault("OMDB_API_KEY", "test")
+os.environ.setdefault("GEMINI_API_KEY", "test")
+
+pytest_plugins = ["app.querycount"]
+
+
+@pytest.fixture(scope="session")
+def migrated_db():
+    """Migrate the test database once per session."""
+    if not TEST_DATABASE_URL:
+        pytest.skip("TEST_DATABASE_URL is not set")
+    from app import migrate
+    migrate.upgrade()
+
+
+@pytest.fixture
+def db(migrated_db):
+    """An empty, migrated test database (every table truncated before the test)."""
+    from sqlalchemy import text
+    from app import models  # noqa: F401  (registers every table on Base.metadata)
+    from app.database import Base, direct_engine
+
+    tables = ", ".join(table.name for table in Base.metadata.sorted_tables)
+    with direct_engine.begin() as connection:
+        connection.execute(text(f"TRUNCATE {tables} RESTART IDENTITY CASCADE"))
+    # TRUNCATE leaves no tombstones for the per-process snapshot to catch up on
+    from app.services.collection_snapshot import collection_snapshot
+    collection_snapshot.invalidate()
+    yield
@@ -0,0 +1,65 @@
+"""Dirty-period marking and refresh of app.services.analytics_cube."""
+from datetime import date, datetime, timedelta, timezone
+import threading
+import time
+
+from app.database import SessionLocal
+from app.models import AnalyticsDirtyPeriod, Movie
+from app.services.analytics_cube import analytics_cube, period_of
+
+
+def test_period_of_is_the_utc_month():
+    assert period_of(datetime(2026, 3, 31, 23, 30, tzinfo=timezone(timedelta(hours=-2)))) == date(2026, 4, 1)
+    assert period_of(datetime(2026, 3, 31, 23, 30)) == date(2026, 3, 1)
+
+
+def titles() -> int:
+    with SessionLocal() as session:
+        return sum(row["titles"] for row in analytics_cube.query(session, group_by=[], filters={}))
+
+
+def refresh():
+    with SessionLocal() as session:
+        analytics_cube.refresh_dirty(session)
+
+
+def test_refresh_waits_for_a_writer_holding_the_mark(db):
+    with SessionLocal() as session:
+        session.add(Movie(title="Heat"))
+        session.commit()
+    refresh()
+    with SessionLocal() as session:
+        session.query(Movie).one().is_favorite = True
+        session.commit()  # The month's mark is now committed
+    assert titles() == 1
+
+    writer = SessionLocal()
+    try:
+        writer.add(Movie(title="Ronin"))
+        writer.flush()  # Marks the same month, without committing
+        refresher = threading.Thread(target=refresh)
+        refresher.start()
+        time.sleep(0.5)
+        assert refresher.is_alive(), "the refresh claimed the mark while a writer held it"
+        writer.commit()
+        refresher.join(timeout=10)
+    finally:
+        writer.close()
+
+    assert titles() == 2
+
+
+def test_mark_after_a_refresh_claimed_it_survives(db):
+    with SessionLocal() as session:
+        session.add(Movie(title="Heat"))
+        session.commit()
+    refresh()
+    with SessionLocal() as session:
+        session.add(Movie(title="Ronin"))
+        session.commit()
+        assert session.query(AnalyticsDirtyPeriod).count() == 1
+
+    refresh()
+    assert titles() == 2
+    with SessionLocal() as session:
+        assert session.query(AnalyticsDirtyPeriod).count() == 0
@@ -0,0 +1,125 @@
+"""Binary format, append log, compaction and autocomplete of app.services.catalog."""
+import fcntl
+import os
+
+import pytest
+
+from app.config import settings
+from app.services.catalog import OMDbCatalog, _BaseFile, write_base
+
+
+def details(number: int, title: str, **fields) -> dict:
+    return {"id": f"tt{number:07d}", "title": title, "content_type": "movie", **fields}
+
+
+HEAT = details(
+    113277, "Heat", release_year=1995, tmdb_rating=8.3, duration=170,
+    genre="Crime, Drama", overview="A group of professional bank robbers…",
+)
+DARK = details(
+    903747, "Breaking Bad", content_type="tv_show", release_year=2008, tmdb_rating=9.5, genre="Drama",
+)
+
+
+@pytest.fixture
+def make_catalog(tmp_path):
+    """Catalog instances over the same directory, like two workers."""
+    return lambda: OMDbCatalog(directory=str(tmp_path))
+
+
+def test_base_file_round_trip(tmp_path):
+    amelie = details(1, "Amélie", genre="Comedy, Romance")
+    write_base(tmp_path / "catalog.bin", [DARK, HEAT, amelie])
+    base = _BaseFile(tmp_path / "catalog.bin")
+
+    assert base.count == 3
+    assert list(base.ids) == [1, 113277, 903747]
+    assert base.record(base.find(113277)) == {
+        "id": "tt0113277", "title": "Heat", "release_year": 1995, "tmdb_rating": 8.3,
+        "duration": 170, "genre": "Drama, Crime", "overview": "A group of professional bank robbers…",
+        "content_type": "movie",
+    }
+    amelie = base.record(base.find(1))
+    assert (amelie["title"], amelie["release_year"], amelie["tmdb_rating"], amelie["overview"]) == (
+        "Amélie", None, None, None
+    )
+    assert base.record(base.find(903747))["content_type"] == "tv_show"
+    assert base.find(2) == -1
+
+
+def test_empty_base_file(tmp_path):
+    write_base(tmp_path / "catalog.bin", [])
+    base = _BaseFile(tmp_path / "catalog.bin")
+    assert base.count == 0
+    assert list(base.prefix_range("a")) == []
+
+
+def test_appends_reach_other_workers_and_survive_compaction(make_catalog):
+    writer, reader = make_catalog(), make_catalog()
+    writer.append(HEAT)
+    assert writer.get("tt0113277")["title"] == "Heat"
+
+    assert reader.get("tt0113277") is None  # Lookups don't touch the files
+    reader.refresh(force=True)
+    assert reader.get("tt0113277")["title"] == "Heat"
+
+    assert writer.compact() == {"records": 1, "appended": 1, "bytes": writer.nbytes}
+    assert writer.log_path.stat().st_size == 0
+    reader.refresh(force=True)
+    assert reader.stats()["records"] == 1 and reader.stats()["recent"] == 0
+    assert reader.get("tt0113277")["tmdb_rating"] == 8.3
+
+    # Unchanged details aren't appended again
+    writer.append(HEAT)
+    assert writer.log_path.stat().st_size == 0
+
+
+def test_autocomplete_merges_recent_and_base_within_limit(make_catalog):
+    catalog = make_catalog()
+    write_base(catalog.base_path, [
+        details(1, "Heat"), details(2, "Heathers"), details(3, "Heavy"), details(4, "Up"),
+    ])
+    catalog.refresh(force=True)
+    catalog.append(details(5, "Heat 2"))
+    catalog.append(details(2, "Heathers (Director's Cut)"))  # Supersedes the base copy
+
+    titles = [match["title"] for match in catalog.autocomplete("HEA", limit=3)]
+    assert titles == ["Heat", "Heat 2", "Heathers (Director's Cut)"]
+    assert [match["title"] for match in catalog.autocomplete("hea", limit=10)] == [
+        "Heat", "Heat 2", "Heathers (Director's Cut)", "Heavy",
+    ]
+    assert catalog.autocomplete("  ", limit=10) == []
+
+
+def test_recent_records_are_capped(make_catalog, monkeypatch):
+    monkeypatch.setattr(settings, "CATALOG_MAX_RECENT", 2)
+    catalog = make_catalog()
+    for number in (1, 2, 3):
+        catalog.append(details(number, f"Title {number}"))
+
+    assert catalog.stats()["recent"] == 2
+    assert catalog.get("tt0000001") is None  # Oldest dropped; still in the log
+    assert catalog.compact()["records"] == 3
+    assert catalog.get("tt0000001")["title"] == "Title 1"
+
+
+def test_maintain_compacts_a_large_log(make_catalog, monkeypatch):
+    catalog = make_catalog()
+    catalog.append(HEAT)
+    monkeypatch.setattr(settings, "CATALOG_COMPACT_LOG_BYTES", 10_000)
+    assert catalog.maintain() is None
+
+    monkeypatch.setattr(settings, "CATALOG_COMPACT_LOG_BYTES", 10)
+    assert catalog.maintain()["records"] == 1
+    assert catalog.log_path.stat().st_size == 0
+
+
+def test_compaction_without_waiting_gives_up_when_busy(make_catalog):
+    catalog = make_catalog()
+    catalog.append(HEAT)
+    busy = catalog._lock(fcntl.LOCK_SH)
+    try:
+        assert catalog.compact(wait=False) is None
+    finally:
+        os.close(busy)
+    assert catalog.compact(wait=False)["records"] == 1
@@ -0,0 +1,57 @@
+"""Tombstone retention of the change feed (app.services.changes)."""
+from datetime import datetime, timedelta, timezone
+
+from app.database import SessionLocal
+from app.models import MovieDeletion
+from app.services.changes import change_feed
+
+
+def add_tombstone(movie_id: int, age_days: float) -> int:
+    with SessionLocal() as db:
+        tombstone = MovieDeletion(
+            movie_id=movie_id,
+            deleted_at=datetime.now(timezone.utc) - timedelta(days=age_days)
+        )
+        db.add(tombstone)
+        db.commit()
+        return tombstone.change_version
+
+
+def changes(**since) -> dict:
+    with SessionLocal() as db:
+        return change_feed.changes_since(db, **since)
+
+
+def test_prune_keeps_recent_tombstones(db):
+    add_tombstone(1, age_days=400)
+    add_tombstone(2, age_days=1)
+
+    assert change_feed.prune() == 1
+    assert change_feed.prune() == 0
+    with SessionLocal() as session:
+        assert [row.movie_id for row in session.query(MovieDeletion)] == [2]
+
+
+def test_clients_behind_the_horizon_reset(db):
+    version = changes()["version"]
+    old = add_tombstone(1, age_days=400)
+    add_tombstone(2, age_days=1)
+    change_feed.prune()
+
+    assert changes(version=version)["reset"] is True
+    assert changes(version=old)["reset"] is True
+    assert changes(since_time=datetime.now(timezone.utc) - timedelta(days=500))["reset"] is True
+
+    current = changes(version=old + 1)
+    assert current["reset"] is False
+    assert current["deletes"] == [2]
+    assert changes(since_time=datetime.now(timezone.utc) - timedelta(days=2))["deletes"] == [2]
+
+
+def test_no_reset_before_anything_is_pruned(db):
+    version = changes()["version"]
+    add_tombstone(1, age_days=400)
+
+    result = changes(version=version)
+    assert result["reset"] is False
+    assert result["deletes"] == [1]
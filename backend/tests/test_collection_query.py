@@ -0,0 +1,116 @@
+"""Faceted collection queries (app.services.collection_query) against a plain-Python count."""
+import random
+from collections import Counter
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.database import SessionLocal
+from app.models.movie import ContentType, Movie, Platform, WatchStatus
+from app.services.collection_query import FACETS, MovieFilters, collection_query, parse_sort
+
+GENRES = ["Drama", "Crime", "Comedy", "Sci-Fi", "Horror"]
+
+
+def compile_sql(clauses) -> str:
+    return ", ".join(str(clause.compile(dialect=postgresql.dialect())) for clause in clauses)
+
+
+def test_sort_keys_become_order_by_clauses():
+    assert compile_sql(parse_sort("-user_rating, title")) == (
+        "movies.user_rating DESC NULLS LAST, lower(movies.title) ASC NULLS LAST, movies.id DESC"
+    )
+    assert compile_sql(parse_sort("")) == "movies.id DESC"
+    with pytest.raises(ValueError, match="Unknown sort key 'budget'"):
+        parse_sort("-budget")
+
+
+def genre_names(movie: Movie):
+    return {name.strip() for name in (movie.genre or "").split(",") if name.strip()}
+
+
+def matches(movie: Movie, filters: MovieFilters, ignore=None) -> bool:
+    """The filters, applied in Python; `ignore` leaves one facet's own filter out."""
+    facet_checks = {
+        "content_type": not filters.content_type or movie.content_type in filters.content_type,
+        "status": not filters.status or movie.status in filters.status,
+        "platform": not filters.platform or movie.platform in filters.platform,
+        "genre": not filters.genre or bool(
+            {name.lower() for name in genre_names(movie)} & {name.lower() for name in filters.genre}
+        ),
+        "favorite": filters.favorite is None or bool(movie.is_favorite) == filters.favorite,
+    }
+    if not all(ok for name, ok in facet_checks.items() if name != ignore):
+        return False
+    year, rating = movie.release_year, movie.user_rating
+    return (
+        (filters.year_min is None or (year is not None and year >= filters.year_min))
+        and (filters.rating_min is None or (rating is not None and rating >= filters.rating_min))
+        and (not filters.q or any(
+            filters.q.lower() in (text or "").lower() for text in (movie.title, movie.genre, movie.director)
+        ))
+    )
+
+
+def expected_facets(movies, filters: MovieFilters):
+    facets = {}
+    for name in FACETS:
+        selected = [movie for movie in movies if matches(movie, filters, ignore=name)]
+        if name == "genre":
+            counts = Counter(genre for movie in selected for genre in genre_names(movie))
+        elif name == "favorite":
+            counts = Counter(bool(movie.is_favorite) for movie in selected)
+        else:
+            counts = Counter(getattr(movie, name) for movie in selected)
+        facets[name] = dict(counts)
+    return sum(matches(movie, filters) for movie in movies), facets
+
+
+@pytest.fixture
+def movies(db):
+    rng = random.Random(42)
+    rows = []
+    for i in range(80):
+        genres = rng.sample(GENRES, rng.randint(0, 3))
+        if genres and rng.random() < 0.1:
+            genres.append(f" {genres[0]} ")  # Listed twice, with stray spaces
+        rows.append(Movie(
+            title=f"Title {i}",
+            content_type=rng.choice(list(ContentType)),
+            status=rng.choice(list(WatchStatus)),
+            platform=rng.choice([None, Platform.NETFLIX, Platform.HULU, Platform.THEATER]),
+            genre=",".join(genres) or None,
+            is_favorite=rng.choice([None, False, True]),
+            release_year=rng.choice([None, 1985, 1999, 2010, 2023]),
+            user_rating=rng.choice([None, 4.0, 7.5, 9.0]),
+        ))
+    with SessionLocal() as session:
+        session.add_all(rows)
+        session.commit()
+        for row in rows:
+            session.refresh(row)
+        session.expunge_all()
+    return rows
+
+
+@pytest.mark.parametrize("filters", [
+    MovieFilters(),
+    MovieFilters(status=[WatchStatus.COMPLETED, WatchStatus.WATCHING]),
+    MovieFilters(genre=["crime", "sci-fi"], favorite=True),
+    MovieFilters(content_type=[ContentType.TV_SHOW], platform=[Platform.NETFLIX], year_min=1999),
+    MovieFilters(genre=["Drama"], rating_min=7, q="1"),
+], ids=["none", "status", "genre-favorite", "type-platform-year", "mixed"])
+def test_facets_match_a_plain_count(movies, filters):
+    with SessionLocal() as session:
+        total, facets = collection_query.facets(session, filters)
+        result = collection_query.search(session, filters, limit=1000, with_facets=False)
+
+    expected_total, expected = expected_facets(movies, filters)
+    assert total == expected_total == result["total"]
+    assert {name: {f["value"]: f["count"] for f in values} for name, values in facets.items()} == expected
+    for values in facets.values():
+        counts = [facet["count"] for facet in values]
+        assert counts == sorted(counts, reverse=True)
+    assert {movie.id for movie in result["items"]} == {
+        movie.id for movie in movies if matches(movie, filters)
+    }
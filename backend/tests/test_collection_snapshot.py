@@ -0,0 +1,124 @@
+"""The per-process collection snapshot catches up through the change feed."""
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.crud.movie import movie_crud
+from app.database import SessionLocal
+from app.models import MovieDeletion
+from app.models.movie import Movie
+from app.services.changes import change_feed
+from app.services.collection_snapshot import RECORD_COLUMNS, CollectionSnapshot, MovieRecord
+
+
+@pytest.fixture
+def snapshot(db, monkeypatch):
+    """A fresh snapshot that counts full reloads."""
+    snapshot = CollectionSnapshot()
+    snapshot.reloads = 0
+    reload = snapshot._reload
+
+    def counting_reload(session):
+        snapshot.reloads += 1
+        reload(session)
+
+    monkeypatch.setattr(snapshot, "_reload", counting_reload)
+    return snapshot
+
+
+def add(session, title: str, **fields) -> Movie:
+    movie = Movie(title=title, **fields)
+    session.add(movie)
+    session.commit()
+    return movie
+
+
+def titles(state) -> list:
+    return [(record.id, record.title) for record in state.records]
+
+
+def test_records_take_columns_in_slot_order():
+    assert [column.key for column in RECORD_COLUMNS] == list(MovieRecord.__slots__)
+    record = MovieRecord(*range(len(MovieRecord.__slots__)))
+    assert (record.id, record.title, record.tmdb_id) == (0, 1, len(MovieRecord.__slots__) - 1)
+    assert not hasattr(record, "__dict__")
+
+
+def test_catch_up_applies_inserts_updates_and_deletes(snapshot):
+    with SessionLocal() as session:
+        heat, ronin, _ = (add(session, title) for title in ("Heat", "Ronin", "Thief"))
+        first = snapshot.state(session)
+        assert titles(first) == [(1, "Heat"), (2, "Ronin"), (3, "Thief")]
+
+        heat.user_rating = 9.0
+        session.commit()
+        add(session, "Collateral")
+        movie_crud.delete(session, ronin.id)
+        state = snapshot.state(session)
+
+    assert titles(state) == [(1, "Heat"), (3, "Thief"), (4, "Collateral")]
+    assert state.records[0].user_rating == 9.0
+    assert snapshot.reloads == 1
+    assert state.generation > first.generation
+    assert state.last_change > first.last_change
+
+
+def test_unchanged_collection_keeps_its_records(snapshot, max_queries):
+    with SessionLocal() as session:
+        add(session, "Heat")
+        first = snapshot.state(session)
+        # Current version, tombstones, changed rows and the pruning horizon
+        with max_queries(4):
+            second = snapshot.state(session)
+
+    assert second.records is first.records
+    assert (second.generation, second.last_change) == (first.generation, first.last_change)
+    assert snapshot.reloads == 1
+
+
+def test_titles_with_lower_ids_keep_id_order(snapshot):
+    with SessionLocal() as session:
+        add(session, "Heat", id=10)
+        snapshot.state(session)
+        add(session, "Ronin", id=5)
+        state = snapshot.state(session)
+
+    assert titles(state) == [(5, "Ronin"), (10, "Heat")]
+    assert snapshot.reloads == 1
+
+
+def test_too_many_changes_reload(snapshot, monkeypatch):
+    monkeypatch.setattr(CollectionSnapshot, "MAX_DELTA", 2)
+    with SessionLocal() as session:
+        add(session, "Heat")
+        snapshot.state(session)
+        for title in ("Ronin", "Thief", "Collateral"):
+            add(session, title)
+        state = snapshot.state(session)
+
+    assert len(state.records) == 4
+    assert snapshot.reloads == 2
+
+
+def test_snapshot_behind_the_pruning_horizon_reloads(snapshot):
+    with SessionLocal() as session:
+        add(session, "Heat")
+        snapshot.state(session)
+        # A delete this snapshot never saw, pruned before it looked again
+        session.add(MovieDeletion(movie_id=99, deleted_at=datetime.now(timezone.utc) - timedelta(days=400)))
+        session.commit()
+    assert change_feed.prune() == 1
+
+    with SessionLocal() as session:
+        state = snapshot.state(session)
+    assert titles(state) == [(1, "Heat")]
+    assert snapshot.reloads == 2
+
+
+def test_invalidate_reloads(snapshot):
+    with SessionLocal() as session:
+        add(session, "Heat")
+        snapshot.state(session)
+        snapshot.invalidate()
+        assert titles(snapshot.state(session)) == [(1, "Heat")]
+    assert snapshot.reloads == 2
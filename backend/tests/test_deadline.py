@@ -0,0 +1,68 @@
+"""Request time budgets (app.deadline and the request_deadline middleware)."""
+import pytest
+from fastapi.testclient import TestClient
+
+from app import deadline
+from app.config import settings
+from app.deadline import DeadlineExceeded, deadline_scope
+from app.main import app
+from app.services import get_tmdb_service
+from app.services.tmdb import TMDBService
+
+
+def test_no_deadline_outside_a_scope():
+    assert deadline.remaining() is None
+    assert not deadline.expired(margin=10)
+    assert deadline.timeout(8.0) == 8.0
+
+
+def test_timeout_is_capped_by_the_remaining_budget():
+    with deadline_scope(2.0):
+        assert deadline.timeout(8.0) == pytest.approx(2.0, abs=0.1)
+        assert deadline.timeout(0.5) == 0.5
+        assert deadline.expired(margin=5)
+        assert not deadline.expired()
+        with deadline_scope(None):  # Background work started from a request
+            assert deadline.remaining() is None
+    assert deadline.remaining() is None
+
+
+def test_spent_budget_raises():
+    with deadline_scope(0):
+        assert deadline.remaining() == 0
+        assert deadline.expired()
+        with pytest.raises(DeadlineExceeded, match="omdb call"):
+            deadline.timeout(8.0, "omdb call")
+
+
+@pytest.fixture
+def observed_budget(monkeypatch):
+    """Budget left when the endpoint reaches OMDb (the call itself fails with a 504)."""
+    service = TMDBService()
+    seen = []
+
+    async def observe(params):
+        seen.append(deadline.remaining())
+        raise DeadlineExceeded("omdb call")
+
+    monkeypatch.setattr(service, "_get", observe)
+    app.dependency_overrides[get_tmdb_service] = lambda: service
+    yield seen
+    app.dependency_overrides.pop(get_tmdb_service, None)
+
+
+@pytest.mark.parametrize("header, expected", [
+    (None, settings.REQUEST_TIMEOUT_SECONDS),
+    ("5", 5.0),
+    ("0", 0.1),
+    ("-3", 0.1),
+    ("100000", settings.REQUEST_TIMEOUT_MAX_SECONDS),
+    ("soon", settings.REQUEST_TIMEOUT_SECONDS),
+])
+def test_request_timeout_header_is_clamped(observed_budget, header, expected):
+    headers = {"X-Request-Timeout": header} if header is not None else {}
+    response = TestClient(app).get("/api/movies/tmdb/movie/tt0113277", headers=headers)
+
+    assert response.status_code == 504
+    assert response.json()["detail"] == "Time budget exhausted before omdb call"
+    assert observed_budget == [pytest.approx(expected, abs=0.1)]
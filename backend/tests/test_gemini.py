@@ -0,0 +1,164 @@
+"""Gemini review streaming (app.services.gemini)."""
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from app.services import gemini
+from app.services.gemini import GeminiService
+from app.services.resilience import CircuitBreaker, gemini_upstream
+
+
+def sse(*texts: str) -> bytes:
+    events = (
+        json.dumps({"candidates": [{"content": {"parts": [{"text": text}]}}]})
+        for text in texts
+    )
+    return "".join(f"data: {event}\n\n" for event in events).encode()
+
+
+class BrokenStream(httpx.AsyncByteStream):
+    """A body that fails after its first chunk."""
+
+    async def __aiter__(self):
+        yield sse("Tense ")
+        raise httpx.ReadError("connection reset")
+
+
+class GatedStream(httpx.AsyncByteStream):
+    """A body that sends its first chunk, then the rest once `opened` is set."""
+
+    def __init__(self, opened: asyncio.Event, first: str, rest: str):
+        self.opened = opened
+        self.first = first
+        self.rest = rest
+        self.closed = False
+
+    async def __aiter__(self):
+        yield sse(self.first)
+        await self.opened.wait()
+        yield sse(self.rest)
+
+    async def aclose(self):
+        self.closed = True
+
+
+@pytest.fixture
+def breaker(monkeypatch):
+    breaker = CircuitBreaker(failure_threshold=0.5, min_calls=100, window=100, open_seconds=30)
+    monkeypatch.setattr(gemini_upstream, "breaker", breaker)
+    cache = {}
+    monkeypatch.setattr(gemini.review_cache, "get", cache.get)
+    monkeypatch.setattr(gemini.review_cache, "set", cache.__setitem__)
+    breaker.cache = cache
+    return breaker
+
+
+def make_service(handler) -> GeminiService:
+    service = GeminiService()
+    service.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return service
+
+
+def review_stream(service: GeminiService):
+    return service.stream_review_summary("Heat", "A heist.", "Loved it", 9.0)
+
+
+async def collect(service: GeminiService) -> str:
+    chunks = []
+    async for text in review_stream(service):
+        chunks.append(text)
+    return "".join(chunks)
+
+
+def test_completed_stream_is_one_success(breaker):
+    service = make_service(lambda request: httpx.Response(200, content=sse("Tense ", "and smart.")))
+
+    assert asyncio.run(collect(service)) == "Tense and smart."
+    assert list(breaker._outcomes) == [True]
+
+
+def test_stream_failing_midway_is_one_failure(breaker):
+    service = make_service(lambda request: httpx.Response(200, stream=BrokenStream()))
+
+    with pytest.raises(httpx.ReadError):
+        asyncio.run(collect(service))
+    assert list(breaker._outcomes) == [False]
+
+
+def test_error_status_is_one_failure(breaker):
+    service = make_service(lambda request: httpx.Response(503, text="overloaded"))
+
+    with pytest.raises(httpx.HTTPStatusError):
+        asyncio.run(collect(service))
+    assert list(breaker._outcomes) == [False]
+
+
+def test_slot_is_released_before_a_slow_client_has_read_the_stream(breaker):
+    service = make_service(lambda request: httpx.Response(200, content=sse("Tense ", "and smart.")))
+    service._concurrency = asyncio.Semaphore(1)
+
+    async def scenario():
+        stream = review_stream(service)
+        assert await stream.__anext__() == "Tense "
+        # The client hasn't asked for the second chunk, but the upstream body is read and cached
+        for _ in range(100):
+            if breaker.cache:
+                break
+            await asyncio.sleep(0.01)
+        assert not service._concurrency.locked()
+        assert await stream.__anext__() == "and smart."
+        await stream.aclose()
+
+    asyncio.run(scenario())
+    assert list(breaker.cache.values()) == ["Tense and smart."]
+
+
+def test_identical_streams_share_one_upstream_call(breaker):
+    opened = asyncio.Event()
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(200, stream=GatedStream(opened, "Tense ", "and smart."))
+
+    service = make_service(handler)
+
+    async def scenario():
+        first = asyncio.create_task(collect(service))
+        second = asyncio.create_task(collect(service))
+        await asyncio.sleep(0.1)
+        opened.set()
+        return await asyncio.gather(first, second)
+
+    assert asyncio.run(scenario()) == ["Tense and smart.", "Tense and smart."]
+    assert len(requests) == 1
+    assert service._inflight_streams == {}
+
+
+def test_upstream_is_closed_once_every_follower_has_gone(breaker):
+    opened = asyncio.Event()
+    bodies = []
+
+    def handler(request):
+        bodies.append(GatedStream(opened, "Tense ", "and smart."))
+        return httpx.Response(200, stream=bodies[-1])
+
+    service = make_service(handler)
+
+    async def scenario():
+        leaving, staying = review_stream(service), review_stream(service)
+        assert await leaving.__anext__() == "Tense "
+        assert await staying.__anext__() == "Tense "
+        await leaving.aclose()
+        await asyncio.sleep(0.05)
+        assert not bodies[0].closed  # Still followed by one request
+
+        await staying.aclose()
+        await asyncio.sleep(0.05)
+        assert bodies[0].closed
+        assert service._inflight_streams == {}
+
+    asyncio.run(scenario())
+    assert breaker.cache == {}  # The partial text isn't cached
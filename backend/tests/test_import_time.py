@@ -0,0 +1,20 @@
+"""Startup cost of `import app.main`, measured by benchmarks/importtime.py."""
+import subprocess
+import sys
+
+from benchmarks.importtime import BACKEND_DIR, DEFAULT_FORBIDDEN
+
+# About twice the usual median, so machine noise passes and an eagerly
+# imported heavy dependency (or an API client built at import) does not
+IMPORT_BUDGET_MS = 3000
+
+
+def test_import_stays_within_budget():
+    result = subprocess.run(
+        [
+            sys.executable, "-m", "benchmarks.importtime", "--runs", "3",
+            "--budget-ms", str(IMPORT_BUDGET_MS), "--forbid", *DEFAULT_FORBIDDEN,
+        ],
+        cwd=BACKEND_DIR, capture_output=True, text=True
+    )
+    assert result.returncode == 0, result.stdout + result.stderr
@@ -0,0 +1,34 @@
+"""Per-worker startup and shutdown run through the app's lifespan handler."""
+import sys
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import main
+
+
+@pytest.fixture
+def calls(monkeypatch):
+    """Record starting and stopping the background workers instead of running them."""
+    calls = []
+
+    async def stop():
+        calls.append("stop")
+
+    monkeypatch.setattr(main, "start_background_workers", lambda: calls.append("start"))
+    monkeypatch.setattr(main, "stop_background_workers", stop)
+    return calls
+
+
+def test_lifespan_starts_and_stops_the_background_workers(calls):
+    with TestClient(main.app) as client:
+        assert calls == ["start"]
+        assert client.get("/").status_code == 200
+    assert calls == ["start", "stop"]
+
+
+def test_workers_do_not_check_the_schema_revision(calls, monkeypatch):
+    """The migrate check runs once, in the gunicorn master (gunicorn.conf.py)."""
+    monkeypatch.delitem(sys.modules, "app.migrate", raising=False)
+    with TestClient(main.app):
+        assert "app.migrate" not in sys.modules
@@ -0,0 +1,126 @@
+"""Live collection updates: bounded buffers, resync and delivery on commit."""
+import asyncio
+import threading
+
+from sqlalchemy import text
+
+from app.config import settings
+from app.crud.movie import movie_crud
+from app.database import SessionLocal, direct_engine
+from app.schemas.movie import MovieCreate
+from app.services.live_updates import CHANNEL, RESYNC, LiveUpdates, Subscription, live_updates
+
+
+def change(movie_id, op="upsert"):
+    return {"op": op, "id": movie_id, "version": None}
+
+
+def test_overflow_replaces_the_backlog_with_one_resync():
+    async def main():
+        subscription = Subscription(maxsize=3)
+        for movie_id in range(5):
+            subscription.offer(change(movie_id))
+        # The fourth event overflowed; the fifth is queued behind the resync
+        assert subscription.overflows == 1
+        assert await subscription.next_batch(0.1) == [RESYNC, change(4)]
+        assert await subscription.next_batch(0.01) is None
+
+    asyncio.run(main())
+
+
+def test_subscribers_are_capped_per_worker(monkeypatch):
+    monkeypatch.setattr(settings, "LIVE_UPDATES_MAX_CONNECTIONS", 2)
+    hub = LiveUpdates()
+    first, second = hub.subscribe(), hub.subscribe()
+    assert hub.subscribe() is None
+    hub.unsubscribe(first)
+    assert hub.subscribe() is not None
+    assert second is not None
+
+
+def test_slow_subscriber_does_not_hold_back_the_others(monkeypatch):
+    monkeypatch.setattr(settings, "LIVE_UPDATES_BUFFER", 2)
+    monkeypatch.setattr(settings, "LIVE_UPDATES_BACKEND", "memory")
+    hub = LiveUpdates()
+
+    async def main():
+        slow, fast = hub.subscribe(), hub.subscribe()
+        received = []
+        for movie_id in range(6):
+            hub.broadcast(change(movie_id))
+            received.extend(await fast.next_batch(0.1))
+        assert received == [change(movie_id) for movie_id in range(6)]
+        assert await slow.next_batch(0.1) == [RESYNC, change(5)]
+        assert hub.stats()["overflows"] == 2
+
+    asyncio.run(main())
+
+
+def test_memory_backend_delivers_only_committed_events(monkeypatch):
+    monkeypatch.setattr(settings, "LIVE_UPDATES_BACKEND", "memory")
+
+    async def main():
+        live_updates.start()
+        subscription = live_updates.subscribe()
+        try:
+            def write():
+                # No statements are run, so no database is needed
+                with SessionLocal() as session:
+                    session.begin()
+                    live_updates.publish(session, "upsert", 1)
+                    session.rollback()
+                    session.begin()
+                    live_updates.publish(session, "delete", 2)
+                    live_updates.publish_many(session, "upsert", [3, 4])
+                    session.commit()
+
+            thread = threading.Thread(target=write)  # Like a sync endpoint in the threadpool
+            thread.start()
+            await asyncio.get_running_loop().run_in_executor(None, thread.join)
+            assert await subscription.next_batch(1) == [change(2, "delete"), change(3), change(4)]
+        finally:
+            live_updates.unsubscribe(subscription)
+            await live_updates.stop()
+
+    asyncio.run(main())
+
+
+async def wait_for_listener(timeout: float = 5):
+    """Block until the listener's LISTEN has run (notifications sent earlier are not delivered)."""
+    def listening():
+        with direct_engine.connect() as connection:
+            return connection.execute(text(
+                "SELECT count(*) FROM pg_stat_activity WHERE query = :query"
+            ), {"query": f"LISTEN {CHANNEL}"}).scalar() > 0
+
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while not await loop.run_in_executor(None, listening):
+        assert loop.time() < deadline, "listener did not connect"
+        await asyncio.sleep(0.05)
+
+
+def test_notifications_reach_subscribers_after_commit(db, monkeypatch):
+    monkeypatch.setattr(settings, "LIVE_UPDATES_BACKEND", "postgres")
+
+    async def main():
+        live_updates.start()
+        subscription = live_updates.subscribe()
+        try:
+            await wait_for_listener()
+
+            def write():
+                with SessionLocal() as session:
+                    live_updates.publish(session, "delete", 0)
+                    session.rollback()
+                    return movie_crud.create(session, MovieCreate(title="Heat")).id
+
+            movie_id = await asyncio.get_running_loop().run_in_executor(None, write)
+            batch = await subscription.next_batch(5)
+            assert [(event["op"], event["id"]) for event in batch] == [("upsert", movie_id)]
+            assert isinstance(batch[0]["version"], int)
+        finally:
+            live_updates.unsubscribe(subscription)
+            await live_updates.stop()
+
+    asyncio.run(main())
@@ -0,0 +1,33 @@
+"""Refresh lock safety of app.services.metadata_refresh."""
+import asyncio
+
+import pytest
+
+from app.config import settings
+from app.services.metadata_refresh import MetadataRefresh
+
+
+@pytest.mark.parametrize("pool_mode, direct_url, safe", [
+    ("session", None, True),
+    ("transaction", None, False),
+    ("transaction", "postgresql://primary/moviemate", True),
+])
+def test_can_lock(monkeypatch, pool_mode, direct_url, safe):
+    monkeypatch.setattr(settings, "DB_POOL_MODE", pool_mode)
+    monkeypatch.setattr(settings, "DATABASE_DIRECT_URL", direct_url)
+    assert MetadataRefresh().can_lock() is safe
+
+
+def test_no_scheduler_or_run_through_pgbouncer(monkeypatch):
+    monkeypatch.setattr(settings, "METADATA_REFRESH_ENABLED", True)
+    monkeypatch.setattr(settings, "DB_POOL_MODE", "transaction")
+    monkeypatch.setattr(settings, "DATABASE_DIRECT_URL", None)
+    refresh = MetadataRefresh()
+
+    async def scenario():
+        refresh.start()
+        assert refresh._task is None
+        with pytest.raises(RuntimeError, match="DATABASE_DIRECT_URL"):
+            await refresh.run(tmdb_service=None)
+
+    asyncio.run(scenario())
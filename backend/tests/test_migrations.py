@@ -0,0 +1,12 @@
+"""The migrated schema matches the models (tables, columns and indexes)."""
+from alembic.autogenerate import compare_metadata
+from alembic.runtime.migration import MigrationContext
+
+from app import models  # noqa: F401  (registers every table on Base.metadata)
+from app.database import Base, direct_engine
+
+
+def test_migrations_match_the_models(migrated_db):
+    with direct_engine.connect() as connection:
+        differences = compare_metadata(MigrationContext.configure(connection), Base.metadata)
+    assert differences == []
@@ -0,0 +1,77 @@
+"""Staleness and the duplicate filter of the recommendation snapshot."""
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+
+from app.crud.movie import movie_crud
+from app.database import SessionLocal
+from app.models import Movie
+from app.services.changes import change_feed
+from app.services.collection_snapshot import CollectionState, MovieRecord, collection_snapshot
+from app.services.prefetch import RecommendationPrefetcher
+
+CANDIDATES = [
+    {"id": "tt0113277", "title": "Heat"},
+    {"id": "tt0119654", "title": "Ronin"},
+    {"id": "tt0110413", "title": "LÉON"},
+]
+
+
+def record(movie_id: int, title: str, tmdb_id=None) -> MovieRecord:
+    values = dict(id=movie_id, title=title, tmdb_id=tmdb_id)
+    return MovieRecord(*(values.get(name) for name in MovieRecord.__slots__))
+
+
+def snapshot(version, age=timedelta(0)):
+    return SimpleNamespace(change_version=version, created_at=datetime.now(timezone.utc) - age)
+
+
+@pytest.mark.parametrize("last_change, version, age, stale", [
+    (99, 100, timedelta(0), False),
+    (100, 100, timedelta(0), True),   # Changed by a transaction in flight when the snapshot was taken
+    (150, 100, timedelta(0), True),
+    (0, None, timedelta(0), True),    # Stored before snapshots had versions
+    (99, 100, timedelta(days=2), True),
+])
+def test_staleness_compares_change_versions(last_change, version, age, stale):
+    state = CollectionState([], generation=1, last_change=last_change)
+    assert RecommendationPrefetcher().is_stale(snapshot(version, age), state) is stale
+
+
+def test_membership_is_built_once_per_generation():
+    prefetcher = RecommendationPrefetcher()
+    records = [record(1, "Heat"), record(2, "Léon", tmdb_id="tt0110413")]
+
+    first = prefetcher.filter_existing(CANDIDATES, CollectionState(records, 1, 10))
+    membership = prefetcher._membership
+    assert [c["title"] for c in first] == ["Ronin"]
+
+    # Same generation: the sets aren't rebuilt, even from a different list
+    assert prefetcher.filter_existing(CANDIDATES, CollectionState([], 1, 10)) == first
+    assert prefetcher._membership is membership
+
+    assert prefetcher.filter_existing(CANDIDATES, CollectionState([], 2, 12)) == CANDIDATES
+
+
+def test_snapshot_goes_stale_when_the_collection_changes(db):
+    prefetcher = RecommendationPrefetcher()
+    with SessionLocal() as session:
+        heat = Movie(title="Heat", tmdb_id="tt0113277", genre="Crime")
+        session.add(heat)
+        session.commit()
+        prefetcher.store(session, change_feed.current_version(session), CANDIDATES)
+
+        candidates, stale = prefetcher.cached(session, collection_snapshot.state(session))
+        assert [c["title"] for c in candidates] == ["Ronin", "LÉON"] and not stale
+
+        session.add(Movie(title="Ronin", genre="Action"))
+        session.commit()
+        candidates, stale = prefetcher.cached(session, collection_snapshot.state(session))
+        assert [c["title"] for c in candidates] == ["LÉON"] and stale
+
+        prefetcher.store(session, change_feed.current_version(session), CANDIDATES)
+        assert not prefetcher.cached(session, collection_snapshot.state(session))[1]
+        movie_crud.delete(session, heat.id)
+        candidates, stale = prefetcher.cached(session, collection_snapshot.state(session))
+        assert [c["title"] for c in candidates] == ["Heat", "LÉON"] and stale
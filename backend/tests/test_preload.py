@@ -0,0 +1,83 @@
+"""Shared caches built in the gunicorn master and inherited by the workers."""
+import gc
+import json
+import os
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import preload, services
+from app.main import app, openapi_schema
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    """An empty cache registry, so tests don't build the app's real caches."""
+    caches = {}
+    monkeypatch.setattr(preload, "_caches", caches)
+    return caches
+
+
+def test_cache_is_built_once_on_first_use(registry):
+    builds = []
+
+    @preload.shared_cache("vocabulary")
+    def vocabulary():
+        builds.append(1)
+        return b"crime\ndrama"
+
+    assert registry == {"vocabulary": vocabulary}
+    assert not vocabulary.built
+    assert vocabulary.get() is vocabulary.get()
+    assert builds == [1]
+    assert preload.stats()["vocabulary"] == {
+        "built": True, "inherited": False, "build_ms": pytest.approx(0, abs=50), "bytes": 11,
+    }
+
+
+def test_build_all_skips_built_caches(registry):
+    builds = []
+    first = preload.shared_cache("first")(lambda: builds.append("first"))
+    preload.shared_cache("second")(lambda: builds.append("second"))
+    first.get()
+
+    preload.build_all()
+    assert builds == ["first", "second"]
+
+
+def test_forked_worker_inherits_the_master_copy(registry):
+    builds = []
+    cache = preload.shared_cache("numbers")(lambda: builds.append(os.getpid()) or tuple(range(100)))
+    preload.build_all()
+
+    pid = os.fork()
+    if pid == 0:
+        # Worker: the master's value, without building it again
+        inherited = cache.stats()["inherited"] and cache.get() == tuple(range(100)) and len(builds) == 1
+        os._exit(0 if inherited else 1)
+    _, status = os.waitpid(pid, 0)
+    assert os.waitstatus_to_exitcode(status) == 0
+
+
+def test_after_fork_drops_clients_and_enables_the_collector(monkeypatch):
+    monkeypatch.setattr(services, "_instances", {"tmdb": object()})
+    gc.disable()
+    try:
+        preload.after_fork()
+        assert services._instances == {}
+        assert gc.isenabled()
+    finally:
+        gc.enable()
+
+
+def test_openapi_document_is_served_pre_serialized(monkeypatch):
+    monkeypatch.setattr(openapi_schema, "built_by_pid", None)
+    response = TestClient(app).get("/openapi.json")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/json"
+    assert response.json()["info"]["title"] == "MovieMate API"
+    assert isinstance(openapi_schema.value, bytes) and response.content == openapi_schema.value
+    # Only the serialized document is kept
+    assert app.openapi_schema is None
+    assert json.loads(openapi_schema.value) == app.openapi()
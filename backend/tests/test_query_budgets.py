@@ -0,0 +1,100 @@
+"""
+SQL statement budgets of the movie endpoints.
+
+A budget counts every statement the request sends, including the reload
+after a commit. Connections carry the request's statement timeout from the
+moment they connect, so ordinary transactions add no SET LOCAL. When a
+change adds a query on purpose, raise the budget in the same commit; an N+1
+shows up here as a count that grows with the collection.
+"""
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services.prefetch import recommendation_prefetcher
+
+
+@pytest.fixture
+def client(db, monkeypatch):
+    """API client without lifespan events, so no background worker issues queries."""
+    async def no_warm_up():
+        return None
+
+    # Recomputing recommendations is background work, not part of a request's budget
+    monkeypatch.setattr(recommendation_prefetcher, "warm_up", no_warm_up)
+    return TestClient(app)
+
+
+def add_movie(client: TestClient, title: str, **fields) -> dict:
+    response = client.post("/api/movies/", json={"title": title, **fields})
+    assert response.status_code == 201, response.text
+    return response.json()
+
+
+@pytest.fixture
+def collection(client):
+    """Ten titles, so per-row queries would exceed the budgets below."""
+    return [
+        add_movie(client, f"Movie {i}", genre="Drama, Crime", tmdb_id=f"tt{i:07d}", cast="A, B")
+        for i in range(10)
+    ]
+
+
+def test_create_movie(client, max_queries):
+    with max_queries(8):
+        add_movie(client, "Heat", tmdb_id="tt0113277")
+
+
+def test_create_movie_duplicate(client, collection, max_queries):
+    with max_queries(1):
+        response = client.post("/api/movies/", json={"title": "Movie 0", "tmdb_id": "tt0000000"})
+    assert response.status_code == 400
+
+
+def test_update_status(client, collection, max_queries):
+    movie_id = collection[0]["id"]
+    with max_queries(8):
+        response = client.patch(f"/api/movies/{movie_id}/status", params={"new_status": "completed"})
+    assert response.status_code == 200
+    assert response.json()["status"] == "completed"
+    assert response.json()["watched_at"] is not None
+
+
+def test_update_movie(client, collection, max_queries):
+    movie_id = collection[0]["id"]
+    with max_queries(5):
+        response = client.put(f"/api/movies/{movie_id}", json={"user_rating": 8.5})
+    assert response.status_code == 200
+
+
+def test_toggle_favorite(client, collection, max_queries):
+    movie_id = collection[0]["id"]
+    with max_queries(5):
+        response = client.patch(f"/api/movies/{movie_id}/favorite")
+    assert response.json()["is_favorite"] is True
+
+
+def test_delete_movie(client, collection, max_queries):
+    movie_id = collection[0]["id"]
+    with max_queries(5):
+        response = client.delete(f"/api/movies/{movie_id}")
+    assert response.status_code == 204
+
+
+def test_get_movie(client, collection, max_queries):
+    movie_id = collection[0]["id"]
+    with max_queries(1):
+        response = client.get(f"/api/movies/{movie_id}")
+    assert response.status_code == 200
+
+
+def test_list_movies(client, collection, max_queries):
+    with max_queries(1):
+        response = client.get("/api/movies/")
+    assert len(response.json()) == 10
+
+
+def test_changes(client, collection, max_queries):
+    with max_queries(4):
+        response = client.get("/api/movies/changes", params={"since": 0})
+    assert response.status_code == 200
@@ -0,0 +1,52 @@
+"""Surprise-me served from a stored snapshot, without blocking the event loop."""
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.database import SessionLocal
+from app.main import app
+from app.models import Movie
+from app.services.changes import change_feed
+from app.services.prefetch import recommendation_prefetcher
+
+
+def on_event_loop() -> bool:
+    try:
+        asyncio.get_running_loop()
+        return True
+    except RuntimeError:
+        return False
+
+
+@pytest.fixture
+def client(db, monkeypatch):
+    async def no_warm_up():
+        return None
+
+    monkeypatch.setattr(recommendation_prefetcher, "warm_up", no_warm_up)
+    return TestClient(app)
+
+
+def test_snapshot_is_read_off_the_event_loop(client, monkeypatch):
+    with SessionLocal() as db:
+        db.add(Movie(title="Heat", tmdb_id="tt0113277", genre="Crime"))
+        db.commit()
+        recommendation_prefetcher.store(db, change_feed.current_version(db), [
+            {"id": "tt0113277", "title": "Heat"},
+            {"id": "tt0119654", "title": "Ronin"},
+        ])
+
+    threads = []
+    cached = recommendation_prefetcher.cached
+
+    def spy(db, state):
+        threads.append(on_event_loop())
+        return cached(db, state)
+
+    monkeypatch.setattr(recommendation_prefetcher, "cached", spy)
+    response = client.get("/api/movies/recommendations/surprise-me")
+
+    assert response.status_code == 200
+    assert [rec["title"] for rec in response.json()["recommendations"]] == ["Ronin"]
+    assert threads == [False]
@@ -0,0 +1,94 @@
+"""Circuit breaker and rate limiter bookkeeping of app.services.resilience."""
+import asyncio
+
+import httpx
+import pytest
+
+from app.services.resilience import CircuitBreaker, Upstream, UpstreamUnavailable, omdb_quota_exceeded
+
+QUOTA_ERROR = {"Response": "False", "Error": "Request limit reached!"}
+
+
+def make_upstream(rate: float = 1000.0) -> Upstream:
+    upstream = Upstream("omdb-test", rate, is_throttled=omdb_quota_exceeded)
+    upstream.breaker = CircuitBreaker(failure_threshold=0.6, min_calls=5, window=20, open_seconds=30)
+    upstream.max_retries = 0
+    return upstream
+
+
+async def call(upstream: Upstream, handler) -> httpx.Response:
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+        return await upstream.request(client, "GET", "http://omdb.test/")
+
+
+def quota_error(request: httpx.Request) -> httpx.Response:
+    return httpx.Response(401, json=QUOTA_ERROR)
+
+
+def ok(request: httpx.Request) -> httpx.Response:
+    return httpx.Response(200, json={"Response": "True", "Title": "Heat"})
+
+
+def test_quota_errors_open_the_breaker():
+    upstream = make_upstream()
+
+    async def scenario():
+        for _ in range(20):
+            await call(upstream, quota_error)
+
+    with pytest.raises(UpstreamUnavailable):
+        asyncio.run(scenario())
+    assert upstream.breaker.state == CircuitBreaker.OPEN
+    assert upstream.breaker.failure_rate == 1.0
+    # Each response is recorded once: one failure per call made
+    assert upstream.failures == upstream.calls == 5
+
+
+def test_quota_error_on_half_open_probe_reopens():
+    upstream = make_upstream()
+    upstream.breaker._open()
+    upstream.breaker._opened_at -= upstream.breaker.open_seconds  # Cool-down over
+
+    asyncio.run(call(upstream, quota_error))
+    assert upstream.breaker.state == CircuitBreaker.OPEN
+
+
+def test_successful_probe_closes_the_breaker():
+    upstream = make_upstream()
+    upstream.breaker._open()
+    upstream.breaker._opened_at -= upstream.breaker.open_seconds
+
+    asyncio.run(call(upstream, ok))
+    assert upstream.breaker.state == CircuitBreaker.CLOSED
+
+
+def test_throttling_slows_the_bucket_down():
+    upstream = make_upstream(rate=8.0)
+    upstream.breaker.min_calls = 100  # Keep calling
+
+    async def scenario():
+        for _ in range(3):
+            await call(upstream, quota_error)
+
+    asyncio.run(scenario())
+    assert upstream.bucket.rate == 1.0  # Halved three times, never increased
+
+
+def test_successes_restore_the_bucket_rate():
+    upstream = make_upstream(rate=8.0)
+    upstream.bucket.rate = 1.0
+
+    async def scenario():
+        for _ in range(3):
+            await call(upstream, ok)
+
+    asyncio.run(scenario())
+    assert upstream.bucket.rate == pytest.approx(1.0 + 3 * 8.0 / 20)
+    assert upstream.failures == 0
+
+
+def test_other_401s_are_not_throttling():
+    response = httpx.Response(401, json={"Response": "False", "Error": "Invalid API key!"})
+    assert not omdb_quota_exceeded(response)
+    assert omdb_quota_exceeded(httpx.Response(401, json=QUOTA_ERROR))
+    assert not omdb_quota_exceeded(httpx.Response(200, json=QUOTA_ERROR))
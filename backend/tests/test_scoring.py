@@ -0,0 +1,124 @@
+"""
+Batched preference counting and scoring (app.services.scoring) give the
+same results as the single-pass code they replaced, inline or in the pool.
+"""
+import asyncio
+import os
+import random
+from collections import Counter
+from types import SimpleNamespace
+
+import pytest
+
+from app import executors
+from app.config import settings
+from app.services import scoring
+
+GENRES = ["Drama", "Crime", "Comedy", "Sci-Fi", "Horror", "Romance"]
+PEOPLE = ["Ana Costa", "Ben Ito", "Chen Park", "Dara Khan", "Eli Novak"]
+WORDS = ["heist", "crew", "detective", "robbery", "city", "night", "family", "space", "love", "betrayal"]
+
+
+def collection(size: int, seed: int = 7):
+    """Titles with missing fields and plenty of ties between counts."""
+    rng = random.Random(seed)
+
+    def maybe(value):
+        return value if rng.random() < 0.8 else None
+
+    return [
+        SimpleNamespace(
+            genre=maybe(", ".join(rng.sample(GENRES, rng.randint(1, 3)))),
+            director=maybe(rng.choice(PEOPLE)),
+            cast=maybe(", ".join(rng.sample(PEOPLE, rng.randint(1, 5)))),
+            release_year=maybe(rng.randint(1950, 2024)),
+            description=maybe("The " + " and ".join(rng.sample(WORDS, rng.randint(2, 8))) + "."),
+        )
+        for _ in range(size)
+    ]
+
+
+def reference_preferences(movies):
+    """The single-pass profile the recommendation engine computed before it was batched."""
+    genres, directors, actors, years, plot_keywords = [], [], [], [], []
+    for movie in movies:
+        if movie.genre:
+            genres.extend(g.strip() for g in movie.genre.split(','))
+        if movie.director:
+            directors.append(movie.director)
+        if movie.cast:
+            actors.extend(c.strip() for c in movie.cast.split(',')[:3])
+        if movie.release_year:
+            years.append(movie.release_year)
+        if movie.description:
+            plot_keywords.extend(scoring.extract_keywords(movie.description))
+    return {
+        'top_genres': [genre for genre, _ in Counter(genres).most_common(5)],
+        'top_directors': [director for director, _ in Counter(directors).most_common(2)],
+        'top_actors': [actor for actor, _ in Counter(actors).most_common(2)],
+        'top_keywords': [kw for kw, _ in Counter(plot_keywords).most_common(10)],
+        'avg_year': int(sum(years) / len(years) if years else 2020),
+        'year_range': (min(years) if years else 2000, max(years) if years else 2024),
+        'all_genres': set(genres),
+    }
+
+
+def batched_preferences(movies, batch_size: int):
+    rows = scoring.profile_rows(movies)
+    return scoring.merge_preferences([
+        scoring.count_preferences(batch) for batch in executors.split(rows, batch_size)
+    ])
+
+
+@pytest.mark.parametrize("size", [0, 1, 50, 333])
+@pytest.mark.parametrize("batch_size", [1, 7, 5000])
+def test_batched_profile_matches_single_pass(size, batch_size):
+    movies = collection(size)
+    # Ties in most_common are broken by first appearance, so the order must match too
+    assert batched_preferences(movies, batch_size) == reference_preferences(movies)
+
+
+def test_keywords_skip_stop_words_and_short_words():
+    assert scoring.extract_keywords("The crew and their last big HEIST, planned with care") == [
+        "crew", "last", "heist", "planned", "care",
+    ]
+    assert len(scoring.extract_keywords(" ".join(WORDS * 3))) == 15
+    assert scoring.extract_keywords(None) == []
+
+
+def test_similarity_weights():
+    preferences = {"all_genres": {"Crime", "Drama"}, "avg_year": 1995, "top_keywords": ["heist", "crew"]}
+    perfect = {"genre": "Crime, Drama", "release_year": "1995", "overview": "A heist crew."}
+    assert scoring.calculate_similarity(perfect, preferences) == pytest.approx(1.0)
+
+    partial = {"genres": "Crime, Western", "release_year": "2020-05-01", "description": "A heist."}
+    assert scoring.calculate_similarity(partial, preferences) == pytest.approx(0.2 + 0.3 * 0.5 + 0.15)
+    assert scoring.calculate_similarity({"release_year": "N/A"}, preferences) == 0.0
+
+
+def test_process_pool_matches_inline(monkeypatch):
+    movies = collection(2000)
+    rows = scoring.profile_rows(movies)
+    candidates = [
+        {"genre": movie.genre, "release_year": movie.release_year, "overview": movie.description}
+        for movie in collection(300, seed=11)
+    ]
+
+    async def profile_and_scores():
+        counts = await executors.map_cpu(scoring.count_preferences, executors.split(rows, 500))
+        preferences = scoring.merge_preferences(counts)
+        return preferences, await executors.run_cpu(scoring.score_candidates, candidates, preferences)
+
+    monkeypatch.setattr(settings, "CPU_POOL_WORKERS", 0)
+    inline = asyncio.run(profile_and_scores())
+
+    monkeypatch.setattr(settings, "CPU_POOL_WORKERS", 2)
+    try:
+        pooled = asyncio.run(profile_and_scores())
+        # Not the inline fallback
+        assert asyncio.run(executors.run_cpu(os.getpid)) != os.getpid()
+    finally:
+        executors.shutdown()
+
+    assert pooled == inline
+    assert inline[0] == reference_preferences(movies)
@@ -0,0 +1,68 @@
+"""Statement timeouts derived from the request deadline (app.database)."""
+import pytest
+from sqlalchemy import text
+
+from app import database
+from app.config import settings
+from app.database import SessionLocal, apply_request_deadline
+from app.deadline import DeadlineExceeded, deadline_scope
+
+
+class FakeConnection:
+    """Records the statements apply_request_deadline sends."""
+
+    class dialect:
+        name = "postgresql"
+
+    def __init__(self):
+        self.statements = []
+
+    def exec_driver_sql(self, statement):
+        self.statements.append(statement)
+
+
+def begin(budget):
+    """The SET LOCAL timeouts (ms) sent when a transaction begins with `budget` seconds left."""
+    connection = FakeConnection()
+    with deadline_scope(budget):
+        apply_request_deadline(None, None, connection)
+    prefix = "SET LOCAL statement_timeout = "
+    assert all(statement.startswith(prefix) for statement in connection.statements)
+    return [int(statement[len(prefix):]) for statement in connection.statements]
+
+
+@pytest.fixture
+def session_mode(monkeypatch):
+    monkeypatch.setattr(settings, "DB_POOL_MODE", "session")
+    monkeypatch.setattr(database, "DEFAULT_STATEMENT_TIMEOUT_MS", 25_000)
+
+
+def test_ordinary_request_keeps_the_connection_default(session_mode):
+    assert begin(25) == []
+    assert begin(24.5) == []
+
+
+def test_other_budgets_are_set_per_transaction(session_mode):
+    assert begin(5) == [pytest.approx(5000, abs=50)]
+    assert begin(60) == [pytest.approx(60_000, abs=50)]  # X-Request-Timeout
+    assert begin(None) == [0]  # Background work
+
+
+def test_transaction_pooling_sets_every_request_transaction(monkeypatch):
+    monkeypatch.setattr(settings, "DB_POOL_MODE", "transaction")
+    assert begin(25) == [pytest.approx(25_000, abs=50)]
+    assert begin(None) == []
+
+
+def test_spent_budget_fails_before_the_query(session_mode):
+    with pytest.raises(DeadlineExceeded):
+        begin(0)
+
+
+def test_connections_start_with_the_default_timeout(db):
+    if settings.DB_POOL_MODE != "session":
+        pytest.skip("Only session pool mode sets the timeout when connecting")
+    with deadline_scope(settings.REQUEST_TIMEOUT_SECONDS):
+        with SessionLocal() as session:
+            timeout = session.execute(text("SELECT current_setting('statement_timeout')")).scalar()
+    assert timeout == f"{database.DEFAULT_STATEMENT_TIMEOUT_MS // 1000}s"
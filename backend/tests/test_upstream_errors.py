@@ -0,0 +1,47 @@
+"""OMDb outages and spent time budgets surface as 503/504, not as "not found"."""
+import pytest
+from fastapi.testclient import TestClient
+
+from app.deadline import DeadlineExceeded
+from app.main import app
+from app.services import get_tmdb_service
+from app.services.resilience import CircuitBreaker, omdb_upstream
+from app.services.tmdb import TMDBService
+
+
+@pytest.fixture
+def tmdb_service():
+    service = TMDBService()
+    app.dependency_overrides[get_tmdb_service] = lambda: service
+    yield service
+    app.dependency_overrides.pop(get_tmdb_service, None)
+
+
+@pytest.fixture
+def open_breaker(monkeypatch):
+    breaker = CircuitBreaker(failure_threshold=0.5, min_calls=1, window=10, open_seconds=30)
+    breaker._open()
+    monkeypatch.setattr(omdb_upstream, "breaker", breaker)
+
+
+@pytest.mark.parametrize("url", [
+    "/api/movies/tmdb/movie/tt0113277",
+    "/api/movies/tmdb/tv/tt0903747",
+    "/api/movies/tmdb/search/movies?q=heat",
+    "/api/movies/tmdb/search/tv?q=breaking",
+])
+def test_open_breaker_is_503_with_retry_after(tmdb_service, open_breaker, url):
+    response = TestClient(app).get(url)
+
+    assert response.status_code == 503
+    assert 1 <= int(response.headers["Retry-After"]) <= 31
+
+
+def test_spent_budget_is_504(tmdb_service, monkeypatch):
+    async def spent(params):
+        raise DeadlineExceeded("omdb call")
+
+    monkeypatch.setattr(tmdb_service, "_get", spent)
+    response = TestClient(app).get("/api/movies/tmdb/movie/tt0113277")
+
+    assert response.status_code == 504
@@ -0,0 +1,126 @@
+"""Watch events and their daily/monthly rollups (app.services.watch_history)."""
+from datetime import datetime, timezone
+
+import pytest
+
+from app.crud.movie import movie_crud
+from app.database import SessionLocal
+from app.models.movie import ContentType, Movie, WatchStatus
+from app.models.watch_event import WatchEvent, WatchTimeDaily, WatchTimeMonthly
+from app.schemas.movie import MovieCreate, MovieUpdate
+from app.services.watch_history import DEFAULT_EPISODE_MINUTES, watch_history
+
+
+class RecordingSession:
+    """Stands in for a Session: keeps what record() adds and executes."""
+
+    def __init__(self):
+        self.added = []
+        self.executed = []
+
+    def add(self, obj):
+        self.added.append(obj)
+
+    def execute(self, statement):
+        self.executed.append(statement)
+
+    def flush(self):
+        pass
+
+
+def record(movie: Movie, before):
+    session = RecordingSession()
+    event = watch_history.record(session, movie, before)
+    return event, session
+
+
+def test_episode_minutes_fall_back_to_the_default():
+    assert watch_history.episode_minutes(Movie(duration=600, total_episodes=10)) == 60
+    assert watch_history.episode_minutes(Movie(duration=None, total_episodes=10)) == DEFAULT_EPISODE_MINUTES
+
+
+def test_completing_a_movie_counts_its_runtime_once():
+    movie = Movie(id=1, content_type=ContentType.MOVIE, status=WatchStatus.COMPLETED, duration=170)
+    event, session = record(movie, (WatchStatus.WATCHING, 0))
+    assert (event.minutes, event.completions, event.episodes_delta) == (170, 1, 0)
+    # One upsert per rollup table
+    assert session.added == [event] and len(session.executed) == 2
+
+    movie.status = WatchStatus.WATCHING
+    event, _ = record(movie, (WatchStatus.COMPLETED, 0))
+    assert (event.minutes, event.completions) == (-170, -1)
+
+
+def test_tv_progress_counts_episodes():
+    show = Movie(
+        id=2, content_type=ContentType.TV_SHOW, status=WatchStatus.WATCHING,
+        duration=400, total_episodes=10, episodes_watched=5,
+    )
+    event, _ = record(show, (WatchStatus.WATCHING, 2))
+    assert (event.episodes_delta, event.minutes, event.completions) == (3, 120, 0)
+
+
+def test_unrelated_edits_record_nothing():
+    movie = Movie(id=3, content_type=ContentType.MOVIE, status=WatchStatus.WISHLIST, duration=90)
+    event, session = record(movie, watch_history.state(movie))
+    assert event is None and session.executed == []
+
+
+def rollups(session, table, key):
+    return {
+        (getattr(row, key), row.content_type): (row.minutes, row.completions, row.events)
+        for row in session.query(table)
+    }
+
+
+def test_rollups_match_the_event_log(db):
+    with SessionLocal() as session:
+        heat = movie_crud.create(session, MovieCreate(title="Heat", duration=170))
+        show = movie_crud.create(session, MovieCreate(
+            title="Breaking Bad", content_type=ContentType.TV_SHOW, duration=2760, total_episodes=62,
+        ))
+        movie_crud.update(session, heat.id, MovieUpdate(status=WatchStatus.COMPLETED))
+        movie_crud.update_progress(session, show.id, 10)
+        movie_crud.update_progress(session, show.id, 7)  # Corrected down
+        movie_crud.toggle_watched(session, heat.id)  # Un-completed
+
+        # Adding each title is an event too
+        assert session.query(WatchEvent).count() == 6
+        daily = rollups(session, WatchTimeDaily, "day")
+        monthly = rollups(session, WatchTimeMonthly, "month")
+
+        today = datetime.now(timezone.utc).date()
+        assert daily == {
+            (today, ContentType.MOVIE): (0, 0, 3),
+            (today, ContentType.TV_SHOW): (pytest.approx(7 * 2760 / 62), 0, 3),
+        }
+        assert monthly == {(today.replace(day=1), kind): totals for (_, kind), totals in daily.items()}
+
+        # Recomputing from the events gives the same rollups
+        watch_history.rebuild_rollups(session)
+        session.commit()
+        assert rollups(session, WatchTimeDaily, "day") == daily
+        assert rollups(session, WatchTimeMonthly, "month") == monthly
+
+
+def test_backfill_runs_once(db):
+    watched_at = datetime(2024, 3, 15, 20, tzinfo=timezone.utc)
+    with SessionLocal() as session:
+        session.add_all([
+            Movie(title="Heat", status=WatchStatus.COMPLETED, duration=170, watched_at=watched_at),
+            Movie(title="Ronin", status=WatchStatus.WISHLIST, duration=122),
+            Movie(
+                title="The Wire", content_type=ContentType.TV_SHOW, status=WatchStatus.WATCHING,
+                episodes_watched=4, duration=3600, total_episodes=60,
+            ),
+        ])
+        session.commit()
+
+        assert watch_history.backfill(session) == 2
+        assert watch_history.backfill(session) == 0
+        monthly = rollups(session, WatchTimeMonthly, "month")
+
+    assert monthly[(watched_at.date().replace(day=1), ContentType.MOVIE)] == (170, 1, 1)
+    this_month = datetime.now(timezone.utc).date().replace(day=1)
+    assert monthly[(this_month, ContentType.TV_SHOW)] == (240, 0, 1)
+    assert len(monthly) == 2
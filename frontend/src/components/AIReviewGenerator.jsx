@@ -18,27 +18,61 @@ const AIReviewGenerator = ({ movie, onClose, onReviewGenerated }) => {
     }
 
     setLoading(true);
+    setGeneratedReview('');
     try {
       const response = await fetch(
-        `${API_BASE_URL}/api/movies/${movie.id}/generate-review?user_comments=${encodeURIComponent(userComments)}`,
+        `${API_BASE_URL}/api/movies/${movie.id}/generate-review/stream?user_comments=${encodeURIComponent(userComments)}`,
         {
           method: 'POST',
           headers: {
-            'Content-Type': 'application/json',
+            'Accept': 'text/event-stream',
           },
         }
       );
 
-      if (!response.ok) {
+      if (!response.ok || !response.body) {
         throw new Error('Failed to generate review');
       }
 
-      const data = await response.json();
-      setGeneratedReview(data.generated_review);
+      // Read Server-Sent Events: "data:" chunks as tokens arrive, then "done" or "error"
+      const reader = response.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = '';
+      let finalReview = null;
+
+      while (finalReview === null) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+
+        const events = buffer.split('\n\n');
+        buffer = events.pop();
+        for (const rawEvent of events) {
+          const lines = rawEvent.split('\n');
+          const eventType = lines.find((line) => line.startsWith('event:'))?.slice(6).trim() || 'message';
+          const dataLine = lines.find((line) => line.startsWith('data:'));
+          if (!dataLine) continue;
+          const data = JSON.parse(dataLine.slice(5));
+
+          if (eventType === 'error') {
+            throw new Error(data.detail || 'Failed to generate review');
+          } else if (eventType === 'done') {
+            finalReview = data.generated_review;
+          } else {
+            setGeneratedReview((previous) => previous + data.text);
+          }
+        }
+      }
+
+      if (finalReview === null) {
+        throw new Error('Review stream ended unexpectedly');
+      }
+
+      setGeneratedReview(finalReview);
       toast.success('AI review generated!');
       
       if (onReviewGenerated) {
-        onReviewGenerated(data.generated_review);
+        onReviewGenerated(finalReview);
       }
     } catch (error) {
       console.error('Error generating review:', error);
@@ -1,4 +1,4 @@
-import { useState, useEffect } from 'react';
+import { useState, useEffect, useRef } from 'react';
 import { toast } from 'react-hot-toast';
 import MovieCard from '../components/MovieCard';
 import SearchBar from '../components/SearchBar';
@@ -6,7 +6,7 @@ import FilterBar from '../components/FilterBar';
 import LoadingSpinner from '../components/LoadingSpinner';
 import MovieDetailModal from '../components/MovieDetailModal';
 import SurpriseMeModal from '../components/SurpriseMeModal';
-import { getMovies, searchMovies, toggleFavorite, getFavorites } from '../services/movieService';
+import { getMovies, getChanges, applyChanges, subscribeToChanges, searchMovies, toggleFavorite, getFavorites } from '../services/movieService';
 import { Sparkles } from 'lucide-react';
 import './HomePage.css';
 
@@ -17,6 +17,8 @@ const HomePage = () => {
   const [searchQuery, setSearchQuery] = useState('');
   const [selectedMovie, setSelectedMovie] = useState(null);
   const [showSurpriseMe, setShowSurpriseMe] = useState(false);
+  const versionRef = useRef(null);
+  const syncRef = useRef({ running: false, again: false });
   const [filters, setFilters] = useState({
     status: null,
     contentType: null,
@@ -27,6 +29,9 @@ const HomePage = () => {
     fetchMovies();
   }, []);
 
+  // Changes made in other tabs and devices are pushed by the server
+  useEffect(() => subscribeToChanges(() => syncMovies()), []);
+
   useEffect(() => {
     applyFilters();
   }, [movies, filters, searchQuery]);
@@ -34,7 +39,10 @@ const HomePage = () => {
   const fetchMovies = async () => {
     try {
       setLoading(true);
+      // Take the version first so nothing changed during the load is missed
+      const { version } = await getChanges();
       const data = await getMovies();
+      versionRef.current = version;
       setMovies(data);
     } catch (error) {
       toast.error('Failed to load movies');
@@ -44,6 +52,36 @@ const HomePage = () => {
     }
   };
 
+  // Fetch only what changed since the last load or sync
+  const syncMovies = async () => {
+    // Coalesce bursts of notifications into one follow-up sync
+    if (syncRef.current.running) {
+      syncRef.current.again = true;
+      return;
+    }
+    if (versionRef.current === null) {
+      return; // Initial load still running; it picks up everything
+    }
+    syncRef.current.running = true;
+    try {
+      const changes = await getChanges(versionRef.current);
+      if (changes.reset) {
+        return fetchMovies();
+      }
+      versionRef.current = changes.version;
+      setMovies(prev => applyChanges(prev, changes));
+    } catch (error) {
+      console.error('Sync error:', error);
+      fetchMovies();
+    } finally {
+      syncRef.current.running = false;
+      if (syncRef.current.again) {
+        syncRef.current.again = false;
+        syncMovies();
+      }
+    }
+  };
+
   const applyFilters = async () => {
     let filtered = [...movies];
 
@@ -98,7 +136,7 @@ const HomePage = () => {
   };
 
   const handleMovieUpdate = () => {
-    fetchMovies();
+    syncMovies();
     setSelectedMovie(null);
   };
 
@@ -7,6 +7,36 @@ export const getMovies = async (params = {}) => {
   return response.data;
 };
 
+// Changes since `version` (omit it to get the current version only)
+export const getChanges = async (version = null) => {
+  const params = version === null ? {} : { since: version };
+  const response = await api.get('/movies/changes', { params });
+  return response.data;
+};
+
+// Apply a change-feed response to a list of movies, newest first
+export const applyChanges = (movies, changes) => {
+  const deleted = new Set(changes.deletes);
+  const updated = new Map(changes.upserts.map(m => [m.id, m]));
+  const kept = movies
+    .filter(m => !deleted.has(m.id))
+    .map(m => updated.get(m.id) ?? m);
+  const known = new Set(kept.map(m => m.id));
+  const added = changes.upserts.filter(m => !known.has(m.id) && !deleted.has(m.id));
+  return [...added, ...kept].sort((a, b) => new Date(b.created_at) - new Date(a.created_at));
+};
+
+// Server-sent change notifications; `onChange` is called for every change or resync.
+// Returns a function that closes the stream.
+export const subscribeToChanges = (onChange) => {
+  const source = new EventSource(`${api.defaults.baseURL}/movies/events`);
+  // `ready` also fires after automatic reconnects, when events may have been missed
+  source.addEventListener('ready', onChange);
+  source.addEventListener('change', onChange);
+  source.addEventListener('resync', onChange);
+  return () => source.close();
+};
+
 export const getMovieById = async (id) => {
   const response = await api.get(`/movies/${id}`);
   return response.data;
@@ -32,6 +62,16 @@ export const getFavorites = async () => {
   return response.data;
 };
 
+// Filters, sorting and facet counts in one request, e.g.
+// { status: ['watching', 'wishlist'], genre: ['Drama'], year_min: 2000, sort: '-user_rating' }
+export const queryMovies = async (params = {}) => {
+  const response = await api.get('/movies/query', {
+    params,
+    paramsSerializer: { indexes: null }, // status=a&status=b
+  });
+  return response.data;
+};
+
 export const createMovie = async (data) => {
   const response = await api.post('/movies/', data);
   return response.data;